@@ -0,0 +1,289 @@
+# backend/agent_log_store.py
+
+"""
+Append-only agent audit log with rotation and a compact sequence index.
+
+Layout (all under ``logs/``):
+- ``agent_log.txt``       current segment, one ``[timestamp] [run_id] agent: status`` line per event
+- ``agent_log.idx``       fixed-width records (byte offset, crc32(run_id), crc32(agent)) per line
+- ``agent_log.meta.json`` first sequence number and start time of the current segment
+- ``archive/``            rotated segments as ``agent_log.<first>-<last>.txt.gz``
+
+Every line has a global sequence number (``base_seq`` + position in the segment), so
+readers page with a cursor and filter by run/agent by scanning the 16-byte index
+records instead of the log text. Writers and readers lock the log file itself
+(``flock``), so the forked workers of ``backend.serve`` share it safely.
+"""
+
+import contextlib
+import gzip
+import json
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
+
+LOG_DIR = Path("logs")
+LOG_FILE = LOG_DIR / "agent_log.txt"
+INDEX_FILE = LOG_DIR / "agent_log.idx"
+META_FILE = LOG_DIR / "agent_log.meta.json"
+ARCHIVE_DIR = LOG_DIR / "archive"
+
+LOG_MAX_BYTES = int(os.getenv("AGENT_LOG_MAX_BYTES", 5 * 1024 * 1024))
+LOG_ROTATE_SECONDS = int(os.getenv("AGENT_LOG_ROTATE_SECONDS", 24 * 3600))
+LOG_MAX_ARCHIVES = int(os.getenv("AGENT_LOG_MAX_ARCHIVES", 30))
+
+# offset of the line in the segment, crc32(run_id), crc32(agent)
+_RECORD = struct.Struct("<QII")
+_ARCHIVE_RE = re.compile(r"agent_log\.(\d+)-(\d+)\.txt\.gz$")
+_LINE_RE = re.compile(r"^\[(?P<timestamp>[^\]]*)\] \[(?P<run_id>[^\]]*)\] (?P<agent>[^:]+): (?P<status>.*)$")
+_SCAN_CHUNK = 4096  # index records read per batch when filtering
+
+_lock = threading.Lock()  # fallback where flock is unavailable
+
+
+def _crc(value: str) -> int:
+    return zlib.crc32(value.encode("utf-8"))
+
+
+def _load_meta() -> dict:
+    if META_FILE.exists():
+        return json.loads(META_FILE.read_text())
+    meta = {"base_seq": 0, "started": time.time()}
+    _save_meta(meta)
+    return meta
+
+
+def _save_meta(meta: dict):
+    tmp = META_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, META_FILE)
+
+
+def _segment_count() -> int:
+    return INDEX_FILE.stat().st_size // _RECORD.size if INDEX_FILE.exists() else 0
+
+
+@contextlib.contextmanager
+def _locked(shared: bool = False):
+    """Holds a lock on the log file across threads and processes; yields the locked file."""
+    LOG_DIR.mkdir(exist_ok=True)
+    with LOG_FILE.open("ab") as f:
+        if fcntl is None:
+            with _lock:
+                yield f
+            return
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _index_stale() -> bool:
+    """
+    The index must have one record per log line. The log is append-only, so that holds
+    exactly when the last indexed line ends at the end of the log (a crash between the
+    two writes, a truncated index or a log written before the index existed all fail it).
+    """
+    log_size = LOG_FILE.stat().st_size if LOG_FILE.exists() else 0
+    count = _segment_count()
+    if count == 0:
+        return log_size > 0
+    with INDEX_FILE.open("rb") as idx:
+        idx.seek((count - 1) * _RECORD.size)
+        offset = _RECORD.unpack(idx.read(_RECORD.size))[0]
+    if offset >= log_size:
+        return True
+    with LOG_FILE.open("rb") as log:
+        log.seek(offset)
+        log.readline()
+        return log.tell() != log_size
+
+
+def _ensure_index():
+    """Rebuilds the index when it does not match the log line for line."""
+    if not _index_stale():
+        return
+    with LOG_FILE.open("rb") as log, INDEX_FILE.open("wb") as idx:
+        offset = 0
+        for raw in log:
+            entry = _parse_line(raw.decode("utf-8", errors="replace"))
+            idx.write(_RECORD.pack(offset, _crc(entry["run_id"]), _crc(entry["agent"])))
+            offset += len(raw)
+
+
+def _should_rotate(meta: dict) -> bool:
+    if not LOG_FILE.exists() or _segment_count() == 0:
+        return False
+    if LOG_FILE.stat().st_size >= LOG_MAX_BYTES:
+        return True
+    return time.time() - meta["started"] >= LOG_ROTATE_SECONDS
+
+
+def _rotate(meta: dict) -> dict:
+    count = _segment_count()
+    first, last = meta["base_seq"], meta["base_seq"] + count - 1
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    archive_path = ARCHIVE_DIR / f"agent_log.{first:010d}-{last:010d}.txt.gz"
+    with LOG_FILE.open("rb") as src, gzip.open(archive_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    LOG_FILE.write_bytes(b"")
+    INDEX_FILE.write_bytes(b"")
+    meta = {"base_seq": last + 1, "started": time.time()}
+    _save_meta(meta)
+
+    archives = sorted(ARCHIVE_DIR.glob("agent_log.*.txt.gz"))
+    for old in archives[:-LOG_MAX_ARCHIVES]:
+        old.unlink()
+    return meta
+
+
+def _parse_line(line: str) -> dict:
+    match = _LINE_RE.match(line.rstrip("\n"))
+    if not match:
+        # Lines written before run IDs were logged: "[timestamp] agent: status"
+        legacy = re.match(r"^\[(?P<timestamp>[^\]]*)\] (?P<agent>[^:]+): (?P<status>.*)$", line.rstrip("\n"))
+        if legacy:
+            return {**legacy.groupdict(), "run_id": "-"}
+        return {"timestamp": "", "run_id": "-", "agent": "", "status": line.rstrip("\n")}
+    return match.groupdict()
+
+
+def append(agent: str, status: str, run_id: str = None, timestamp: str = None) -> int:
+    """Appends one event to the log and returns its sequence number."""
+    timestamp = timestamp or time.strftime("%Y-%m-%d %H:%M:%S")
+    run_id = run_id or "-"
+    line = f"[{timestamp}] [{run_id}] {agent}: {status}\n".encode("utf-8")
+
+    with _locked():
+        _ensure_index()
+        meta = _load_meta()
+        if _should_rotate(meta):
+            meta = _rotate(meta)
+
+        offset = LOG_FILE.stat().st_size if LOG_FILE.exists() else 0
+        with LOG_FILE.open("ab") as f:
+            f.write(line)
+        seq = meta["base_seq"] + _segment_count()
+        with INDEX_FILE.open("ab") as idx:
+            idx.write(_RECORD.pack(offset, _crc(run_id), _crc(agent)))
+        return seq
+
+
+def _read_segment(base_seq: int, start: int, limit: int, run_id, agent, stop: int = None) -> list:
+    """Reads up to ``limit`` matching entries from segment positions ``start`` to ``stop``."""
+    run_crc = _crc(run_id) if run_id else None
+    agent_crc = _crc(agent) if agent else None
+    count = _segment_count() if stop is None else min(stop, _segment_count())
+    if start >= count or limit <= 0:
+        return []
+
+    log_size = LOG_FILE.stat().st_size
+    entries = []
+    with INDEX_FILE.open("rb") as idx, LOG_FILE.open("rb") as log:
+        pos = start
+        while pos < count and len(entries) < limit:
+            batch_len = min(_SCAN_CHUNK, count - pos)
+            idx.seek(pos * _RECORD.size)
+            # One extra record (when present) gives the end offset of the batch's last line
+            raw = idx.read((batch_len + 1) * _RECORD.size)
+            records = [_RECORD.unpack_from(raw, i * _RECORD.size) for i in range(len(raw) // _RECORD.size)]
+            for i in range(batch_len):
+                offset, r_crc, a_crc = records[i]
+                if (run_crc is not None and r_crc != run_crc) or (agent_crc is not None and a_crc != agent_crc):
+                    continue
+                end = records[i + 1][0] if i + 1 < len(records) else log_size
+                log.seek(offset)
+                entry = _parse_line(log.read(end - offset).decode("utf-8", errors="replace"))
+                if (run_id and entry["run_id"] != run_id) or (agent and entry["agent"] != agent):
+                    continue  # crc32 collision
+                entries.append({"seq": base_seq + pos + i, **entry})
+                if len(entries) >= limit:
+                    break
+            pos += batch_len
+    return entries
+
+
+def _read_archives(after: int, limit: int, run_id, agent) -> list:
+    """Reads matching entries with ``seq > after`` from rotated archives (oldest first)."""
+    entries = []
+    if not ARCHIVE_DIR.exists():
+        return entries
+    for path in sorted(ARCHIVE_DIR.glob("agent_log.*.txt.gz")):
+        match = _ARCHIVE_RE.search(path.name)
+        if not match:
+            continue
+        first, last = int(match.group(1)), int(match.group(2))
+        if last <= after:
+            continue
+        with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+            for seq, line in enumerate(f, start=first):
+                if seq <= after:
+                    continue
+                entry = _parse_line(line)
+                if (run_id and entry["run_id"] != run_id) or (agent and entry["agent"] != agent):
+                    continue
+                entries.append({"seq": seq, **entry})
+                if len(entries) >= limit:
+                    return entries
+    return entries
+
+
+def read_log(cursor: int = None, limit: int = 200, run_id: str = None, agent: str = None) -> dict:
+    """
+    Returns log entries after ``cursor`` (a sequence number previously returned as
+    ``next_cursor``). Without a cursor the newest ``limit`` entries are returned.
+    Optional ``run_id``/``agent`` filters are matched against the index, so only
+    matching lines are read from disk.
+    """
+    limit = max(1, min(limit, 1000))
+
+    with _locked(shared=True) as f:
+        if _index_stale():
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)  # rebuilding writes the index
+            _ensure_index()
+        meta = _load_meta()
+        base_seq = meta["base_seq"]
+        count = _segment_count()
+
+        if cursor is None:
+            if not run_id and not agent:
+                start = max(0, count - limit)
+                entries = _read_segment(base_seq, start, limit, None, None)
+            else:
+                # Tail of the filtered stream: walk the index backwards in chunks
+                entries = []
+                end = count
+                while end > 0 and len(entries) < limit:
+                    start = max(0, end - _SCAN_CHUNK)
+                    chunk = _read_segment(base_seq, start, end - start, run_id, agent, stop=end)
+                    entries = chunk + entries
+                    end = start
+                entries = entries[-limit:]
+        else:
+            entries = []
+            if cursor < base_seq - 1:
+                entries = _read_archives(cursor, limit, run_id, agent)
+            start = max(0, cursor + 1 - base_seq)
+            entries += _read_segment(base_seq, start, limit - len(entries), run_id, agent)
+
+        last_seq = base_seq + count - 1
+    # A short page means everything up to last_seq was scanned: resume from there, not from
+    # the last match, so sparse filters don't rescan the same non-matching lines every poll
+    next_cursor = entries[-1]["seq"] if cursor is not None and len(entries) >= limit else last_seq
+    return {"entries": entries, "next_cursor": next_cursor, "last_seq": last_seq}
+
+
+def format_entries(entries: list) -> str:
+    return "\n".join(f"[{e['timestamp']}] {e['agent']}: {e['status']}" for e in entries)
@@ -1,12 +1,23 @@
 # backend/agent_status_tracker.py
 
+import contextlib
 import json
+import os
+import threading
 import time
 from pathlib import Path
+from backend import agent_log_store
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
 
 STATUS_FILE = Path("logs/agent_status.json")
-LOG_FILE = Path("logs/agent_log.txt")
+LOCK_FILE = STATUS_FILE.with_suffix(".lock")
+LOG_FILE = agent_log_store.LOG_FILE
 STATUS_FILE.parent.mkdir(exist_ok=True)
+_status_lock = threading.Lock()  # fallback where flock is unavailable
 
 AGENTS = [
     "RFP Analyzer",
@@ -17,27 +28,51 @@ AGENTS = [
     "Scorer"
 ]
 
+@contextlib.contextmanager
+def _locked():
+    """Serialises status read-modify-writes across threads and the forked workers of ``backend.serve``."""
+    with LOCK_FILE.open("a") as f:
+        if fcntl is None:
+            with _status_lock:
+                yield
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _pending_status() -> dict:
+    return {agent: {"state": "⏳ Pending", "timestamp": None} for agent in AGENTS}
+
+def _write_status(status: dict):
+    # Write-then-rename so readers never see a half-written file; the tmp name is per process
+    tmp = STATUS_FILE.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(status, indent=2))
+    os.replace(tmp, STATUS_FILE)
+
 def reset_status():
-    status = {
-        agent: {"state": "⏳ Pending", "timestamp": None}
-        for agent in AGENTS
-    }
-    STATUS_FILE.write_text(json.dumps(status, indent=2))
+    with _locked():
+        _write_status(_pending_status())
 
-def update_status(agent: str, new_status: str):
+def update_status(agent: str, new_status: str, run_id: str = None):
     timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-    if not STATUS_FILE.exists():
-        reset_status()
-    data = json.loads(STATUS_FILE.read_text())
-    data[agent] = {"state": new_status, "timestamp": timestamp}
-    STATUS_FILE.write_text(json.dumps(data, indent=2))
-    with LOG_FILE.open("a") as f:
-        f.write(f"[{timestamp}] {agent}: {new_status}\n")
+    with _locked():
+        data = json.loads(STATUS_FILE.read_text()) if STATUS_FILE.exists() else _pending_status()
+        data[agent] = {"state": new_status, "timestamp": timestamp}
+        _write_status(data)
+    agent_log_store.append(agent, new_status, run_id=run_id, timestamp=timestamp)
 
 def get_status():
     if not STATUS_FILE.exists():
         reset_status()
     return json.loads(STATUS_FILE.read_text())
 
-def get_log():
-    return LOG_FILE.read_text() if LOG_FILE.exists() else "No logs yet."
+def get_log(cursor: int = None, limit: int = 200, run_id: str = None, agent: str = None):
+    """Returns a page of log entries; see ``agent_log_store.read_log``."""
+    return agent_log_store.read_log(cursor=cursor, limit=limit, run_id=run_id, agent=agent)
+
+
+def get_log_text(limit: int = 200) -> str:
+    entries = agent_log_store.read_log(limit=limit)["entries"]
+    return agent_log_store.format_entries(entries) if entries else "No logs yet."
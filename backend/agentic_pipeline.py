@@ -5,30 +5,39 @@ from backend.llm_utils import (
     expand_rfp,
     optimize_proposal_tone,
     check_compliance,
-    score_proposal_quality
 )
-from backend.pinecone_utils import retrieve_similar_docs
+from backend.pinecone_utils import industry_filter, retrieve_with_sources
 
 from backend.llm_utils import (
     expand_rfp,
     optimize_proposal_tone,
     check_compliance,
-    score_proposal_quality,
     extract_rfp_metadata,
     summarize_table  # ✅ add this
 )
 
 from backend.agent_status_tracker import update_status
+from backend.tracing import traced_node
+from backend.checkpointing import create_checkpointer, run_config
+from backend.compliance import run_compliance_check
+from backend.scoring import PROPOSAL_CANDIDATES, best_of_n, format_score_report, score_many
+from backend.llm_utils import refine_for_rfp_changes
+from backend.rfp_heuristics import heuristic_rfp_metadata
+import difflib
+import logging
+import os
+import re
 
 # Define shared state type (dict-style)
 from backend.llm_utils import extract_rfp_metadata
 
+@traced_node("Enrich RFP")
 def enrich_rfp_node(state):
-    update_status("RFP Analyzer", "🧠 In Progress")
+    update_status("RFP Analyzer", "🧠 In Progress", state.get("run_id"))
     rfp_text = state.get("rfp_text", "").strip()
 
     metadata = extract_rfp_metadata(rfp_text)
-    update_status("RFP Analyzer", "✅ Done")
+    update_status("RFP Analyzer", "✅ Done", state.get("run_id"))
     return {
         "rfp_text": rfp_text,
         "metadata": metadata,  # structured metadata dictionary
@@ -38,16 +47,24 @@ def enrich_rfp_node(state):
         "client_needs": metadata.get("client_needs", [])
     }
 
+@traced_node("Retrieve Docs")
 def retrieve_docs_node(state):
-    update_status("Context Retriever", "🧠 In Progress")
+    update_status("Context Retriever", "🧠 In Progress", state.get("run_id"))
     rfp_text = state["rfp_text"]
-    retrieved_docs = retrieve_similar_docs(rfp_text)
-    update_status("Context Retriever", "✅ Done")
-    return {**state, "retrieved_docs": retrieved_docs}
+    # Only chunks from the RFP's industry (or industry-neutral ones) are considered
+    filters = industry_filter(state.get("industry", "generic"))
+    try:
+        retrieved_docs, sources = retrieve_with_sources(rfp_text, filters=filters)
+    except Exception as e:
+        logging.error(f"❌ Error retrieving documents: {e}")
+        retrieved_docs, sources = [], []
+    update_status("Context Retriever", "✅ Done", state.get("run_id"))
+    return {**state, "retrieved_docs": retrieved_docs or ["No similar documents found."], "retrieved_sources": sources}
 
 
+@traced_node("Summarize Tables")
 def table_summary_node(state):
-    update_status("Table Summarizer", "🧠 In Progress")
+    update_status("Table Summarizer", "🧠 In Progress", state.get("run_id"))
     summarized_tables = []
     for text_block in state.get("retrieved_docs", []):
         if "📊 Table" in text_block:
@@ -57,70 +74,106 @@ def table_summary_node(state):
                 summarized_tables.append(f"{tbl}\n\n📝 Summary: {summary}")
     
     state["summarized_tables"] = summarized_tables
-    update_status("Table Summarizer", "✅ Done")
+    update_status("Table Summarizer", "✅ Done", state.get("run_id"))
     return state
 
 
 
+@traced_node("Generate Proposal")
 def generate_proposal_node(state):
-    update_status("Proposal Generator", "🧠 In Progress")
+    update_status("Proposal Generator", "🧠 In Progress", state.get("run_id"))
     proposal = expand_rfp(
         state["rfp_text"],
         state["retrieved_docs"],
         summarized_tables=state.get("summarized_tables", [])
     )
-    update_status("Proposal Generator", "✅ Done")
+    update_status("Proposal Generator", "✅ Done", state.get("run_id"))
     return {**state, "proposal": proposal}
 
 
 
+@traced_node("Optimize Tone")
 def optimize_proposal_node(state):
-    update_status("Strategy Optimizer", "🧠 In Progress")
+    update_status("Strategy Optimizer", "🧠 In Progress", state.get("run_id"))
+    vertical = state.get("industry", "generic")
+    if PROPOSAL_CANDIDATES > 1 and not state.get("compliance_attempts"):
+        # Best-of-N on the first pass; compliance revisions keep the selected tone
+        optimized, selection = best_of_n(state["proposal"], vertical, PROPOSAL_CANDIDATES, _client_context(state))
+        chosen = selection["candidates"][selection["selected"]]
+        update_status("Strategy Optimizer", "✅ Done", state.get("run_id"))
+        return {**state, "proposal": optimized, "tone": chosen["tone"], "candidate_selection": selection}
+
     optimized = optimize_proposal_tone(
         state["proposal"],
-        vertical=state.get("industry", "generic"),
-        tone="persuasive"
+        vertical=vertical,
+        tone=state.get("tone", "persuasive")
 )
-    update_status("Strategy Optimizer", "✅ Done")
+    update_status("Strategy Optimizer", "✅ Done", state.get("run_id"))
     return {**state, "proposal": optimized}
 
 
+@traced_node("Check Compliance")
 def check_compliance_node(state):
-    update_status("Compliance Checker", "🧠 In Progress")
-    report = check_compliance(state["rfp_text"], state["proposal"])
-    state["compliance_report"] = report
-    if "❌" in report:
-        state["compliance_passed"] = False
-    else:
-        state["compliance_passed"] = True
-    update_status("Compliance Checker", "✅ Done")
+    update_status("Compliance Checker", "🧠 In Progress", state.get("run_id"))
+    matrix = run_compliance_check(state["rfp_text"], state["proposal"])
+    state["compliance_matrix"] = matrix
+    state["compliance_report"] = matrix["report"]
+    state["compliance_passed"] = matrix["passed"]
+    state["compliance_attempts"] = state.get("compliance_attempts", 0) + 1
+    update_status("Compliance Checker", "✅ Done", state.get("run_id"))
     return state
 
 
+@traced_node("Score Proposal")
 def score_proposal_node(state):
-    update_status("Scorer", "🧠 In Progress")
-    score_report = score_proposal_quality(state["proposal"])
-    update_status("Scorer", "✅ Done")
-    return {**state, "score_report": score_report}
+    update_status("Scorer", "🧠 In Progress", state.get("run_id"))
+    # Served from the score cache when best-of-N already scored this exact proposal
+    scores = score_many([state["proposal"]], _client_context(state))[0]
+    update_status("Scorer", "✅ Done", state.get("run_id"))
+    return {**state, "scores": scores, "score_report": format_score_report(scores)}
+
+
+def _client_context(state) -> str:
+    needs = state.get("client_needs") or []
+    constraints = state.get("constraints") or []
+    return "\n".join(f"- {item}" for item in [*needs, *constraints][:15])
 
 
 # Build the graph
 from typing import Dict, Any, TypedDict
 
 class ProposalState(TypedDict, total=False):
+    run_id: str
     rfp_text: str
+    rfp_blob: str  # upload-store hash of the source file, for runs started from an upload
     metadata: dict
     industry: str
     region: str
     constraints: list
     client_needs: list
     retrieved_docs: list
+    retrieved_sources: list
     summarized_tables: list
     proposal: str
     compliance_report: str
+    compliance_matrix: dict
     compliance_passed: bool
+    compliance_attempts: int
+    tone: str
+    candidate_selection: dict
+    scores: dict
     score_report: str
 
+# Every per-run field at its starting value. A new run under a thread_id that already holds a
+# finished (or different-RFP) run starts from these, so nothing carries over from that run:
+# an old compliance_attempts would skip best-of-N and cut the compliance loop short.
+RUN_DEFAULTS = {
+    "rfp_blob": None, "metadata": {}, "industry": "generic", "region": "global", "constraints": [],
+    "client_needs": [], "retrieved_docs": [], "retrieved_sources": [], "summarized_tables": [], "proposal": "",
+    "compliance_report": "", "compliance_matrix": None, "compliance_passed": False, "compliance_attempts": 0,
+    "tone": "persuasive", "candidate_selection": None, "scores": None, "score_report": "",
+}
+
 # Pass it to the graph builder
 builder = StateGraph(state_schema=ProposalState)
 
@@ -142,8 +195,13 @@ builder.add_edge("Generate Proposal", "Optimize Tone")
 builder.add_edge("Optimize Tone", "Check Compliance")
 
 # Add conditional edge based on compliance
+# Revise at most this many times before scoring whatever we have
+MAX_COMPLIANCE_ATTEMPTS = int(os.getenv("MAX_COMPLIANCE_ATTEMPTS", 3))
+
 def compliance_condition(state):
-    return "Score Proposal" if state.get("compliance_passed") else "Optimize Tone"
+    if state.get("compliance_passed") or state.get("compliance_attempts", 0) >= MAX_COMPLIANCE_ATTEMPTS:
+        return "Score Proposal"
+    return "Optimize Tone"
 
 builder.add_conditional_edges("Check Compliance", compliance_condition, {
     "Score Proposal": "Score Proposal",
@@ -152,5 +210,122 @@ builder.add_conditional_edges("Check Compliance", compliance_condition, {
 
 builder.add_edge("Score Proposal", END)
 
-# Compile the graph
-proposal_agentic_graph = builder.compile()
+# Compile the graph; state is checkpointed after every node, keyed by run_id
+proposal_agentic_graph = builder.compile(checkpointer=create_checkpointer())
+
+STAGES = ["Enrich RFP", "Retrieve Docs", "Summarize Tables", "Generate Proposal",
+          "Optimize Tone", "Check Compliance", "Score Proposal"]
+
+
+def run_pipeline(rfp_text: str, run_id: str, rfp_blob: str = None) -> dict:
+    """Runs the pipeline for ``run_id``, picking up where an interrupted run with the same RFP stopped."""
+    config = run_config(run_id)
+    if proposal_agentic_graph.checkpointer is not None:
+        snapshot = proposal_agentic_graph.get_state(config)
+        if snapshot.next and snapshot.values.get("rfp_text") == rfp_text.strip():
+            print(f"♻️ Resuming run {run_id} at {', '.join(snapshot.next)}")
+            return proposal_agentic_graph.invoke(None, config)
+    initial = {**RUN_DEFAULTS, "rfp_text": rfp_text, "run_id": run_id, "rfp_blob": rfp_blob}
+    return proposal_agentic_graph.invoke(initial, config)
+
+
+def _current_history(run_id: str) -> list:
+    """Checkpoints of the latest run under ``run_id``, newest first (earlier runs of the same id excluded)."""
+    history = []
+    for snapshot in proposal_agentic_graph.get_state_history(run_config(run_id)):
+        history.append(snapshot)
+        if (snapshot.metadata or {}).get("source") == "input":
+            break  # the invoke() that started this run
+    return history
+
+
+def get_run_checkpoint(run_id: str):
+    """Summary of a run's latest checkpoint, or None if the run was never checkpointed."""
+    if proposal_agentic_graph.checkpointer is None:
+        return None
+    snapshot = proposal_agentic_graph.get_state(run_config(run_id))
+    if not snapshot.values:
+        return None
+    # A stage scheduled in any earlier checkpoint has completed, otherwise there would be no newer one
+    history = _current_history(run_id)[1:]
+    scheduled = {stage for snap in history for stage in snap.next}
+    completed = [stage for stage in STAGES if stage in scheduled]
+    return {
+        "run_id": run_id,
+        "finished": not snapshot.next,
+        "next": list(snapshot.next),
+        "completed_stages": completed,
+        "updated_at": snapshot.created_at,
+    }
+
+
+def _require_checkpointer():
+    if proposal_agentic_graph.checkpointer is None:
+        raise ValueError("Checkpointing is disabled (CHECKPOINTING=off).")
+
+
+def resume_run(run_id: str) -> dict:
+    """Continues a failed or interrupted run from the node after its last completed one."""
+    _require_checkpointer()
+    config = run_config(run_id)
+    snapshot = proposal_agentic_graph.get_state(config)
+    if not snapshot.values:
+        raise KeyError(run_id)
+    if not snapshot.next:
+        return snapshot.values  # already finished
+    return proposal_agentic_graph.invoke(None, config)
+
+
+def rerun_from_stage(run_id: str, stage: str) -> dict:
+    """Re-executes ``stage`` and everything after it, reusing the checkpointed state of earlier stages."""
+    _require_checkpointer()
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage: {stage}")
+    # History is newest first; fork from the first time the run reached ``stage``
+    snapshots = [s for s in _current_history(run_id) if stage in s.next]
+    if not snapshots:
+        raise KeyError(run_id)
+    return proposal_agentic_graph.invoke(None, snapshots[-1].config)
+
+
+RFP_DIFF_MAX_CHARS = 6000
+
+
+def rfp_diff(old_text: str, new_text: str) -> str:
+    """Sentence-level diff of two RFP versions, only the changed lines."""
+    def lines(text):
+        return [l.strip() for l in re.split(r"(?<=[.!?])\s+|\n+", text) if l.strip()]
+    changed = [l for l in difflib.unified_diff(lines(old_text), lines(new_text), lineterm="", n=0)
+               if l[:1] in "+-" and not l.startswith(("+++", "---"))]
+    return "\n".join(changed)[:RFP_DIFF_MAX_CHARS]
+
+
+@traced_node("Reuse Prior Proposal")
+def reuse_prior_proposal(state):
+    """
+    Fast path for near-duplicate RFPs: starts from the stored result of ``source`` and only
+    asks the LLM to apply the RFP differences, instead of running all seven stages.
+    """
+    update_status("Proposal Generator", "🧠 In Progress", state.get("run_id"))
+    source = state["source"]
+    prior = source["result"]
+    diff = rfp_diff(source["text"], state["rfp_text"])
+    proposal = refine_for_rfp_changes(prior["proposal"], diff) if diff else prior["proposal"]
+
+    # Carry metadata over, but take confidently pre-extracted fields (new dates, client) from the new RFP
+    metadata = dict(prior.get("metadata") or {})
+    heuristic, confidence = heuristic_rfp_metadata(state["rfp_text"])
+    metadata.update({k: v for k, v in heuristic.items() if confidence.get(k, 0) >= 0.8})
+    update_status("Proposal Generator", "✅ Done", state.get("run_id"))
+    return {
+        "run_id": state.get("run_id"),
+        "rfp_text": state["rfp_text"],
+        "metadata": metadata,
+        "retrieved_docs": [],
+        "proposal": proposal,
+        "compliance_report": prior.get("compliance_report", ""),
+        "score_report": prior.get("score_report", ""),
+        "scores": prior.get("scores"),
+        "rfp_diff": diff,
+        "reused_from": source["rfp_id"],
+    }
@@ -1,12 +1,34 @@
 # app.py
+import importlib
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from routes import api_router  # ✅ Import the central router from `routes/__init__.py`
+from backend.tracing import render_metrics
+from backend.lazy import register_warmup, resource_status, warm_up_in_background
+from backend.request_control import load_status
+from backend.serve import WORKER_INFO
 import logging
 
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# "background": start serving immediately and initialize clients/modules in a thread;
+# "off": initialize everything on first use.
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
 
-app = FastAPI(title="RFP Automation API", version="1.0")
+register_warmup("agentic_pipeline", lambda: importlib.import_module("backend.agentic_pipeline"))
+register_warmup("pdf_libraries", lambda: [importlib.import_module(m) for m in ("pdfplumber", "fitz", "pytesseract")])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_MODE == "background":
+        warm_up_in_background()
+    yield
+
+
+app = FastAPI(title="RFP Automation API", version="1.0", lifespan=lifespan)
 
 # ✅ Include all API routes
 app.include_router(api_router)
@@ -15,6 +37,19 @@ app.include_router(api_router)
 def root():
     return {"message": "Welcome to the RFP Automation API"}
 
+@app.get("/ready")
+def ready():
+    """Which lazily initialized clients/modules are loaded (the process serves requests either way), request load and, under backend.serve, which worker answered."""
+    resources = resource_status()
+    return {"ready": all(r["initialized"] for r in resources.values()), "resources": resources, "load": load_status(),
+            "worker": WORKER_INFO or None}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint (per-stage and per-LLM-task histograms/counters)."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    # Development server; production: python -m backend.serve --workers N (preloaded, forked workers)
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
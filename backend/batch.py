@@ -0,0 +1,278 @@
+# backend/batch.py
+
+"""
+Bulk RFP processing.
+
+    python -m backend.batch data/batch_inputs/ more.pdf --out data/batches/april --llm-concurrency 8
+    python -m backend.batch --upload 3f2a9c... --upload 81d07e...     # RFPs already in the upload store
+
+Files are parsed in a process pool, pipelines run on a thread pool while a batch-owned
+semaphore caps in-flight LLM requests, and LLM responses/query embeddings are cached
+so duplicate work across RFPs is only paid once. Both settings are context-scoped:
+interactive requests and other batches in the same process keep their own. Every finished RFP is written to the
+output directory immediately and recorded in ``manifest.json``; re-running with the
+same output directory skips RFPs that are already done (identical files are processed once).
+"""
+
+import argparse
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from backend import result_cache, rfp_index
+
+BATCH_ROOT = Path(os.getenv("BATCH_ROOT", "data/batches"))
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+
+def collect_files(inputs: list) -> list:
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob("*") if p.suffix.lower() in SUPPORTED_EXTENSIONS))
+        elif path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS:
+            files.append(path)
+        else:
+            logging.warning(f"⚠️ Skipping {item}: not a supported file or directory.")
+    return files
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _parse_file(path: str) -> str:
+    """Runs in a worker process."""
+    if path.lower().endswith(".pdf"):
+        from backend.parse_rfp_pdf import parse_rfp_pdf
+        return parse_rfp_pdf(path)
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def _parse_upload(blob_hash: str) -> str:
+    """Runs in a worker process."""
+    from backend.parse_rfp_pdf import parse_blob
+    return parse_blob(blob_hash)
+
+
+class Manifest:
+    """``manifest.json`` in the output directory, rewritten atomically after every change."""
+
+    def __init__(self, output_dir: Path):
+        self.path = output_dir / "manifest.json"
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self.data = json.loads(self.path.read_text())
+        else:
+            self.data = {"batch_id": output_dir.name, "created": time.time(), "items": {}}
+            self._save()  # the batch is visible (GET /proposal/batch/{id}) before its first item
+
+    def update(self, key: str, **fields):
+        with self._lock:
+            self.data["items"].setdefault(key, {}).update(fields)
+            self._save()
+
+    def set_error(self, error: str):
+        with self._lock:
+            self.data["error"] = error
+            self.data["summary"] = {"batch_id": self.data["batch_id"], "error": error}
+            self._save()
+
+    def set_summary(self, summary: dict):
+        with self._lock:
+            self.data["summary"] = summary
+            self._save()
+
+    def _save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.data, indent=2))
+        os.replace(tmp, self.path)
+
+
+def _run_pipeline(rfp_text: str, run_id: str, rfp_blob: str = None) -> dict:
+    from backend.agentic_pipeline import run_pipeline
+    return run_pipeline(rfp_text, run_id, rfp_blob)  # a failed item resumes from its last checkpoint on the next run
+
+
+@contextlib.contextmanager
+def _batch_settings(llm_concurrency: int, use_cache: bool):
+    """LLM concurrency cap and response/embedding caching for calls made on behalf of this batch only."""
+    from backend import embeddings_setup, llm_utils
+    from backend.llm_registry import llm_concurrency as scoped_llm_concurrency
+
+    tokens = [(llm_utils.response_cache, llm_utils.response_cache.set(True)),
+              (embeddings_setup.embedding_cache, embeddings_setup.embedding_cache.set(True))] if use_cache else []
+    try:
+        with scoped_llm_concurrency(llm_concurrency):
+            yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def run_batch(inputs: list, output_dir=None, parse_workers: int = None, pipeline_workers: int = 4,
+              llm_concurrency: int = 8, use_cache: bool = True, upload_ids: list = ()) -> dict:
+    """Processes every RFP under ``inputs`` plus the ``upload_ids`` and returns a summary with RFPs/hour throughput."""
+    if pipeline_workers < 1 or llm_concurrency < 1 or (parse_workers is not None and parse_workers < 1):
+        raise ValueError("Worker counts and LLM concurrency must be at least 1")
+    output_dir = Path(output_dir) if output_dir else BATCH_ROOT / uuid.uuid4().hex[:12]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with _batch_settings(llm_concurrency, use_cache):
+        return _run_batch(inputs, upload_ids, output_dir, Manifest(output_dir), parse_workers, pipeline_workers)
+
+
+def run_batch_safely(inputs: list, output_dir, **kwargs):
+    """``run_batch`` for background threads: a failure is recorded in the manifest instead of being lost."""
+    try:
+        return run_batch(inputs, output_dir, **kwargs)
+    except Exception as e:
+        logging.exception(f"❌ Batch {Path(output_dir).name} failed")
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        Manifest(Path(output_dir)).set_error(str(e))
+
+
+def _run_batch(inputs: list, upload_ids: list, output_dir: Path, manifest: Manifest, parse_workers: int,
+               pipeline_workers: int) -> dict:
+    from backend import blob_store
+
+    # De-duplicate identical files and skip those finished by an earlier (interrupted) run.
+    # Files and uploads share one key space: an upload's blob hash is the sha256 of its bytes.
+    pending, sources, uploads = {}, {}, set()
+    candidates = [(file_hash(path), path, str(path)) for path in collect_files(inputs)]
+    for upload_id in upload_ids:
+        upload = blob_store.get_upload(upload_id)
+        if upload is None:
+            logging.warning(f"⚠️ Skipping upload {upload_id}: unknown or expired.")
+            continue
+        uploads.add(upload["hash"])
+        candidates.append((upload["hash"], Path(upload["filename"] or upload["hash"]), f"upload:{upload_id}"))
+    for key, path, source in candidates:
+        item = manifest.data["items"].get(key)
+        if item and item.get("status") == "done":
+            continue
+        if key not in pending:
+            pending[key], sources[key] = path, source
+            # Scoped to this batch: re-running this output directory resumes the item's unfinished
+            # checkpoint, while another batch with the same file starts a fresh run
+            run_id = (item or {}).get("run_id") or f"batch-{manifest.data['batch_id']}-{key[:12]}"
+            manifest.update(key, source=source, status="pending", run_id=run_id)
+
+    start = time.perf_counter()
+    done = failed = 0
+    parse_workers = parse_workers or min(len(pending), os.cpu_count() or 1) or 1
+
+    def process(key: str, path: Path, rfp_text: str):
+        run_id = manifest.data["items"][key]["run_id"]
+        item_start = time.perf_counter()
+        result = _run_pipeline(rfp_text, run_id, key if key in uploads else None)
+        rfp_index.record_result(rfp_text, run_id, result)  # later uploads of near-duplicates can reuse it
+        out_file = output_dir / f"{path.stem}-{key[:8]}.json"
+        out_file.write_text(json.dumps({
+            "source": sources[key],
+            "run_id": run_id,
+            "metadata": result.get("metadata", {}),
+            "proposal": result.get("proposal", ""),
+            "compliance_report": result.get("compliance_report", ""),
+            "compliance_matrix": result.get("compliance_matrix"),
+            "score_report": result.get("score_report", ""),
+            "scores": result.get("scores"),
+        }, indent=2))
+        out_file.with_suffix(".md").write_text(result.get("proposal", ""), encoding="utf-8")
+        return out_file, time.perf_counter() - item_start
+
+    with ProcessPoolExecutor(parse_workers, mp_context=multiprocessing.get_context("spawn")) as parse_pool, \
+            ThreadPoolExecutor(pipeline_workers) as pipeline_pool:
+        parse_futures = {}
+        pipeline_futures = {}
+        for key, path in pending.items():
+            cached = result_cache.get("parsed_rfp", key)
+            if cached is not None:
+                manifest.update(key, status="parsed")
+                # Each pipeline runs in a copy of this context, so it sees the batch's settings
+                pipeline_futures[pipeline_pool.submit(contextvars.copy_context().run, process, key, path, cached)] = key
+            else:
+                if key in uploads:
+                    parse_futures[parse_pool.submit(_parse_upload, key)] = key
+                else:
+                    parse_futures[parse_pool.submit(_parse_file, str(path))] = key
+
+        # Start each pipeline as soon as its file is parsed
+        for future in as_completed(parse_futures):
+            key = parse_futures[future]
+            try:
+                rfp_text = future.result()
+                if rfp_text.startswith("Error:"):
+                    raise ValueError(rfp_text)
+            except Exception as e:
+                failed += 1
+                manifest.update(key, status="failed", error=f"parse: {e}")
+                continue
+            result_cache.set("parsed_rfp", key, rfp_text)
+            manifest.update(key, status="parsed")
+            pipeline_futures[pipeline_pool.submit(contextvars.copy_context().run, process, key, pending[key], rfp_text)] = key
+
+        for future in as_completed(pipeline_futures):
+            key = pipeline_futures[future]
+            try:
+                out_file, seconds = future.result()
+                done += 1
+                manifest.update(key, status="done", output=out_file.name, seconds=round(seconds, 2), error=None)
+                logging.info(f"✅ Batch item {pending[key].name} done in {seconds:.1f}s")
+            except Exception as e:
+                failed += 1
+                manifest.update(key, status="failed", error=str(e))
+                logging.error(f"❌ Batch item {pending[key].name} failed: {e}")
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "batch_id": manifest.data["batch_id"],
+        "output_dir": str(output_dir),
+        "processed": done,
+        "failed": failed,
+        "skipped": len(manifest.data["items"]) - len(pending),
+        "elapsed_seconds": round(elapsed, 2),
+        "rfps_per_hour": round(done / elapsed * 3600, 1) if elapsed > 0 else 0.0,
+    }
+    manifest.set_summary(summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate proposals for many RFPs at once.")
+    parser.add_argument("inputs", nargs="*", help="RFP files and/or directories")
+    parser.add_argument("--upload", action="append", default=[], dest="upload_ids",
+                        help="Upload id from /rfp/upload_rfp (repeatable)")
+    parser.add_argument("--out", help="Output directory (re-use it to resume an interrupted batch)")
+    parser.add_argument("--parse-workers", type=int, default=None)
+    parser.add_argument("--pipeline-workers", type=int, default=4)
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--no-cache", action="store_true", help="Disable LLM response/embedding caching")
+    args = parser.parse_args(argv)
+    if not args.inputs and not args.upload_ids:
+        parser.error("give at least one RFP path or --upload id")
+
+    logging.basicConfig(level=logging.INFO)
+    summary = run_batch(
+        args.inputs, args.out, args.parse_workers, args.pipeline_workers, args.llm_concurrency, not args.no_cache,
+        args.upload_ids,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
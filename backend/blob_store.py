@@ -0,0 +1,265 @@
+# backend/blob_store.py
+
+"""
+Content-addressed store for uploaded files.
+
+Uploads are streamed into a temporary file while being hashed (SHA-256 of the raw bytes)
+and optionally zstd-compressed, then renamed to ``blobs/<h[:2]>/<h>`` — an atomic step,
+so concurrent uploads never see a partial file and identical files are stored once.
+A SQLite index maps each upload id to its blob (with the original filename) and keeps a
+reference count per blob:
+
+- ``release(upload_id)`` drops an upload; a blob is deleted when its last upload goes.
+- When the stored bytes exceed ``UPLOAD_QUOTA_MB``, the least recently used uploads are
+  released until the store fits again.
+
+The blob hash equals the batch runner's file hash, so parsed text is cached under it
+(``parsed_rfp``) for API uploads and batch inputs alike.
+"""
+
+import contextlib
+import hashlib
+import importlib.util
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+UPLOAD_STORE = Path(os.getenv("UPLOAD_STORE_DIR", "data/uploads"))
+UPLOAD_QUOTA_BYTES = int(float(os.getenv("UPLOAD_QUOTA_MB", 2048)) * 1024 * 1024)
+# "zstd" (when the zstandard package is installed) or "none"
+UPLOAD_COMPRESSION = os.getenv("UPLOAD_COMPRESSION", "zstd")
+ZSTD_LEVEL = int(os.getenv("UPLOAD_ZSTD_LEVEL", 3))
+CHUNK_SIZE = 1 << 20
+
+_local = threading.local()
+_commit_lock = threading.Lock()  # blob rename + refcount update happen together (BEGIN IMMEDIATE across processes)
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        UPLOAD_STORE.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(UPLOAD_STORE / "index.db", timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " hash TEXT PRIMARY KEY, size INTEGER NOT NULL, stored_size INTEGER NOT NULL,"
+            " compression TEXT NOT NULL, refcount INTEGER NOT NULL, created REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS uploads ("
+            " upload_id TEXT PRIMARY KEY, hash TEXT NOT NULL, filename TEXT, created REAL NOT NULL,"
+            " last_access REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS uploads_hash ON uploads (hash);"
+            "CREATE INDEX IF NOT EXISTS uploads_access ON uploads (last_access);"
+        )
+        _local.conn = conn
+    return conn
+
+
+def _compression() -> str:
+    if UPLOAD_COMPRESSION == "zstd" and importlib.util.find_spec("zstandard"):
+        return "zstd"
+    return "none"
+
+
+def _blob_path(blob_hash: str, compression: str) -> Path:
+    return UPLOAD_STORE / "blobs" / blob_hash[:2] / (blob_hash + (".zst" if compression == "zstd" else ""))
+
+
+class BlobWriter:
+    """Streams one upload into the store: ``write(chunk)`` repeatedly, then ``commit(filename)`` or ``abort()``."""
+
+    def __init__(self):
+        self.compression = _compression()
+        (UPLOAD_STORE / "tmp").mkdir(parents=True, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=UPLOAD_STORE / "tmp", delete=False)
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self._compressor = None
+        if self.compression == "zstd":
+            import zstandard
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self._file, closefd=False)
+
+    def write(self, chunk: bytes):
+        self._digest.update(chunk)
+        self._size += len(chunk)
+        (self._compressor or self._file).write(chunk)
+
+    def abort(self):
+        self._file.close()
+        Path(self._file.name).unlink(missing_ok=True)
+
+    def commit(self, filename: str = None) -> dict:
+        """Stores the blob (unless an identical one exists) and returns the new upload record."""
+        if self._compressor is not None:
+            self._compressor.close()
+        self._file.close()
+        tmp = Path(self._file.name)
+        blob_hash = self._digest.hexdigest()
+        path = _blob_path(blob_hash, self.compression)
+        upload_id, now = uuid.uuid4().hex[:16], time.time()
+
+        conn = _connect()
+        with _commit_lock, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT compression FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()
+            if row is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                stored_size = tmp.stat().st_size
+                os.replace(tmp, path)
+                conn.execute(
+                    "INSERT INTO blobs (hash, size, stored_size, compression, refcount, created) VALUES (?, ?, ?, ?, 0, ?)",
+                    (blob_hash, self._size, stored_size, self.compression, now),
+                )
+            else:
+                tmp.unlink(missing_ok=True)  # deduplicated
+            conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE hash = ?", (blob_hash,))
+            conn.execute(
+                "INSERT INTO uploads (upload_id, hash, filename, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (upload_id, blob_hash, filename, now, now),
+            )
+        logging.info(f"📦 Stored upload {upload_id} ({filename}, {self._size} bytes) as blob {blob_hash[:12]}"
+                     f"{' (deduplicated)' if row is not None else ''}")
+        evict(keep=upload_id)
+        return {"upload_id": upload_id, "hash": blob_hash, "filename": filename, "size": self._size,
+                "deduplicated": row is not None}
+
+
+def store_file(path, filename: str = None) -> dict:
+    """Adds a local file to the store (same as an upload)."""
+    writer = BlobWriter()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.commit(filename or Path(path).name)
+
+
+def get_upload(upload_id: str, touch: bool = True):
+    """Returns ``{"upload_id", "hash", "filename", "size", "created"}`` or None."""
+    conn = _connect()
+    row = conn.execute(
+        "SELECT u.hash, u.filename, b.size, u.created FROM uploads u JOIN blobs b ON b.hash = u.hash"
+        " WHERE u.upload_id = ?", (upload_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    if touch:
+        with conn:
+            conn.execute("UPDATE uploads SET last_access = ? WHERE upload_id = ?", (time.time(), upload_id))
+    return {"upload_id": upload_id, "hash": row[0], "filename": row[1], "size": row[2], "created": row[3]}
+
+
+@contextlib.contextmanager
+def open_blob(blob_hash: str):
+    """Readable binary stream of a blob's original bytes."""
+    row = _connect().execute("SELECT compression FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()
+    if row is None:
+        raise KeyError(f"Unknown blob: {blob_hash}")
+    with open(_blob_path(blob_hash, row[0]), "rb") as f:
+        if row[0] == "zstd":
+            import zstandard
+            with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                yield reader
+        else:
+            yield f
+
+
+@contextlib.contextmanager
+def local_path(blob_hash: str, suffix: str = ""):
+    """
+    Filesystem path with the blob's original bytes, for parsers that need a file: the blob
+    itself when stored uncompressed, else a temporary decompressed copy removed afterwards.
+    """
+    row = _connect().execute("SELECT compression FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()
+    if row is None:
+        raise KeyError(f"Unknown blob: {blob_hash}")
+    if row[0] == "none":
+        yield str(_blob_path(blob_hash, "none"))
+        return
+    fd, tmp = tempfile.mkstemp(suffix=suffix, dir=UPLOAD_STORE / "tmp")
+    try:
+        with os.fdopen(fd, "wb") as out, open_blob(blob_hash) as src:
+            shutil.copyfileobj(src, out, CHUNK_SIZE)
+        yield tmp
+    finally:
+        os.unlink(tmp)
+
+
+def release(upload_id: str) -> bool:
+    """Removes an upload; deletes its blob when no other upload references it."""
+    conn = _connect()
+    path = tombstone = None
+    with _commit_lock:
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT hash FROM uploads WHERE upload_id = ?", (upload_id,)).fetchone()
+                if row is None:
+                    return False
+                conn.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,))
+                conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", row)
+                refcount, compression = conn.execute(
+                    "SELECT refcount, compression FROM blobs WHERE hash = ?", row).fetchone()
+                if refcount <= 0:
+                    conn.execute("DELETE FROM blobs WHERE hash = ?", row)
+                    # Move the file aside while the write lock is held: once the row is gone another
+                    # process may commit the same content to the same path, which must survive
+                    path = _blob_path(row[0], compression)
+                    tombstone = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.deleted")
+                    try:
+                        os.replace(path, tombstone)
+                    except FileNotFoundError:
+                        tombstone = None
+        except BaseException:
+            if tombstone is not None:
+                os.replace(tombstone, path)  # rolled back: the row still references the blob
+            raise
+    if tombstone is not None:
+        tombstone.unlink(missing_ok=True)
+    return True
+
+
+def evict(quota: int = None, keep: str = None) -> list:
+    """Releases least recently used uploads (never ``keep``) until stored bytes fit ``quota``."""
+    quota = UPLOAD_QUOTA_BYTES if quota is None else quota
+    conn = _connect()
+    evicted = []
+    while conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0] > quota:
+        row = conn.execute(
+            "SELECT upload_id FROM uploads WHERE upload_id != ? ORDER BY last_access LIMIT 1", (keep or "",)
+        ).fetchone()
+        if row is None:
+            break
+        release(row[0])
+        evicted.append(row[0])
+    if evicted:
+        logging.info(f"🧹 Upload store over quota: evicted {len(evicted)} least recently used uploads")
+    return evicted
+
+
+def stats() -> dict:
+    conn = _connect()
+    blobs, size, stored = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+    ).fetchone()
+    uploads, uploaded = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM uploads u JOIN blobs b ON b.hash = u.hash"
+    ).fetchone()
+    return {
+        "uploads": uploads,
+        "blobs": blobs,
+        "uploaded_bytes": uploaded,  # as if every upload were stored separately
+        "original_bytes": size,
+        "stored_bytes": stored,
+        "quota_bytes": UPLOAD_QUOTA_BYTES,
+        "compression": _compression(),
+    }
@@ -0,0 +1,84 @@
+# backend/cancellation.py
+
+"""
+Cooperative cancellation for request-scoped work.
+
+API handlers run blocking pipeline/retrieval work in worker threads inside a
+``CancelScope``. When the client disconnects or the endpoint deadline passes the
+scope is cancelled, and the next ``check_cancelled()`` in that thread (before every
+LLM attempt, while waiting for an LLM slot, between retries, at stage and retrieval
+boundaries) raises ``RequestCancelled`` so no further tokens are spent. A call that
+is already in flight finishes (bounded by its route timeout); nothing after it starts.
+
+``RequestCancelled`` derives from ``BaseException`` (like ``asyncio.CancelledError``)
+so the many ``except Exception`` fallbacks in the pipeline do not swallow it.
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+
+_current_scope = contextvars.ContextVar("cancel_scope", default=None)
+
+
+class RequestCancelled(BaseException):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelScope:
+    def __init__(self, timeout: float = None):
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.reason = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str):
+        if self.reason is None:
+            self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+        return self._event.is_set()
+
+    def remaining(self):
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def wait(self, seconds: float) -> bool:
+        """Sleeps up to ``seconds`` (never past the deadline); returns True if cancelled meanwhile."""
+        remaining = self.remaining()
+        self._event.wait(seconds if remaining is None else min(seconds, remaining))
+        return self.cancelled
+
+
+@contextlib.contextmanager
+def cancel_scope(scope: CancelScope):
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+def current_scope():
+    return _current_scope.get()
+
+
+def check_cancelled():
+    """Raises ``RequestCancelled`` if the current request was cancelled; no-op outside a scope (CLI, batch)."""
+    scope = _current_scope.get()
+    if scope is not None and scope.cancelled:
+        raise RequestCancelled(scope.reason)
+
+
+def sleep(seconds: float):
+    """``time.sleep`` that wakes up and raises as soon as the current request is cancelled."""
+    scope = _current_scope.get()
+    if scope is None:
+        time.sleep(seconds)
+    elif scope.wait(seconds):
+        raise RequestCancelled(scope.reason)
@@ -0,0 +1,37 @@
+# backend/checkpointing.py
+
+"""
+Durable LangGraph checkpoints for pipeline runs.
+
+The proposal graph is compiled with a SQLite checkpointer, so the state after every
+node is persisted under the run ID (LangGraph ``thread_id``). A run that fails halfway
+can be resumed from its last completed node, and a finished run can be forked from any
+stage without recomputing the stages before it.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+
+CHECKPOINT_DB = Path(os.getenv("CHECKPOINT_DB", "data/checkpoints.db"))
+CHECKPOINTING = os.getenv("CHECKPOINTING", "on").lower() not in ("0", "off", "false", "no")
+
+
+def create_checkpointer():
+    """Returns a SqliteSaver shared by all threads, or None when checkpointing is disabled."""
+    if not CHECKPOINTING:
+        return None
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    CHECKPOINT_DB.parent.mkdir(parents=True, exist_ok=True)
+    # SqliteSaver serialises access with its own lock, so one connection can serve every worker thread
+    conn = sqlite3.connect(CHECKPOINT_DB, check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return SqliteSaver(conn)
+
+
+def run_config(run_id: str, checkpoint_id: str = None) -> dict:
+    configurable = {"thread_id": run_id}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
@@ -0,0 +1,91 @@
+# backend/chunk_store.py
+
+"""
+Local store of reference-document chunk text (SQLite), keyed by chunk id.
+
+The vector index only holds embeddings plus compact metadata (source, pages, section,
+industry, offsets); retrieval returns chunk ids and scores, and the text is fetched
+from here only for the chunks that are actually used.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+CHUNK_DB = Path(os.getenv("CHUNK_STORE_DB", "data/chunks.db"))
+MAX_QUERY_PARAMS = 900  # below SQLITE_MAX_VARIABLE_NUMBER (999 before SQLite 3.32)
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        CHUNK_DB.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(CHUNK_DB, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " chunk_id TEXT PRIMARY KEY, source TEXT NOT NULL, metadata TEXT NOT NULL, text TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source)")
+        _local.conn = conn
+    return conn
+
+
+def put_chunks(chunks: list):
+    """Stores ``{"id", "text", "metadata"}`` chunks, replacing earlier versions of the same ids."""
+    conn = _connect()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO chunks (chunk_id, source, metadata, text) VALUES (?, ?, ?, ?)",
+            [(c["id"], c["metadata"]["source"], json.dumps(c["metadata"]), c["text"]) for c in chunks],
+        )
+
+
+def delete_source(source: str) -> int:
+    """Drops every chunk of a document (before re-ingesting a changed version)."""
+    conn = _connect()
+    with conn:
+        return conn.execute("DELETE FROM chunks WHERE source = ?", (source,)).rowcount
+
+
+def _select_by_ids(column: str, chunk_ids: list) -> list:
+    """``(chunk_id, column)`` rows for ``chunk_ids``, queried in batches below SQLite's bound-parameter limit."""
+    conn, rows = _connect(), []
+    chunk_ids = list(chunk_ids)
+    for start in range(0, len(chunk_ids), MAX_QUERY_PARAMS):
+        batch = chunk_ids[start:start + MAX_QUERY_PARAMS]
+        rows += conn.execute(
+            f"SELECT chunk_id, {column} FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+        ).fetchall()
+    return rows
+
+
+def get_texts(chunk_ids: list) -> dict:
+    """chunk id -> text for the ids present in the store."""
+    return dict(_select_by_ids("text", chunk_ids))
+
+
+def get_metadata(chunk_ids: list) -> dict:
+    """chunk id -> metadata for the ids present in the store."""
+    return {chunk_id: json.loads(metadata) for chunk_id, metadata in _select_by_ids("metadata", chunk_ids)}
+
+
+def get_source_chunks(prefix: str) -> list:
+    """``{"id", "text", "metadata"}`` chunks of every source starting with ``prefix`` (e.g. archived proposals)."""
+    rows = _connect().execute(
+        "SELECT chunk_id, text, metadata FROM chunks WHERE source >= ? AND source < ? ORDER BY chunk_id",
+        (prefix, prefix + "\uffff"),
+    ).fetchall()
+    return [{"id": chunk_id, "text": text, "metadata": json.loads(metadata)} for chunk_id, text, metadata in rows]
+
+
+def get_chunk(chunk_id: str):
+    """Returns ``{"id", "text", "metadata"}`` or None."""
+    row = _connect().execute("SELECT text, metadata FROM chunks WHERE chunk_id = ?", (chunk_id,)).fetchone()
+    if row is None:
+        return None
+    return {"id": chunk_id, "text": row[0], "metadata": json.loads(row[1])}
@@ -0,0 +1,200 @@
+# backend/compliance.py
+
+"""
+Requirement-level compliance checking.
+
+1. Requirements are extracted from the RFP as structured data (RFP chunks in parallel),
+   cached per RFP hash.
+2. The proposal is split into sections and each requirement is mapped to its most
+   relevant sections with a local BM25 index (no embedding calls).
+3. Requirements are verified in parallel batches against only their mapped sections.
+   Verdicts are cached by (requirement, mapped sections) hash, so re-checking a revised
+   proposal only re-verifies requirements whose sections changed.
+
+The result is a pass/partial/fail matrix plus the text report shown in the UI.
+"""
+
+import logging
+import math
+import os
+import re
+from collections import Counter
+
+from backend import result_cache
+from backend.llm_registry import parallel_map
+from backend.llm_utils import check_compliance, extract_requirements, verify_requirements
+from backend.reranker import split_passages
+from backend.rfp_heuristics import requirement_sentences
+
+REQUIREMENT_CHUNK_WORDS = int(os.getenv("COMPLIANCE_CHUNK_WORDS", 2500))
+COMPLIANCE_BATCH_SIZE = int(os.getenv("COMPLIANCE_BATCH_SIZE", 8))
+COMPLIANCE_WORKERS = int(os.getenv("COMPLIANCE_WORKERS", 4))
+SECTIONS_PER_REQUIREMENT = 2
+SECTION_EXCERPT_CHARS = 1500
+
+STATUS_ICONS = {"pass": "✅", "partial": "⚠️", "fail": "❌"}
+_HEADING_RE = re.compile(r"^\s*(#{1,6}\s+\S|📌|\*\*[^*]+\*\*\s*:?\s*$|\d+\.\s+\*\*)")
+_STOPWORDS = set("the and for with that this from will are our your their have has shall must should be of to in on a an".split())
+
+
+def get_requirements(rfp_text: str) -> list:
+    """Requirement dicts (id, text, category, mandatory) for an RFP, cached per RFP text hash."""
+    cache_key = result_cache.content_hash(rfp_text)
+    cached = result_cache.get("rfp_requirements", cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        chunks = split_passages(rfp_text, REQUIREMENT_CHUNK_WORDS)
+        if len(chunks) == 1:
+            # Whole RFP in one call: reuses the RFP prompt prefix cached by the earlier stages
+            found = extract_requirements(rfp_text, whole_rfp=True)
+        else:
+            found = [r for batch in parallel_map(extract_requirements, chunks, COMPLIANCE_WORKERS) for r in batch]
+    except Exception as e:
+        logging.warning(f"⚠️ Requirement extraction failed, using obligation sentences: {e}")
+        found = []
+
+    requirements, seen = [], set()
+    for r in found:
+        normalized = re.sub(r"\W+", " ", r.text.lower()).strip()
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            requirements.append({"id": f"R{len(requirements) + 1}", "text": r.text.strip(),
+                                 "category": r.category, "mandatory": r.mandatory})
+    if not requirements:
+        # Not cached, so the next check retries the extraction
+        return [{"id": f"R{i + 1}", "text": s, "category": "general", "mandatory": True}
+                for i, s in enumerate(requirement_sentences(rfp_text))]
+
+    result_cache.set("rfp_requirements", cache_key, requirements)
+    return requirements
+
+
+def split_sections(proposal: str) -> list:
+    """Splits a proposal at its headings into ``{"heading", "text"}`` sections."""
+    sections, heading, lines = [], "Introduction", []
+    for line in proposal.splitlines():
+        if _HEADING_RE.match(line):
+            if any(l.strip() for l in lines):
+                sections.append({"heading": heading, "text": "\n".join(lines).strip()})
+            heading, lines = line.strip("#*📌 :\t"), []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append({"heading": heading, "text": "\n".join(lines).strip()})
+    if len(sections) <= 1:
+        # Unstructured text: fall back to fixed-size passages
+        sections = [{"heading": f"Part {i + 1}", "text": p} for i, p in enumerate(split_passages(proposal, 200))]
+    return sections
+
+
+def _tokens(text: str) -> list:
+    return [t for t in re.findall(r"[a-z0-9]{3,}", text.lower()) if t not in _STOPWORDS]
+
+
+def map_requirements(requirements: list, sections: list, top_n: int = SECTIONS_PER_REQUIREMENT) -> dict:
+    """BM25 over proposal sections: requirement id -> indices of its best-matching sections."""
+    docs = [Counter(_tokens(s["heading"] + " " + s["text"])) for s in sections]
+    if not docs:
+        return {r["id"]: [] for r in requirements}
+    lengths = [sum(d.values()) for d in docs]
+    avg_len = (sum(lengths) / len(docs)) or 1.0
+    df = Counter(t for d in docs for t in d)
+    k1, b = 1.5, 0.75
+
+    mapping = {}
+    for r in requirements:
+        query = set(_tokens(r["text"]))
+        scores = []
+        for i, doc in enumerate(docs):
+            score = 0.0
+            for t in query & doc.keys():
+                idf = math.log(1 + (len(docs) - df[t] + 0.5) / (df[t] + 0.5))
+                score += idf * doc[t] * (k1 + 1) / (doc[t] + k1 * (1 - b + b * lengths[i] / avg_len))
+            scores.append(score)
+        ranked = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)
+        mapping[r["id"]] = [i for i in ranked[:top_n] if scores[i] > 0]
+    return mapping
+
+
+def _verify_batch(items: list) -> list:
+    """Verdict dicts for a batch, aligned with ``items``; ``None`` where the model gave no verdict."""
+    try:
+        verdicts = verify_requirements(items)
+    except Exception as e:
+        logging.warning(f"⚠️ Requirement verification failed for {len(items)} requirements: {e}")
+        return [None] * len(items)
+    by_id = {v.id.strip(): v for v in verdicts}
+    if not any(item["id"] in by_id for item in items) and len(verdicts) == len(items):
+        by_id = {item["id"]: v for item, v in zip(items, verdicts)}  # model ignored the ids; trust the order
+    return [by_id[item["id"]].model_dump() if item["id"] in by_id else None for item in items]
+
+
+def run_compliance_check(rfp_text: str, proposal: str) -> dict:
+    """
+    Returns the compliance matrix: ``requirements`` (one row per requirement with status,
+    evidence, gap and mapped sections), ``summary`` counts, ``passed`` (no mandatory
+    requirement failed), ``verified``/``reused`` counts and the rendered ``report``.
+    """
+    requirements = get_requirements(rfp_text)
+    if not requirements:
+        report = check_compliance(rfp_text, proposal)  # nothing to itemise; single-prompt review
+        return {"requirements": [], "summary": {}, "passed": "❌" not in report,
+                "verified": 0, "reused": 0, "report": report}
+
+    sections = split_sections(proposal)
+    mapping = map_requirements(requirements, sections)
+
+    items, cache_keys, verdicts = [], {}, {}
+    for r in requirements:
+        excerpt = "\n\n".join(
+            f"[{sections[i]['heading']}]\n{sections[i]['text'][:SECTION_EXCERPT_CHARS]}" for i in mapping[r["id"]]
+        )
+        cache_keys[r["id"]] = result_cache.content_hash(r["text"], excerpt)
+        cached = result_cache.get("compliance_verdict", cache_keys[r["id"]])
+        if cached is not None:
+            verdicts[r["id"]] = cached
+        else:
+            items.append({"id": r["id"], "text": r["text"], "excerpt": excerpt})
+    reused = len(verdicts)
+
+    batches = [items[i:i + COMPLIANCE_BATCH_SIZE] for i in range(0, len(items), COMPLIANCE_BATCH_SIZE)]
+    for batch, results in zip(batches, parallel_map(_verify_batch, batches, COMPLIANCE_WORKERS)):
+        for item, verdict in zip(batch, results):
+            if verdict is None:
+                verdicts[item["id"]] = {"status": "partial", "evidence": "", "gap": "Could not be verified automatically."}
+                continue
+            verdicts[item["id"]] = verdict
+            result_cache.set("compliance_verdict", cache_keys[item["id"]], verdict)
+
+    rows = [{
+        **r,
+        "status": verdicts[r["id"]]["status"],
+        "evidence": verdicts[r["id"]].get("evidence", ""),
+        "gap": verdicts[r["id"]].get("gap", ""),
+        "sections": [sections[i]["heading"] for i in mapping[r["id"]]],
+    } for r in requirements]
+    summary = {status: sum(row["status"] == status for row in rows) for status in STATUS_ICONS}
+    matrix = {
+        "requirements": rows,
+        "summary": summary,
+        "passed": not any(row["status"] == "fail" and row["mandatory"] for row in rows),
+        "verified": len(items),
+        "reused": reused,
+    }
+    matrix["report"] = format_report(matrix)
+    logging.info(f"✅ Compliance: {summary} ({len(items)} verified, {reused} unchanged)")
+    return matrix
+
+
+def format_report(matrix: dict) -> str:
+    summary = matrix["summary"]
+    lines = [f"**Compliance matrix:** {summary['pass']} ✅ pass · {summary['partial']} ⚠️ partial · {summary['fail']} ❌ fail", ""]
+    for row in matrix["requirements"]:
+        label = "mandatory" if row["mandatory"] else "optional"
+        line = f"{STATUS_ICONS[row['status']]} **{row['id']}** ({label}, {row['category']}): {row['text']}"
+        if row["status"] != "pass" and row["gap"]:
+            line += f"\n    ↳ Missing: {row['gap']}"
+        lines.append(line)
+    return "\n".join(lines)
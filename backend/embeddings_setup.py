@@ -1,6 +1,35 @@
 # backend/embeddings_setup.py
 
-from langchain_openai import OpenAIEmbeddings
+import contextvars
+import os
+from backend.lazy import LazyResource
+from backend import result_cache
 
-# ✅ Ensure this matches Pinecone's 1536 dimensions
-embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
+# Persist query embeddings by text hash so repeated/duplicate queries skip the API (batch runs)
+EMBEDDING_CACHE = os.getenv("EMBEDDING_CACHE") == "1"
+# Per-context override of EMBEDDING_CACHE (a batch run enables it for its own calls only)
+embedding_cache = contextvars.ContextVar("embedding_cache", default=None)
+
+
+def _build_embeddings():
+    if os.getenv("EMBEDDINGS_BACKEND") == "fake":
+        from backend.fake_backends import FakeEmbeddings
+        return FakeEmbeddings(dimension=1536)
+    from langchain_openai import OpenAIEmbeddings
+    # ✅ Ensure this matches Pinecone's 1536 dimensions
+    return OpenAIEmbeddings(model="text-embedding-ada-002")
+
+
+embeddings = LazyResource("embeddings", _build_embeddings)
+
+
+def embed_query(text: str) -> list:
+    """``embeddings.embed_query`` with the optional persistent cache."""
+    if not (EMBEDDING_CACHE if embedding_cache.get() is None else embedding_cache.get()):
+        return embeddings.embed_query(text)
+    key = result_cache.content_hash(os.getenv("EMBEDDINGS_BACKEND", "openai"), text)
+    vector = result_cache.get("embedding", key)
+    if vector is None:
+        vector = embeddings.embed_query(text)
+        result_cache.set("embedding", key, vector)
+    return vector
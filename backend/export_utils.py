@@ -0,0 +1,198 @@
+# backend/export_utils.py
+
+"""
+Server-side proposal export (PDF, DOCX, Markdown) with an on-disk cache.
+
+Rendered files are keyed by the proposal's version hash, so exporting the same
+proposal again is a file read; the least recently used files are removed once the
+cache exceeds ``EXPORT_CACHE_MB``. The DejaVu font metrics are loaded once per
+process and shared by every PDF instead of being re-read on each export.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from xml.sax.saxutils import escape
+from backend.lazy import register_warmup
+
+FONT_PATH = Path(__file__).resolve().parent.parent / "frontend" / "fonts" / "DejaVuSans.ttf"
+EXPORT_DIR = Path(os.getenv("EXPORT_CACHE_DIR", "data/exports"))
+EXPORT_CACHE_BYTES = int(float(os.getenv("EXPORT_CACHE_MB", 512)) * 1024 * 1024)
+VERSION_RE = re.compile(r"^[0-9a-f]{16}$")
+
+FORMATS = {
+    "pdf": ("application/pdf", ".pdf"),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", ".docx"),
+    "md": ("text/markdown; charset=utf-8", ".md"),
+}
+
+_font_lock = threading.Lock()
+_font_template = None  # (fonts entry, font_files entries) captured from the first PDF
+_render_locks = {}
+_render_locks_guard = threading.Lock()
+
+
+def proposal_version(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _new_pdf():
+    """Returns an FPDF with the DejaVu font registered, reusing metrics loaded by the first call."""
+    global _font_template
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    with _font_lock:
+        if _font_template is None:
+            pdf.add_font("DejaVu", "", str(FONT_PATH), uni=True)
+            # The bundled .pkl metrics cache may carry a relative TTF path from wherever it was generated
+            font = {**pdf.fonts["dejavu"], "ttffile": str(FONT_PATH)}
+            files = {k: {**v, "ttffile": str(FONT_PATH)} if "ttffile" in v else v
+                     for k, v in pdf.font_files.items() if v.get("type") == "TTF"}
+            _font_template = (font, files)
+    font, files = _font_template
+    # Shallow copy: the (large) char-width table is shared read-only, the glyph subset is per document
+    pdf.fonts["dejavu"] = {**font, "i": 1, "subset": list(range(0, 32))}
+    pdf.font_files.update(files)
+    return pdf
+
+
+def _supported_text(text: str, char_widths) -> str:
+    """Drops only glyphs the font lacks (e.g. emoji) instead of everything outside latin-1."""
+    return "".join(
+        ch for ch in text
+        if ch in "\n\t" or (ord(ch) < len(char_widths) and char_widths[ord(ch)])
+    )
+
+
+def render_pdf(text: str) -> bytes:
+    pdf = _new_pdf()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("DejaVu", "", 11)
+    pdf.set_left_margin(10)
+    pdf.set_right_margin(10)
+    formatted_text = "\n".join(line.strip() for line in text.split("\n") if line.strip())
+    pdf.multi_cell(0, 8, txt=_supported_text(formatted_text, pdf.fonts["dejavu"]["cw"]), border=0)
+    output = pdf.output(dest="S")
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+_DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+_DOCX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+
+def render_docx(text: str) -> bytes:
+    """Minimal WordprocessingML document: one paragraph per line, markdown headings/bold lines in bold."""
+    paragraphs = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        bold = line.startswith("#") or (line.startswith("**") and line.endswith("**"))
+        content = line.lstrip("#").strip().strip("*").strip() if bold else line
+        run_props = "<w:rPr><w:b/></w:rPr>" if bold else ""
+        paragraphs.append(f'<w:p><w:r>{run_props}<w:t xml:space="preserve">{escape(content)}</w:t></w:r></w:p>')
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        + "".join(paragraphs)
+        + "</w:body></w:document>"
+    )
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        docx.writestr("_rels/.rels", _DOCX_RELS)
+        docx.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def render_markdown(text: str) -> bytes:
+    return text.encode("utf-8")
+
+
+RENDERERS = {"pdf": render_pdf, "docx": render_docx, "md": render_markdown}
+
+
+def cached_export_path(version: str, fmt: str) -> Path:
+    """Cache location of a rendered version; ``version`` must be a ``proposal_version`` hash."""
+    if not VERSION_RE.match(version or "") or fmt not in FORMATS:
+        raise ValueError(f"Invalid export version or format: {version!r}, {fmt!r}")
+    path = EXPORT_DIR / f"{version}{FORMATS[fmt][1]}"
+    if path.resolve().parent != EXPORT_DIR.resolve():
+        raise ValueError(f"Export path escapes the export directory: {version!r}")
+    return path
+
+
+def _touch(path: Path):
+    try:
+        os.utime(path)  # mtime doubles as last access for the LRU trim
+    except OSError:
+        pass
+
+
+def trim_cache(quota: int = None) -> int:
+    """Deletes the least recently used exports until the cache fits ``quota`` bytes; returns files removed."""
+    quota = EXPORT_CACHE_BYTES if quota is None else quota
+    files = []
+    for entry in os.scandir(EXPORT_DIR) if EXPORT_DIR.exists() else ():
+        if entry.is_file() and not entry.name.endswith(".tmp"):
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total, removed = sum(size for _, size, _ in files), 0
+    for _, size, file_path in sorted(files):
+        if total <= quota:
+            break
+        try:
+            os.unlink(file_path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logging.info(f"🧹 Export cache over quota: removed {removed} least recently used files")
+    return removed
+
+
+def export_proposal(text: str, fmt: str = "pdf") -> Path:
+    """Renders ``text`` in ``fmt`` (once per version) and returns the path of the cached file."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    path = cached_export_path(proposal_version(text), fmt)
+    if path.exists():
+        _touch(path)
+        return path
+
+    with _render_locks_guard:
+        lock = _render_locks.setdefault(path.name, threading.Lock())
+    rendered = False
+    with lock:  # concurrent exports of the same version render once
+        if not path.exists():
+            EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(RENDERERS[fmt](text))
+            os.replace(tmp, path)
+            rendered = True
+    with _render_locks_guard:
+        _render_locks.pop(path.name, None)  # waiters already hold a reference; later callers find the file
+    if rendered:
+        trim_cache()
+    return path
+
+
+# Load the font metrics during the app's background warm-up rather than on the first export
+register_warmup("export_font", _new_pdf)
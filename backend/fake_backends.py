@@ -0,0 +1,222 @@
+# backend/fake_backends.py
+
+"""
+Deterministic stand-ins for ChatOpenAI and OpenAIEmbeddings.
+
+Enabled with ``LLM_BACKEND=fake`` / ``EMBEDDINGS_BACKEND=fake`` (and ``VECTOR_BACKEND=memory``
+for retrieval) so the pipeline, parsers and API can be exercised and benchmarked without
+OpenAI or Pinecone. Outputs depend only on the input text and ``FAKE_SEED``; latency follows a
+configurable distribution plus a per-token generation time; usage reports cached prompt tokens
+like OpenAI prefix caching (``FAKE_LLM_PREFIX_CACHE``).
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import typing
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+FAKE_SEED = int(os.getenv("FAKE_SEED", 0))
+
+_WORDS = (
+    "solution delivery platform client timeline milestone analytics integration security "
+    "pricing roadmap stakeholder scalable cloud data model governance support training "
+    "implementation outcome efficiency retail finance healthcare compliance reporting"
+).split()
+
+
+def _rng(text: str, salt: str) -> random.Random:
+    digest = hashlib.sha256(f"{FAKE_SEED}:{salt}:{text}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def sample_latency(rng: random.Random, mean_ms: float, distribution: str) -> float:
+    """Returns a latency in seconds drawn from ``distribution`` with the given mean."""
+    if mean_ms <= 0:
+        return 0.0
+    if distribution == "uniform":
+        value = rng.uniform(0.5 * mean_ms, 1.5 * mean_ms)
+    elif distribution == "lognormal":
+        sigma = 0.5
+        value = rng.lognormvariate(math.log(mean_ms) - sigma ** 2 / 2, sigma)
+    elif distribution == "exponential":
+        value = rng.expovariate(1.0 / mean_ms)
+    else:
+        value = mean_ms
+    return value / 1000.0
+
+
+def _fake_value(name: str, annotation, rng: random.Random):
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if origin is typing.Union:
+        return _fake_value(name, next(a for a in args if a is not type(None)), rng)
+    if origin is typing.Literal:
+        return args[0]  # first option, so fake runs follow the happy path (e.g. compliance "pass")
+    if origin in (list, List):
+        return [_fake_value(name, args[0] if args else str, rng) for _ in range(3)]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_payload(annotation, rng)
+    if annotation is bool:
+        return True
+    if annotation is int:
+        return rng.randint(6, 10)
+    if annotation is float:
+        return round(rng.uniform(6, 10), 1)
+    if name == "industry":
+        return rng.choice(["retail", "finance", "healthcare"])
+    if name == "region":
+        return rng.choice(["North America", "Europe"])
+    return " ".join(rng.choice(_WORDS) for _ in range(4))
+
+
+def fake_payload(schema, rng: random.Random) -> dict:
+    """Deterministic values for every field of a Pydantic ``schema``."""
+    return {name: _fake_value(name, field.annotation, rng) for name, field in schema.model_fields.items()}
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# Provider prompt caching as OpenAI does it: prefixes of 1024+ tokens, matched in 128-token steps
+FAKE_PREFIX_CACHE = os.getenv("FAKE_LLM_PREFIX_CACHE", "1") == "1"
+_PREFIX_MIN_CHARS, _PREFIX_STEP_CHARS = 1024 * 4, 128 * 4
+_prefix_cache = OrderedDict()
+_prefix_lock = threading.Lock()
+
+
+def _cached_prefix_tokens(prompt: str) -> int:
+    """Tokens of the longest prefix of ``prompt`` seen in an earlier call; remembers this prompt's prefixes."""
+    digest, cached, start, seen = hashlib.blake2b(digest_size=16), 0, 0, []
+    for end in range(_PREFIX_MIN_CHARS, len(prompt) + 1, _PREFIX_STEP_CHARS):
+        digest.update(prompt[start:end].encode("utf-8"))
+        start = end
+        seen.append((end, digest.copy().digest()))
+    with _prefix_lock:
+        for end, key in seen:
+            if key in _prefix_cache:
+                cached = end
+                _prefix_cache.move_to_end(key)
+            else:
+                _prefix_cache[key] = True
+        while len(_prefix_cache) > 100_000:
+            _prefix_cache.popitem(last=False)
+    return cached // 4
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that returns deterministic text and simulates OpenAI latency and usage."""
+
+    model_name: str = "fake-chat"
+    latency_ms: float = float(os.getenv("FAKE_LLM_LATENCY_MS", 300))
+    latency_distribution: str = os.getenv("FAKE_LLM_LATENCY_DIST", "lognormal")
+    tokens_per_second: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", 200))
+    output_tokens: int = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", 300))
+    sleep: bool = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _respond(self, prompt: str, rng: random.Random) -> str:
+        if "JSON" in prompt and "industry" in prompt:
+            return json.dumps({
+                "project_name": "Project " + rng.choice(_WORDS).title(),
+                "client_name": "Client " + rng.choice(_WORDS).title(),
+                "deadline": "2025-12-31",
+                "industry": rng.choice(["retail", "finance", "healthcare"]),
+                "region": rng.choice(["North America", "Europe"]),
+                "constraints": [rng.choice(_WORDS) for _ in range(3)],
+                "client_needs": [rng.choice(_WORDS) for _ in range(3)],
+            })
+        n_words = max(1, int(self.output_tokens * 0.75))
+        words = [rng.choice(_WORDS) for _ in range(n_words)]
+        sections = [" ".join(words[i:i + 60]) for i in range(0, len(words), 60)]
+        # Compliance-style prompts get an all-pass report so the graph terminates
+        return "✅ " + "\n\n".join(sections)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        rng = _rng(prompt, "chat")
+        content = self._respond(prompt, rng)
+        prompt_tokens, completion_tokens = _count_tokens(prompt), _count_tokens(content)
+        cached_tokens = min(_cached_prefix_tokens(prompt), prompt_tokens) if FAKE_PREFIX_CACHE else 0
+
+        if self.sleep:
+            delay = sample_latency(rng, self.latency_ms, self.latency_distribution)
+            if self.tokens_per_second > 0:
+                delay += completion_tokens / self.tokens_per_second
+            time.sleep(delay)
+
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "input_token_details": {"cache_read": cached_tokens},
+            },
+            response_metadata={"model_name": self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs):
+        """Mimics function-calling structured output by filling ``schema`` with deterministic values."""
+        def run(prompt):
+            raw = self.invoke(prompt)  # simulates latency and usage
+            payload = fake_payload(schema, _rng(str(prompt), "structured"))
+            raw = AIMessage(content=json.dumps(payload), usage_metadata=raw.usage_metadata)
+            parsed = schema.model_validate(payload)
+            return {"raw": raw, "parsed": parsed, "parsing_error": None} if include_raw else parsed
+        return RunnableLambda(run)
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Hashed bag-of-words embeddings: deterministic, unit-length, and texts sharing
+    words land close together, so similarity search still returns sensible results.
+    """
+
+    def __init__(self, dimension: int = 1536, latency_ms: float = None, latency_distribution: str = None):
+        self.dimension = dimension
+        self.latency_ms = float(os.getenv("FAKE_EMBED_LATENCY_MS", 50)) if latency_ms is None else latency_ms
+        self.latency_distribution = latency_distribution or os.getenv("FAKE_EMBED_LATENCY_DIST", "lognormal")
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for token in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.blake2b(f"{FAKE_SEED}:{token}".encode("utf-8"), digest_size=8).digest(), "big")
+            vector[h % self.dimension] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _wait(self, text: str):
+        time.sleep(sample_latency(_rng(text, "embed"), self.latency_ms, self.latency_distribution))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._wait("".join(texts))  # one simulated round trip per batch, like the OpenAI API
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._wait(text)
+        return self._embed(text)
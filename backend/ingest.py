@@ -0,0 +1,105 @@
+# backend/ingest.py
+
+"""
+Splits reference documents into chunks with compact provenance metadata.
+
+Each chunk is ``{"id", "text", "metadata"}`` where ``metadata`` is small enough to live
+in the vector index next to the embedding:
+
+    source, page_start, page_end, section, industry, hash (of the chunk text),
+    ingested (unix time), start/end (character offsets in the extracted document text)
+
+Chunk ids are ``<document hash>-<n>``, so re-ingesting an unchanged document
+reproduces the same ids.
+"""
+
+import bisect
+import logging
+import os
+import re
+import time
+
+from backend.result_cache import content_hash
+from backend.rfp_heuristics import detect_industry
+
+DOCS_PATH = "docs"
+SUPPORTED_EXTENSIONS = (".txt", ".md", ".pdf")
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", 300))
+CHUNK_OVERLAP_WORDS = int(os.getenv("CHUNK_OVERLAP_WORDS", 50))
+SECTION_CHARS = 80
+
+_HEADING_RE = re.compile(r"^[ \t]*(?:#{1,6}[ \t]+|\d+(?:\.\d+)*\.?[ \t]+)([A-Z][^\n]{2,80}?)[ \t]*$", re.MULTILINE)
+
+
+def read_pages(file_path: str) -> list:
+    """Extracted text per page (a single page for text/markdown files)."""
+    if file_path.lower().endswith(".pdf"):
+        import PyPDF2
+
+        with open(file_path, "rb") as f:
+            return [page.extract_text() or "" for page in PyPDF2.PdfReader(f).pages]
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        return [f.read()]
+
+
+def chunk_document(source: str, pages: list, ingested: float = None) -> list:
+    """Overlapping ``CHUNK_WORDS``-word chunks of a document, each with its page range and section."""
+    full, page_starts = "", []
+    for page in pages:
+        page_starts.append(len(full))
+        full += page + "\n"
+    words = list(re.finditer(r"\S+", full))
+    if not words:
+        return []
+
+    headings = [(m.start(), m.group(1).strip()) for m in _HEADING_RE.finditer(full)]
+    heading_starts = [start for start, _ in headings]
+    doc_hash = content_hash(full)[:12]
+    industry = detect_industry(full)
+    ingested = int(ingested or time.time())
+
+    chunks, step = [], max(1, CHUNK_WORDS - CHUNK_OVERLAP_WORDS)
+    for n, i in enumerate(range(0, len(words), step)):
+        window = words[i:i + CHUNK_WORDS]
+        start, end = window[0].start(), window[-1].end()
+        text = full[start:end]
+        # Section = last heading at or before the chunk, else the first heading inside it
+        h = bisect.bisect_right(heading_starts, start) - 1
+        if h < 0 and headings and headings[0][0] < end:
+            h = 0
+        chunks.append({
+            "id": f"{doc_hash}-{n:04d}",
+            "text": text,
+            "metadata": {
+                "source": source,
+                "page_start": bisect.bisect_right(page_starts, start),
+                "page_end": bisect.bisect_right(page_starts, end - 1),
+                "section": headings[h][1][:SECTION_CHARS] if h >= 0 else "",
+                "industry": industry,
+                "hash": content_hash(text)[:16],
+                "ingested": ingested,
+                "start": start,
+                "end": end,
+            },
+        })
+        if i + CHUNK_WORDS >= len(words):
+            break
+    return chunks
+
+
+def load_doc_chunks(docs_path: str = DOCS_PATH) -> list:
+    """Chunks of every supported document under ``docs_path``."""
+    chunks, ingested = [], time.time()
+    for file_name in sorted(os.listdir(docs_path)):
+        file_path = os.path.join(docs_path, file_name)
+        if not os.path.isfile(file_path) or not file_name.lower().endswith(SUPPORTED_EXTENSIONS):
+            continue
+        try:
+            document_chunks = chunk_document(file_name, read_pages(file_path), ingested)
+        except Exception as e:
+            logging.error(f"❌ Error reading '{file_name}': {e}")
+            continue
+        if not document_chunks:
+            logging.warning(f"⚠️ No text found in '{file_name}'.")
+        chunks.extend(document_chunks)
+    return chunks
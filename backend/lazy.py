@@ -0,0 +1,119 @@
+# backend/lazy.py
+
+"""
+Lazy initialization for heavy clients and modules.
+
+Module-level objects such as the LLM client, embeddings and the Pinecone index are
+declared as ``LazyResource``s: nothing is imported or connected until the first
+attribute access (or an explicit background ``warm_up``), so importing the API is cheap
+and does not need network access.
+"""
+
+import importlib
+import logging
+import threading
+import time
+import types
+
+_registry = {}
+
+
+class LazyResource:
+    """Thread-safe proxy that builds its object on first use and forwards attribute access to it."""
+
+    def __init__(self, name: str, factory):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_value", None)
+        object.__setattr__(self, "_ready", False)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_init_seconds", None)
+        _registry[name] = self
+
+    def get(self):
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                start = time.perf_counter()
+                object.__setattr__(self, "_value", self._factory())
+                object.__setattr__(self, "_init_seconds", time.perf_counter() - start)
+                object.__setattr__(self, "_ready", True)
+                logging.info(f"✅ Initialized {self._name} in {self._init_seconds:.2f}s")
+        return self._value
+
+    @property
+    def initialized(self) -> bool:
+        return self._ready
+
+    def reset(self):
+        """Drops the built object so the next access rebuilds it (e.g. after config changes)."""
+        with self._lock:
+            object.__setattr__(self, "_value", None)
+            object.__setattr__(self, "_ready", False)
+
+    def __getattr__(self, item):
+        return getattr(self.get(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self.get(), key, value)
+
+    def __repr__(self):
+        state = "ready" if self._ready else "not initialized"
+        return f"<LazyResource {self._name} ({state})>"
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that performs the real import on first attribute access."""
+
+    def __init__(self, module_name: str):
+        super().__init__(module_name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self.__dict__["_module"] is None:
+            self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return self.__dict__["_module"]
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+
+def lazy_import(module_name: str) -> LazyModule:
+    return LazyModule(module_name)
+
+
+def register_warmup(name: str, fn):
+    """Registers a callable (e.g. a module import) to run during ``warm_up``."""
+    _registry[name] = fn
+
+
+def resource_status() -> dict:
+    status = {}
+    for name, item in _registry.items():
+        if isinstance(item, LazyResource):
+            status[name] = {"initialized": item.initialized, "init_seconds": item._init_seconds}
+        else:
+            status[name] = {"initialized": getattr(item, "done", False), "init_seconds": None}
+    return status
+
+
+def warm_up(names=None):
+    """Initializes registered resources, logging (not raising) failures such as missing credentials."""
+    for name, item in list(_registry.items()):
+        if names is not None and name not in names:
+            continue
+        try:
+            if isinstance(item, LazyResource):
+                item.get()
+            else:
+                item()
+                item.done = True
+        except Exception as e:
+            logging.warning(f"⚠️ Warm-up of {name} failed: {e}")
+
+
+def warm_up_in_background(names=None) -> threading.Thread:
+    thread = threading.Thread(target=warm_up, args=(names,), name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,172 @@
+# backend/llm_registry.py
+
+"""
+Central registry of chat model clients with per-task routing.
+
+Each ``llm_utils`` task maps to a ``ModelRoute`` (model, max tokens, timeout,
+temperature). All OpenAI clients share one pooled HTTP client. Routes can be
+overridden without code changes:
+
+    LLM_DEFAULT_MODEL=gpt-4o-mini        # long-form generation tasks
+    LLM_CHEAP_MODEL=gpt-4.1-nano         # summarize_table, scoring, metadata extraction
+    LLM_ROUTES='{"check_compliance": {"model": "gpt-4o", "timeout": 120}}'
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+
+from backend.cancellation import check_cancelled
+from backend.lazy import LazyResource
+
+DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "gpt-4o-mini")
+CHEAP_MODEL = os.getenv("LLM_CHEAP_MODEL", DEFAULT_MODEL)
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 20))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    model: str
+    max_tokens: int = None
+    timeout: float = 60.0
+    temperature: float = 0.0
+
+
+DEFAULT_ROUTES = {
+    "default": ModelRoute(DEFAULT_MODEL),
+    "extract_rfp_metadata": ModelRoute(CHEAP_MODEL, max_tokens=800, timeout=30),
+    "summarize_table": ModelRoute(CHEAP_MODEL, max_tokens=200, timeout=20),
+    "score_proposal_quality": ModelRoute(CHEAP_MODEL, max_tokens=1500, timeout=60),
+    "expand_rfp": ModelRoute(DEFAULT_MODEL, max_tokens=4000, timeout=180),
+    "optimize_proposal_tone": ModelRoute(DEFAULT_MODEL, max_tokens=4000, timeout=180),
+    "refine_proposal": ModelRoute(DEFAULT_MODEL, max_tokens=4000, timeout=180),
+    "check_compliance": ModelRoute(DEFAULT_MODEL, max_tokens=2000, timeout=120),
+    "extract_requirements": ModelRoute(CHEAP_MODEL, max_tokens=2000, timeout=60),
+    "verify_requirements": ModelRoute(DEFAULT_MODEL, max_tokens=1500, timeout=60),
+}
+
+
+def _load_routes() -> dict:
+    routes = dict(DEFAULT_ROUTES)
+    overrides = os.getenv("LLM_ROUTES")
+    if overrides:
+        try:
+            for task, fields in json.loads(overrides).items():
+                routes[task] = replace(routes.get(task, routes["default"]), **fields)
+        except (ValueError, TypeError) as e:
+            logging.error(f"❌ Ignoring invalid LLM_ROUTES: {e}")
+    return routes
+
+
+ROUTES = _load_routes()
+
+
+def get_route(task: str) -> ModelRoute:
+    return ROUTES.get(task, ROUTES["default"])
+
+
+def _build_http_client():
+    import httpx
+    limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+    return httpx.Client(limits=limits, timeout=None)  # per-request timeouts come from the route
+
+
+def _build_async_http_client():
+    import httpx
+    limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+    return httpx.AsyncClient(limits=limits, timeout=None)
+
+
+http_client = LazyResource("llm_http_client", _build_http_client)
+async_http_client = LazyResource("llm_async_http_client", _build_async_http_client)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _build_client(route: ModelRoute):
+    if os.getenv("LLM_BACKEND") == "fake":
+        from backend.fake_backends import FakeChatModel
+        return FakeChatModel()
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        model_name=route.model,
+        temperature=route.temperature,
+        max_tokens=route.max_tokens,
+        request_timeout=route.timeout,
+        max_retries=0,  # retries are handled (and counted) by llm_utils._invoke
+        http_client=http_client.get(),
+        http_async_client=async_http_client.get(),
+    )
+
+
+def get_llm(task: str = "default"):
+    """Returns the (cached) chat model configured for ``task``; tasks with identical routes share a client."""
+    route = get_route(task)
+    client = _clients.get(route)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(route)
+            if client is None:
+                client = _clients[route] = _build_client(route)
+    return client
+
+
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+# Set by a batch run: its own cap, used instead of the process-wide one for calls in its context
+_scoped_slots = contextvars.ContextVar("llm_slots", default=None)
+
+
+def set_llm_concurrency(limit: int):
+    """Caps concurrent in-flight LLM requests process-wide (e.g. the CLI batch runner)."""
+    global _llm_slots
+    if limit < 1:
+        raise ValueError("LLM concurrency must be at least 1")
+    _llm_slots = threading.BoundedSemaphore(limit)
+
+
+@contextlib.contextmanager
+def llm_concurrency(limit: int):
+    """Caps in-flight LLM requests made in the current context (and contexts copied from it)."""
+    if limit < 1:
+        raise ValueError("LLM concurrency must be at least 1")
+    token = _scoped_slots.set(threading.BoundedSemaphore(limit))
+    try:
+        yield
+    finally:
+        _scoped_slots.reset(token)
+
+
+@contextlib.contextmanager
+def llm_slot():
+    slots = _scoped_slots.get() or _llm_slots
+    while not slots.acquire(timeout=0.25):
+        check_cancelled()  # don't keep queueing for a slot on behalf of a cancelled request
+    try:
+        check_cancelled()
+        yield
+    finally:
+        slots.release()
+
+
+def parallel_map(fn, items: list, max_workers: int = 4) -> list:
+    """
+    Maps ``fn`` over ``items`` on a thread pool for fan-out LLM work. Each task runs in a copy
+    of the caller's context, so calls stay attributed to the current run/stage in tracing.
+    """
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(min(max_workers, len(items))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+        return [f.result() for f in futures]
+
+
+def describe_routes() -> dict:
+    return {task: asdict(route) for task, route in ROUTES.items()}
@@ -1,33 +1,85 @@
 # backend/llm_utils.py
+import contextvars
 import os
 import re
+import time
+import logging
 from dotenv import load_dotenv
 load_dotenv()
-from langchain_openai import ChatOpenAI
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import ConversationChain
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
+from backend import tracing
+from backend.cancellation import check_cancelled, sleep as cancellable_sleep
+from backend.llm_registry import get_llm, llm_slot
+from backend import prompts
+from backend.models import RFPMetadata, RequirementList, ScoreBatch, VerificationBatch
+from backend.rfp_heuristics import heuristic_rfp_metadata, is_confident
+from backend import result_cache
 
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-llm = ChatOpenAI(
-    openai_api_key=openai_api_key,
-    model_name="gpt-4o-mini",
-    temperature=0.0
-)
-
-def extract_rfp_metadata(rfp_text: str) -> dict:
-    prompt = f"""
-You are an intelligent assistant extracting structured metadata from a client's Request for Proposal (RFP).
-
-Given the following RFP text:
-
-{rfp_text}
-
-Extract and return a JSON object with the following fields:
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+# Reuse responses for identical (task, model, prompt) calls; enabled for batch runs
+RESPONSE_CACHE = os.getenv("LLM_RESPONSE_CACHE") == "1"
+# Per-context override of RESPONSE_CACHE (a batch run enables it for its own calls only)
+response_cache = contextvars.ContextVar("llm_response_cache", default=None)
+
+
+def _invoke(prompt, task: str, schema=None):
+    """
+    Invokes the model routed to ``task`` with retries and records latency, token and retry stats.
+    With a Pydantic ``schema`` the call uses function-calling structured output, returns the parsed
+    object, and output that fails validation is retried like any other error.
+    """
+    client = get_llm(task)
+    model = client.model_name
+
+    cache_key = None
+    if RESPONSE_CACHE if response_cache.get() is None else response_cache.get():
+        cache_key = result_cache.content_hash(task, model, schema.__name__ if schema else "", str(prompt))
+        cached = result_cache.get("llm_response", cache_key)
+        if cached is not None:
+            tracing.record_llm_call(task, model, 0.0, {}, cache_hit=True)
+            if schema:
+                return schema.model_validate(cached)
+            from langchain_core.messages import AIMessage
+            return AIMessage(content=cached)
+
+    runnable = client.with_structured_output(schema, method="function_calling", include_raw=True) if schema else client
+    retries = 0
+    with tracing.llm_span(task, model) as span:
+        start = time.perf_counter()
+        while True:
+            check_cancelled()
+            try:
+                with llm_slot():
+                    response = runnable.invoke(prompt)
+                if schema and response["parsed"] is None:
+                    raise ValueError(f"invalid structured output: {response.get('parsing_error')}")
+                break
+            except Exception as e:
+                if retries >= LLM_MAX_RETRIES:
+                    raise
+                retries += 1
+                logging.warning(f"⚠️ LLM call for {task} failed ({e}); retry {retries}/{LLM_MAX_RETRIES}")
+                cancellable_sleep(min(2 ** retries, 10))
+        duration = time.perf_counter() - start
+        usage = tracing.extract_usage(response["raw"] if schema else response)
+        tracing.annotate_span(span, usage, retries)
+    tracing.record_llm_call(task, model, duration, usage, retries=retries)
+    if cache_key:
+        result_cache.set("llm_response", cache_key, response["parsed"].model_dump() if schema else response.content)
+    return response["parsed"] if schema else response
+
+# "auto": skip the LLM when the regex pre-extractor is confident; "hint": always call the
+# LLM but pass the pre-extracted values; "off": LLM only
+METADATA_HEURISTICS = os.getenv("METADATA_HEURISTICS", "auto")
+
+# Static task instructions; prompts.py places them after the shared preamble + RFP/proposal
+# prefix and before each call's variable inputs, so provider prefix caching applies
+METADATA_INSTRUCTIONS = """
+Task: extract structured metadata from the client's RFP above.
+
+Extract the following fields:
 - project_name
 - client_name (if available)
 - deadline
@@ -35,54 +87,54 @@ Extract and return a JSON object with the following fields:
 - region (e.g., North America, Europe)
 - constraints (list of limitations or must-haves)
 - client_needs (list of pain points or goals mentioned)
-
-Respond with only the JSON.
 """
 
-    response = llm.invoke(prompt)
-    
-    try:
-        import json
-        return json.loads(response.content)
-    except Exception as e:
-        print("⚠️ Metadata extraction failed:", e)
-        return {
-            "project_name": "",
-            "client_name": "",
-            "deadline": "",
-            "industry": "generic",
-            "region": "global",
-            "constraints": [],
-            "client_needs": []
-        }
-
+METADATA_CACHE_VERSION = "2"
 
-def expand_rfp(rfp_text, retrieved_docs, summarized_tables=None):
-    """Generates a thorough business proposal in response to an RFP, leveraging past proposals and summarized table insights."""
 
-    structured_context = "\n\n".join([
-        f"🔹 **Reference Proposal {i+1}**:\n{doc}" for i, doc in enumerate(retrieved_docs)
-    ]) if retrieved_docs else "No similar documents found."
-    
-    summarized_tables = summarized_tables or []
-    table_context = "\n\n".join(summarized_tables)
-
-    prompt = f"""
-You are a professional business consultant responding to a client’s RFP. Your task is to generate a **thorough business proposal** that directly addresses the client's needs.
-
----
-**📜 Client’s RFP to Respond To:**
-{rfp_text}
-
----
-**📂 Past Successful Proposals (USE THESE TO SHAPE THE RESPONSE and fill in the company name, contact information, etc. and structure which is redundant from the past proposals):**
-{structured_context}
-
----
-**🧾 Table Insights (Summarized Explanations):**
-{table_context}
+def extract_rfp_metadata(rfp_text: str) -> dict:
+    """Returns RFP metadata as a dict, cached per RFP text hash."""
+    # Versioned: entries cached before the whole-word heuristics may carry keyword-vote misreads
+    cache_key = result_cache.content_hash(METADATA_CACHE_VERSION, rfp_text)
+    cached = result_cache.get("rfp_metadata", cache_key)
+    if cached is not None:
+        return cached
+
+    heuristic, confidence = heuristic_rfp_metadata(rfp_text)
+    if METADATA_HEURISTICS == "auto" and is_confident(confidence):
+        logging.info("✅ Metadata taken from regex pre-extraction; skipping LLM call.")
+        metadata = RFPMetadata(**heuristic)
+    else:
+        hints = ""
+        if METADATA_HEURISTICS != "off":
+            found = {k: heuristic[k] for k in ("client_name", "deadline", "region", "industry") if confidence.get(k, 0) >= 0.5}
+            if found:
+                hints = "Pre-extracted values (verify against the text, correct if wrong):\n" + "\n".join(
+                    f"- {k}: {v}" for k, v in found.items()
+                )
+
+        prompt = prompts.rfp_prompt(rfp_text, METADATA_INSTRUCTIONS, hints)
+        try:
+            metadata = _invoke(prompt, "extract_rfp_metadata", schema=RFPMetadata)
+        except Exception as e:
+            print("⚠️ Metadata extraction failed:", e)
+            # Fall back to whatever the pre-extractor found; don't cache so the next run retries
+            return RFPMetadata(**heuristic).model_dump()
+
+        # Fill fields the model left empty from the pre-extractor
+        for field, value in heuristic.items():
+            if not getattr(metadata, field) or getattr(metadata, field) in ("generic", "global"):
+                if value and value not in ("generic", "global"):
+                    setattr(metadata, field, value)
+
+    result = metadata.model_dump()
+    result_cache.set("rfp_metadata", cache_key, result)
+    return result
+
+
+EXPAND_INSTRUCTIONS = """
+You are a professional business consultant responding to the client’s RFP above. Your task is to generate a **thorough business proposal** that directly addresses the client's needs, using the past successful proposals and table insights that follow these instructions.
 
----
 **Proposal Format:**
 
 📌 **Cover Letter**  
@@ -125,59 +177,50 @@ You are a professional business consultant responding to a client’s RFP. Your
 - Use **table summaries** to justify decisions, showcase features, or support pricing or planning logic.
 """
 
-    print(f"\n📝 Sending this prompt to GPT:\n{prompt[:1500]}")  # ✅ Debugging output
 
-    response = llm.invoke(prompt)
-    return response.content.strip()
+def expand_rfp(rfp_text, retrieved_docs, summarized_tables=None):
+    """Generates a thorough business proposal in response to an RFP, leveraging past proposals and summarized table insights."""
+
+    structured_context = "\n\n".join([
+        f"🔹 **Reference Proposal {i+1}**:\n{doc}" for i, doc in enumerate(retrieved_docs)
+    ]) if retrieved_docs else "No similar documents found."
+    
+    summarized_tables = summarized_tables or []
+    table_context = "\n\n".join(summarized_tables)
 
+    prompt = prompts.rfp_prompt(
+        rfp_text,
+        EXPAND_INSTRUCTIONS,
+        f"""**📂 Past Successful Proposals (USE THESE TO SHAPE THE RESPONSE and fill in the company name, contact information, etc. and structure which is redundant from the past proposals):**
+{structured_context}""",
+        f"""**🧾 Table Insights (Summarized Explanations):**
+{table_context}""",
+    )
 
+    print(f"\n📝 Sending this prompt to GPT:\n{prompt[-1].content[:1500]}")  # ✅ Debugging output
 
-# Maintain memory for ongoing refinements
-conversation_memory = {"latest_proposal": ""}
+    response = _invoke(prompt, "expand_rfp")
+    return response.content.strip()
 
-# --- Create a conversational chain for proposal refinement ---
 
-# Define a prompt template that will include the conversation history and new feedback.
-refine_prompt_template = PromptTemplate(
-    input_variables=["chat_history", "input"],
-    template="""
-You are an expert proposal writer tasked with refining a business proposal based on user feedback.
 
-Conversation History:
-{chat_history}
+# Maintain memory for ongoing refinements
+# (shared across API worker processes, see backend/serve.py)
+conversation_memory = result_cache.SharedDict("conversation", {"latest_proposal": ""})
 
-User Feedback:
-{input}
 
-Please produce an updated proposal that incorporates this feedback while preserving all previous refinements.
-"""
-)
-
-# Create a memory object to hold the conversation history.
-refine_memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-
-# Create the conversational chain using the prompt template and memory.
-refine_chain = ConversationChain(
-    llm=llm,
-    prompt=refine_prompt_template,
-    memory=refine_memory
-)
- 
 def refine_proposal(current_proposal: str, user_feedback: str) -> dict:
     # Construct a prompt that combines the current proposal and the user feedback.
-    prompt = f"""
-You are an expert proposal writer. Given the current proposal below and the user feedback provided, generate a refined proposal that incorporates the feedback and improves upon the original.
-
-Current Proposal:
-{current_proposal}
-
-User Feedback:
-{user_feedback}
-
-Refined Proposal:
-"""
+    prompt = prompts.proposal_prompt(
+        current_proposal,
+        """
+You are an expert proposal writer. Given the proposal above and the user feedback below, generate a refined proposal that incorporates the feedback and improves upon the original.
+""",
+        f"User Feedback:\n{user_feedback}",
+        "Refined Proposal:",
+    )
     # Call the LLM directly with the new prompt.
-    response = llm.invoke(prompt)
+    response = _invoke(prompt, "refine_proposal")
     refined_proposal = response.content.strip()
     
     # Update the global conversation memory with the new refined proposal.
@@ -186,78 +229,136 @@ Refined Proposal:
     return {"refined_proposal": refined_proposal}
 
 
-def optimize_proposal_tone(proposal: str, vertical: str = "generic", tone: str = "professional") -> str:
-    prompt = f"""
-You are a senior business strategist. Your task is to optimize the following proposal to better align with the target industry and client expectations.
-
----
-📝 **Original Proposal:**
-{proposal}
+def refine_for_rfp_changes(prior_proposal: str, rfp_diff: str) -> str:
+    """Adapts a proposal written for a near-identical RFP to the lines that changed in the new one."""
+    prompt = prompts.proposal_prompt(
+        prior_proposal,
+        """
+You are an expert proposal writer. The proposal above was written for an earlier version of an RFP.
+The client has re-issued the RFP; the differences are listed below as a diff ("-" = removed from the old RFP, "+" = added in the new one).
+
+Update the proposal so it fully answers the new RFP: change only what the differences require (dates, names,
+scope, requirements, quantities) and keep every other section exactly as written.
+""",
+        f"Changes in the RFP:\n{rfp_diff}",
+        "Updated Proposal:",
+    )
+    response = _invoke(prompt, "refine_proposal")
+    return response.content.strip()
 
-🎯 **Target Industry (Vertical)**: {vertical}
-🎙️ **Preferred Tone**: {tone}
 
----
-Please revise the proposal accordingly. Ensure it's still well-structured, clear, and persuasive.
-"""
-    response = llm.invoke(prompt)
+def optimize_proposal_tone(proposal: str, vertical: str = "generic", tone: str = "professional") -> str:
+    # Tone candidates (scoring.best_of_n) share the prefix up to the vertical/tone line
+    prompt = prompts.proposal_prompt(
+        proposal,
+        """
+You are a senior business strategist. Your task is to optimize the proposal above to better align with the target industry and client expectations.
+Revise the proposal for the industry and tone given below. Ensure it's still well-structured, clear, and persuasive.
+""",
+        f"🎯 **Target Industry (Vertical)**: {vertical}\n🎙️ **Preferred Tone**: {tone}",
+    )
+    response = _invoke(prompt, "optimize_proposal_tone")
     return response.content.strip()
 
 def check_compliance(rfp_text: str, proposal: str) -> str:
-    prompt = f"""
-You are a compliance auditor. Given the client's RFP and our current proposal draft, check if the proposal fully addresses all key requirements, constraints, and mandatory elements.
-
----
-📜 **Client RFP:**
-{rfp_text}
+    prompt = prompts.rfp_prompt(
+        rfp_text,
+        """
+You are a compliance auditor. Given the client's RFP above and our current proposal draft below, check if the proposal fully addresses all key requirements, constraints, and mandatory elements.
 
-📝 **Our Proposal:**
-{proposal}
-
----
 List all major areas:
 - ✅ Fully addressed
 - ⚠️ Partially addressed
 - ❌ Missing
 
 Be detailed and structured.
-"""
-    response = llm.invoke(prompt)
+""",
+        f"📝 **Our Proposal:**\n{proposal}",
+    )
+    response = _invoke(prompt, "check_compliance")
     return response.content.strip()
 
-def score_proposal_quality(proposal: str) -> str:
-    prompt = f"""
-You are a senior proposal reviewer. Evaluate the following proposal and assign scores (1 to 10) for:
+REQUIREMENTS_INSTRUCTIONS = """
+You are a compliance analyst. List every requirement the vendor's proposal must satisfy in {where}:
+mandatory elements ("must", "shall", "required"), constraints (budget, timeline, standards, regulations),
+requested deliverables and the content the response must include.
 
-1. Clarity of Communication
-2. Persuasiveness & Tone
-3. Technical Depth & Feasibility
-4. Alignment with Client Needs
-5. Overall Quality
+Write each requirement as one self-contained sentence. Do not merge unrelated requirements and do not invent any.
+Set mandatory to false only for items the RFP marks as optional or preferred. Leave id empty.
+"""
 
----
-📝 Proposal:
-{proposal}
 
-Return scores and a short explanation for each.
-"""
-    response = llm.invoke(prompt)
-    return response.content.strip()
+def extract_requirements(rfp_section: str, whole_rfp: bool = False) -> list:
+    """
+    Structured list of the requirements stated in one section of an RFP. ``whole_rfp`` marks a
+    section that is the entire RFP, sent in the shared RFP-prefix layout of the other stages.
+    """
+    if whole_rfp:
+        prompt = prompts.rfp_prompt(rfp_section, REQUIREMENTS_INSTRUCTIONS.format(where="the RFP above"))
+    else:
+        prompt = prompts.build(REQUIREMENTS_INSTRUCTIONS.format(where="the RFP excerpt below"),
+                               f"RFP excerpt:\n{rfp_section}")
+    return _invoke(prompt, "extract_requirements", schema=RequirementList).requirements
+
+
+def verify_requirements(items: list) -> list:
+    """
+    Verifies a batch of ``{"id", "text", "excerpt"}`` items, where ``excerpt`` holds the proposal
+    sections mapped to the requirement, and returns a ``RequirementVerdict`` per item.
+    """
+    blocks = "\n\n".join(
+        f"### {item['id']}: {item['text']}\nRelevant proposal sections:\n{item['excerpt'] or '(no matching section found)'}"
+        for item in items
+    )
+    prompt = prompts.build(
+        """
+You are a compliance auditor. For each RFP requirement below, decide from the quoted proposal sections whether
+our proposal addresses it:
+- pass: fully and explicitly addressed
+- partial: mentioned but incomplete or vague
+- fail: not addressed
+
+Return one verdict per requirement id with a short quote as evidence and, unless it passes, what is missing.
+""",
+        blocks,
+    )
+    return _invoke(prompt, "verify_requirements", schema=VerificationBatch).verdicts
+
+
+def score_proposals(candidates: dict, client_context: str = "") -> list:
+    """
+    Scores several proposals (``{label: text}``) against the same rubric in one call and
+    returns a ``ProposalScore`` per candidate.
+    """
+    blocks = "\n\n".join(f"=== Candidate {label} ===\n{text}" for label, text in candidates.items())
+    context = f"🎯 Client needs and constraints:\n{client_context}" if client_context else ""
+    prompt = prompts.build(
+        """
+You are a senior proposal reviewer. Score each candidate proposal below independently from 1 (poor) to 10 (excellent) on:
+
+- clarity: Clarity of Communication
+- persuasiveness: Persuasiveness & Tone
+- technical_depth: Technical Depth & Feasibility
+- client_alignment: Alignment with Client Needs
+- overall: Overall Quality
+
+Use the full scale and the same standard for every candidate. Return one entry per candidate with its
+label in `candidate` and a short rationale.
+""",
+        context,
+        blocks,
+    )
+    return _invoke(prompt, "score_proposal_quality", schema=ScoreBatch).scores
 
 
 def summarize_table(markdown_table: str) -> str:
-    prompt = f"""
-You are a business analyst. Given the following table from a proposal or RFP, explain its purpose and contents in simple English.
-
-Table:
-{markdown_table}
+    prompt = prompts.build(
+        """
+You are a business analyst. Given the table below from a proposal or RFP, explain its purpose and contents in simple English.
 
 Respond with a 1–3 sentence summary of what the table is about, what insights it provides, and which section of a proposal it might belong to.
-"""
-    response = llm.invoke(prompt)
+""",
+        f"Table:\n{markdown_table}",
+    )
+    response = _invoke(prompt, "summarize_table")
     return response.content.strip()
-
-
-def remove_unsupported_unicode(text: str) -> str:
-    # Remove characters not supported by latin-1 encoding
-    return text.encode('latin-1', errors='ignore').decode('latin-1')
\ No newline at end of file
@@ -1,7 +1,7 @@
 # backend/models.py
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 class RFPRequest(BaseModel):
     """Model for processing RFP requests."""
@@ -29,3 +29,46 @@ class RetrievalRequest(BaseModel):
 class RetrievalResponse(BaseModel):
     """Model for retrieved documents."""
     retrieved_docs: List[str]
+
+class RFPMetadata(BaseModel):
+    """Structured metadata extracted from an RFP."""
+    project_name: str = ""
+    client_name: str = ""
+    deadline: str = ""
+    industry: str = "generic"
+    region: str = "global"
+    constraints: List[str] = []
+    client_needs: List[str] = []
+
+class Requirement(BaseModel):
+    """A single requirement extracted from an RFP."""
+    id: str = ""
+    text: str
+    category: str = "general"
+    mandatory: bool = True
+
+class RequirementList(BaseModel):
+    requirements: List[Requirement] = []
+
+class RequirementVerdict(BaseModel):
+    """Whether the proposal satisfies one requirement."""
+    id: str
+    status: Literal["pass", "partial", "fail"]
+    evidence: str = ""
+    gap: str = ""
+
+class VerificationBatch(BaseModel):
+    verdicts: List[RequirementVerdict] = []
+
+class ProposalScore(BaseModel):
+    """Rubric scores (1-10) for one proposal."""
+    candidate: str = ""
+    clarity: int
+    persuasiveness: int
+    technical_depth: int
+    client_alignment: int
+    overall: int
+    rationale: str = ""
+
+class ScoreBatch(BaseModel):
+    scores: List[ProposalScore] = []
@@ -0,0 +1,228 @@
+# backend/ocr.py
+
+"""
+OCR service for PDF pages.
+
+- A long-lived thread pool runs recognition. With ``tesserocr`` installed each worker
+  keeps its own initialised Tesseract API (no process spawn or model load per page);
+  otherwise workers call ``pytesseract`` (one ``tesseract`` process per page).
+- Each page is first rasterised at ``OCR_LOW_DPI`` in grayscale. The raster's byte hash
+  keys a persistent cache, so repeated pages (letterheads, boilerplate appendices,
+  re-uploaded documents) are recognised once.
+- Adaptive resolution: the low-res pass is kept when Tesseract's mean word confidence
+  reaches ``OCR_MIN_CONFIDENCE``; only low-confidence pages are re-rendered and
+  recognised at ``OCR_HIGH_DPI``. Blank pages stop after the low-res pass.
+
+Rendering stays on the calling thread (PyMuPDF is not thread-safe); only recognition
+is parallel. Pages are processed in windows of ``OCR_WINDOW`` so memory stays bounded on
+long scans: the next window renders while the current one is recognised. Per-page time by pass and the cache hit rate are in ``ocr_stats()`` and
+the Prometheus metrics.
+"""
+
+import hashlib
+import importlib.util
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import result_cache
+from backend.lazy import LazyResource, lazy_import, register_warmup
+from backend.tracing import OCR_DURATION, OCR_PAGES
+
+# Tesseract's own OpenMP threads would oversubscribe the CPU next to our worker pool
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+pytesseract = lazy_import("pytesseract")
+pdfplumber = lazy_import("pdfplumber")
+fitz = lazy_import("fitz")  # PyMuPDF
+
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")  # auto | tesserocr | pytesseract
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", min(4, os.cpu_count() or 1)))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_LOW_DPI = int(os.getenv("OCR_LOW_DPI", 150))
+OCR_HIGH_DPI = int(os.getenv("OCR_HIGH_DPI", 300))
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", 80))
+OCR_WINDOW = max(1, int(os.getenv("OCR_WINDOW", OCR_WORKERS * 2)))  # pages rendered and recognised per step
+BLANK_INK_RATIO = 0.005  # share of dark pixels below which a page without recognised words is blank
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"pages": 0, "cache_hits": 0, "high_res": 0, "blank": 0, "seconds": {"low": 0.0, "high": 0.0}}
+
+
+def _backend() -> str:
+    if OCR_BACKEND == "auto":
+        return "tesserocr" if importlib.util.find_spec("tesserocr") else "pytesseract"
+    return OCR_BACKEND
+
+
+def _init_worker():
+    if _backend() == "tesserocr":
+        import tesserocr
+        _local.api = tesserocr.PyTessBaseAPI(lang=OCR_LANG)
+
+
+pool = LazyResource(
+    "ocr_pool", lambda: ThreadPoolExecutor(OCR_WORKERS, thread_name_prefix="ocr", initializer=_init_worker)
+)
+
+
+def _recognize(image) -> tuple:
+    """``(text, mean word confidence 0-100)`` for a PIL image; runs on an OCR worker."""
+    api = getattr(_local, "api", None)
+    if api is not None:
+        api.SetImage(image)
+        return api.GetUTF8Text(), float(api.MeanTextConf())
+
+    data = pytesseract.image_to_data(image, lang=OCR_LANG, output_type=pytesseract.Output.DICT)
+    lines, confidences = {}, []
+    for i, word in enumerate(data["text"]):
+        if word.strip():
+            lines.setdefault((data["block_num"][i], data["par_num"][i], data["line_num"][i]), []).append(word)
+            confidences.append(float(data["conf"][i]))
+    text, previous_block = "", None
+    for (block, _, _), words in lines.items():
+        if previous_block is not None:
+            text += "\n\n" if block != previous_block else "\n"
+        text += " ".join(words)
+        previous_block = block
+    return text, (sum(confidences) / len(confidences) if confidences else 0.0)
+
+
+def _timed_recognize(image, dpi_pass: str) -> tuple:
+    start = time.perf_counter()
+    text, confidence = _recognize(image)
+    elapsed = time.perf_counter() - start
+    OCR_DURATION.observe(elapsed, dpi_pass=dpi_pass)
+    with _stats_lock:
+        _stats["seconds"][dpi_pass] += elapsed
+    return text, confidence
+
+
+def _render(pdf_path: str, page_numbers: list, dpi: int) -> dict:
+    """page number -> grayscale PIL image."""
+    from PIL import Image
+
+    images = {}
+    if importlib.util.find_spec("fitz"):
+        with fitz.open(pdf_path) as doc:
+            for n in page_numbers:
+                pix = doc[n - 1].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+                images[n] = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    else:
+        with pdfplumber.open(pdf_path) as pdf:
+            for n in page_numbers:
+                images[n] = pdf.pages[n - 1].to_image(resolution=dpi).original.convert("L")
+    return images
+
+
+def _ink_ratio(image) -> float:
+    histogram = image.histogram()
+    return sum(histogram[:128]) / max(1, sum(histogram))
+
+
+def ocr_pdf(pdf_path: str, page_numbers: list = None) -> dict:
+    """OCR text per page number (1-based) for ``page_numbers`` (default: every page)."""
+    if page_numbers is None:
+        if importlib.util.find_spec("fitz"):
+            with fitz.open(pdf_path) as doc:
+                page_numbers = list(range(1, doc.page_count + 1))
+        else:
+            with pdfplumber.open(pdf_path) as pdf:
+                page_numbers = list(range(1, len(pdf.pages) + 1))
+    if not page_numbers:
+        return {}
+
+    config = f"{_backend()}:{OCR_LANG}:{OCR_LOW_DPI}/{OCR_HIGH_DPI}@{OCR_MIN_CONFIDENCE}"
+    executor = pool.get()
+    results, first_page, duplicates = {}, {}, {}  # first_page: raster hash -> first page queued with it
+    counts = {"recognised": 0, "high_res": 0, "blank": 0}
+
+    def start(window: list) -> list:
+        """Renders and hashes a window of pages and queues the uncached ones for recognition."""
+        queued = []
+        for n, image in _render(pdf_path, window, OCR_LOW_DPI).items():
+            key = result_cache.content_hash(config, hashlib.blake2b(image.tobytes(), digest_size=16).hexdigest())
+            cached = result_cache.get("ocr_page", key)
+            if cached is not None:
+                results[n] = cached
+                OCR_PAGES.inc(result="cache_hit")
+            elif key in first_page:
+                duplicates[n] = first_page[key]  # same raster as a page already queued in this document
+            else:
+                first_page[key] = n
+                queued.append((n, key, image, executor.submit(_timed_recognize, image, "low")))
+        return queued
+
+    def finish(queued: list):
+        """Collects a window's low-res pass and re-runs its low-confidence pages at high resolution."""
+        retry, first_pass = [], {}
+        for n, _, image, future in queued:
+            text, confidence = first_pass[n] = future.result()
+            if not text.strip() and _ink_ratio(image) < BLANK_INK_RATIO:
+                results[n] = ""
+                counts["blank"] += 1
+                OCR_PAGES.inc(result="blank")
+            elif confidence >= OCR_MIN_CONFIDENCE:
+                results[n] = text.strip()
+                OCR_PAGES.inc(result="low_res")
+            else:
+                retry.append(n)
+        if retry:
+            high = _render(pdf_path, retry, OCR_HIGH_DPI)
+            for n, (text, confidence) in zip(retry, executor.map(lambda n: _timed_recognize(high[n], "high"), retry)):
+                # Keep whichever pass Tesseract was more sure about
+                results[n] = (text if confidence >= first_pass[n][1] else first_pass[n][0]).strip()
+                OCR_PAGES.inc(result="high_res")
+        for n, key, _, _ in queued:
+            result_cache.set("ocr_page", key, results[n])
+        counts["recognised"] += len(queued)
+        counts["high_res"] += len(retry)
+
+    # Pages go through in windows: the next window is rendered while the OCR workers recognise the
+    # current one, and at most two windows of rasters are held at once whatever the page count
+    previous = []
+    for i in range(0, len(page_numbers), OCR_WINDOW):
+        queued = start(page_numbers[i:i + OCR_WINDOW])
+        finish(previous)
+        previous = queued
+    finish(previous)
+
+    for n, original in duplicates.items():
+        results[n] = results[original]
+        OCR_PAGES.inc(result="cache_hit")
+
+    cached = len(page_numbers) - counts["recognised"]
+    with _stats_lock:
+        _stats["pages"] += len(page_numbers)
+        _stats["cache_hits"] += cached
+        _stats["high_res"] += counts["high_res"]
+        _stats["blank"] += counts["blank"]
+    logging.info(f"🔎 OCR {pdf_path}: {len(page_numbers)} pages, {cached} cached, "
+                 f"{counts['high_res']} re-run at {OCR_HIGH_DPI} DPI")
+    return {n: results[n] for n in page_numbers}
+
+
+def ocr_stats() -> dict:
+    with _stats_lock:
+        stats = {**_stats, "seconds": dict(_stats["seconds"])}
+    recognised = stats["pages"] - stats["cache_hits"]
+    return {
+        "backend": _backend(),
+        "workers": OCR_WORKERS,
+        "pages": stats["pages"],
+        "cache_hits": stats["cache_hits"],
+        "cache_hit_rate": stats["cache_hits"] / stats["pages"] if stats["pages"] else 0.0,
+        "high_res_pages": stats["high_res"],
+        "blank_pages": stats["blank"],
+        "avg_ms_per_page": {
+            "low": 1000 * stats["seconds"]["low"] / recognised if recognised else 0.0,
+            "high": 1000 * stats["seconds"]["high"] / stats["high_res"] if stats["high_res"] else 0.0,
+        },
+    }
+
+
+# Start the workers (and load Tesseract models) during the app's background warm-up
+register_warmup("ocr_pool", pool.get)
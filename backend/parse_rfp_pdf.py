@@ -1,12 +1,9 @@
 #parse_rfp_pdf.py
 
-import pdfplumber
-import fitz  # PyMuPDF
-import pytesseract
-from PIL import Image
-import io
 import logging
-import os
+from backend import blob_store, result_cache
+from backend.ocr import ocr_pdf
+from backend.pdf_engines import extract_pages
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,42 +11,41 @@ logging.basicConfig(level=logging.INFO)
 # If Tesseract-OCR is not installed at default location, set path manually:
 # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"  # Windows Example
 
-def parse_rfp_pdf(pdf_path: str) -> str:
+
+def parse_rfp_pdf(pdf_path: str, engine: str = None) -> str:
     """
     Extracts text, tables, and image metadata from a PDF file.
-    Uses pdfplumber for structured content and OCR as fallback.
+    Uses the configured extraction engine (``PDF_ENGINE``) for structured content and
+    the OCR service (``backend.ocr``) as fallback.
     """
     extracted_text = ""
     tables = []
     image_descriptions = []
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for i, page in enumerate(pdf.pages):
-                # --- Extract normal text
-                page_text = page.extract_text()
-                if page_text:
-                    extracted_text += f"\n[Text from Page {i+1}]\n{page_text}\n"
+        pages = extract_pages(pdf_path, engine)
+        ocr_texts = ocr_pdf(pdf_path, [page.number for page in pages])
+        for page in pages:
+            i = page.number - 1
+            # --- Extract normal text
+            if page.text:
+                extracted_text += f"\n[Text from Page {i+1}]\n{page.text}\n"
 
-                # --- Extract tables
-                extracted_tables = page.extract_tables()
-                for tbl in extracted_tables:
-                    if tbl:
-                        table_str = "\n".join([" | ".join(row) for row in tbl if any(row)])
-                        tables.append(f"\n📊 Table from Page {i+1}:\n{table_str}\n")
+            # --- Extract tables
+            for tbl in page.tables:
+                table_str = "\n".join([" | ".join(row) for row in tbl])
+                tables.append(f"\n📊 Table from Page {i+1}:\n{table_str}\n")
 
-                # --- OCR on image of the page
-                image = page.to_image(resolution=300)
-                img = image.original
-                ocr_text = pytesseract.image_to_string(img)
-                if ocr_text.strip():
-                    extracted_text += f"\n[OCR from Page {i+1} Image]\n{ocr_text.strip()}\n"
+            # --- OCR on image of the page
+            ocr_text = ocr_texts.get(page.number, "")
+            if ocr_text:
+                extracted_text += f"\n[OCR from Page {i+1} Image]\n{ocr_text}\n"
 
-                # --- Log presence of embedded images
-                for img in page.images:
-                    image_descriptions.append(
-                        f"📷 Image found on Page {i+1} (Position: x={img['x0']}, y={img['top']})"
-                    )
+            # --- Log presence of embedded images
+            for x0, top in page.images:
+                image_descriptions.append(
+                    f"📷 Image found on Page {i+1} (Position: x={x0}, y={top})"
+                )
 
         full_text = "\n".join([
             extracted_text.strip(),
@@ -64,3 +60,14 @@ def parse_rfp_pdf(pdf_path: str) -> str:
         logging.error(f"❌ Failed to parse PDF: {pdf_path} – {e}")
         return "Error: Unable to process the PDF."
 
+
+def parse_blob(blob_hash: str, engine: str = None) -> str:
+    """``parse_rfp_pdf`` for an upload-store blob; successful parses are cached by blob hash."""
+    cached = result_cache.get("parsed_rfp", blob_hash)
+    if cached is not None:
+        return cached
+    with blob_store.local_path(blob_hash, suffix=".pdf") as path:
+        text = parse_rfp_pdf(path, engine)
+    if not text.startswith("Error:"):
+        result_cache.set("parsed_rfp", blob_hash, text)
+    return text
@@ -0,0 +1,143 @@
+# backend/pdf_engines.py
+
+"""
+Pluggable PDF text/table extraction engines.
+
+An engine takes a PDF path and returns one ``PageContent`` per page. Available engines:
+
+- ``pymupdf``: PyMuPDF text and ``find_tables``; pages where the table finder looks
+  unreliable (sparse or single-column tables, or ruled lines but no table found) get
+  their tables from pdfplumber instead.
+- ``pdfplumber``: pdfplumber for everything (slower, the historical behaviour).
+
+``PDF_ENGINE`` selects one (``auto`` = pymupdf when installed). New engines can be added
+with ``register_engine``.
+"""
+
+import importlib.util
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+
+from backend.lazy import lazy_import
+
+pdfplumber = lazy_import("pdfplumber")
+fitz = lazy_import("fitz")  # PyMuPDF
+
+PDF_ENGINE = os.getenv("PDF_ENGINE", "auto")
+TABLE_MIN_FILL = float(os.getenv("PDF_TABLE_MIN_FILL", 0.5))  # share of non-empty cells in a trusted table
+RULED_LINES_FOR_TABLE = 6  # this many straight lines on a page without a detected table suggests a missed one
+
+
+@dataclass
+class PageContent:
+    number: int  # 1-based
+    text: str = ""
+    tables: list = field(default_factory=list)  # each table is a list of rows of cell strings
+    images: list = field(default_factory=list)  # (x0, top) of each embedded image
+    engine: str = ""
+
+
+def _clean_table(rows: list) -> list:
+    cleaned = [[" ".join((cell or "").split()) for cell in row] for row in rows or []]
+    return [row for row in cleaned if any(row)]
+
+
+def extract_pdfplumber(pdf_path: str, page_numbers=None) -> list:
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for i, page in enumerate(pdf.pages):
+            if page_numbers is not None and i + 1 not in page_numbers:
+                continue
+            pages.append(PageContent(
+                number=i + 1,
+                text=page.extract_text() or "",
+                tables=[t for t in (_clean_table(tbl) for tbl in page.extract_tables()) if t],
+                images=[(img["x0"], img["top"]) for img in page.images],
+                engine="pdfplumber",
+            ))
+    return pages
+
+
+def _tidy(text: str) -> str:
+    # sort=True keeps layout spacing; collapse it so text matches pdfplumber's line-per-row output
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _table_is_reliable(rows: list) -> bool:
+    cells = [cell for row in rows for cell in row]
+    if len(rows) < 2 or max((len(row) for row in rows), default=0) < 2 or not cells:
+        return False
+    return sum(bool(cell) for cell in cells) / len(cells) >= TABLE_MIN_FILL
+
+
+def _ruled_lines(page) -> int:
+    lines = 0
+    for drawing in page.get_drawings():
+        for item in drawing["items"]:
+            if item[0] == "l" and (abs(item[1].x - item[2].x) < 1 or abs(item[1].y - item[2].y) < 1):
+                lines += 1
+            elif item[0] == "re":
+                lines += 4
+    return lines
+
+
+def extract_pymupdf(pdf_path: str) -> list:
+    pages, fallback = [], []
+    with fitz.open(pdf_path) as doc:
+        for i, page in enumerate(doc):
+            content = PageContent(number=i + 1, text=_tidy(page.get_text("text", sort=True)), engine="pymupdf")
+            content.images = [(round(info["bbox"][0], 2), round(info["bbox"][1], 2)) for info in page.get_image_info()]
+            try:
+                lines = _ruled_lines(page)
+                if not lines:
+                    # Both table finders work from ruling lines by default: no lines, no tables
+                    tables, reliable = [], True
+                else:
+                    tables = [t for t in (_clean_table(t.extract()) for t in page.find_tables().tables) if t]
+                    reliable = all(_table_is_reliable(t) for t in tables) and bool(
+                        tables or lines < RULED_LINES_FOR_TABLE
+                    )
+            except Exception as e:
+                logging.warning(f"⚠️ PyMuPDF table detection failed on page {i + 1} of {pdf_path}: {e}")
+                tables, reliable = [], False
+            if reliable:
+                content.tables = tables
+            else:
+                fallback.append(content)
+            pages.append(content)
+
+    if fallback:
+        # Low-confidence pages only: re-extract their tables with pdfplumber
+        by_number = {p.number: p for p in extract_pdfplumber(pdf_path, {p.number for p in fallback})}
+        for content in fallback:
+            content.tables = by_number[content.number].tables
+            content.engine = "pymupdf+pdfplumber"
+        logging.info(f"ℹ️ pdfplumber table fallback for {len(fallback)}/{len(pages)} pages of {pdf_path}")
+    return pages
+
+
+ENGINES = {
+    "pymupdf": extract_pymupdf,
+    "pdfplumber": extract_pdfplumber,
+}
+
+
+def register_engine(name: str, extract):
+    """Adds an engine: ``extract(pdf_path) -> list[PageContent]``."""
+    ENGINES[name] = extract
+
+
+def resolve_engine(name: str = None) -> str:
+    name = name or PDF_ENGINE
+    if name == "auto":
+        return "pymupdf" if importlib.util.find_spec("fitz") else "pdfplumber"
+    if name not in ENGINES:
+        raise ValueError(f"Unknown PDF engine {name!r}; choose from {sorted(ENGINES)} or 'auto'")
+    return name
+
+
+def extract_pages(pdf_path: str, engine: str = None) -> list:
+    return ENGINES[resolve_engine(engine)](pdf_path)
@@ -1,13 +1,25 @@
 # backend/pinecone_utils.py
 
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone
-from backend.embeddings_setup import embeddings
+from backend.embeddings_setup import embeddings, embed_query
+from backend.lazy import LazyResource, lazy_import
+from backend import reranker
+from backend.cancellation import check_cancelled
+from backend import chunk_store
+from backend.ingest import DOCS_PATH, SUPPORTED_EXTENSIONS, load_doc_chunks, read_pages
+from backend.rfp_heuristics import normalize_industry
 from dotenv import load_dotenv
 load_dotenv()  
+import contextlib
 import os
 import logging
+import threading
 
+try:
+    import fcntl
+except ImportError:  # Windows: single-process locking only
+    fcntl = None
+
+np = lazy_import("numpy")
 # ✅ Configure logging
 logging.basicConfig(level=logging.INFO)
 
@@ -15,29 +27,257 @@ logging.basicConfig(level=logging.INFO)
 pinecone_api_key = os.getenv("PINECONE_API_KEY")
 pinecone_host = os.getenv("PINECONE_HOST")
 index_name = "my-proposals-index"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")  # "pinecone", "memory" or "local"
+VECTOR_FILE = os.getenv("VECTOR_FILE", "data/vectors.int8.vec")
+VECTOR_FILE_DTYPE = os.getenv("VECTOR_FILE_DTYPE", "int8")  # int8 | float16, used when the file is (re)built
+# Also store float32 vectors so VECTOR_RESCORE quantised candidates are re-ranked at full precision
+# (5x the size of an int8-only file); without them rescoring is skipped
+VECTOR_FILE_FULL_PRECISION = os.getenv("VECTOR_FILE_FULL_PRECISION") == "1"
+VECTOR_RESCORE = int(os.getenv("VECTOR_RESCORE", 50))
+RETRIEVAL_INDUSTRY_FILTER = os.getenv("RETRIEVAL_INDUSTRY_FILTER", "1") == "1"
+
+
+def _load_docs_texts(docs_path: str = DOCS_PATH) -> list:
+    """Full extracted text of each reference document (the ingestion source, before chunking)."""
+    texts = []
+    for file_name in sorted(os.listdir(docs_path)):
+        if file_name.lower().endswith(SUPPORTED_EXTENSIONS):
+            text = "\n".join(read_pages(os.path.join(docs_path, file_name)))
+            if text.strip():
+                texts.append(text)
+    return texts
+
+
+def _corpus_chunks() -> list:
+    # docs/ plus chunks upserted incrementally since (accepted proposals, see proposal_archive.py)
+    from backend.proposal_archive import SOURCE_PREFIX
+
+    chunks = load_doc_chunks()
+    chunk_store.put_chunks(chunks)
+    return chunks + chunk_store.get_source_chunks(SOURCE_PREFIX)
+
+
+def _build_memory_store():
+    # Offline mode (benchmarks, local dev): in-process store seeded with the chunks of docs/
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    chunks = _corpus_chunks()
+    store = InMemoryVectorStore(embedding=embeddings.get())
+    store.add_texts([c["text"] for c in chunks], metadatas=[c["metadata"] for c in chunks],
+                    ids=[c["id"] for c in chunks])
+    return store
+
+
+class _Facets:
+    """Chunk metadata as one integer code array per field, aligned with the vector file rows."""
+
+    def __init__(self, ids: list, metadata: dict):
+        self._ids, self._metadata = ids, metadata
+        self._fields = {}
+        self.field("industry")  # the retrieval filter; other fields are coded on first use
+
+    def field(self, name: str) -> tuple:
+        """``(codes, value -> code)`` for one metadata field; a missing field is the value None."""
+        if name not in self._fields:
+            values = {}
+            codes = np.fromiter((values.setdefault(self._metadata.get(i, {}).get(name), len(values)) for i in self._ids),
+                                dtype=np.int32, count=len(self._ids))
+            self._fields[name] = (codes, values)
+        return self._fields[name]
+
+    def mask(self, filters: dict):
+        """Bool per row: the same semantics as ``_matches``, evaluated with NumPy."""
+        mask = np.ones(len(self._ids), dtype=bool)
+        for name, wanted in filters.items():
+            codes, values = self.field(name)
+            wanted = wanted if isinstance(wanted, (list, tuple)) else [wanted]
+            mask &= np.isin(codes, [values[v] for v in wanted if v in values])
+        return mask
+
+
+def _build_local_store():
+    # Quantised memory-mapped corpus vectors (see backend/vector_file.py), built from docs/ when missing
+    from backend import vector_file
+
+    if not os.path.exists(VECTOR_FILE):
+        chunks = _corpus_chunks()
+        vectors = embeddings.embed_documents([c["text"] for c in chunks]) if chunks else np.empty((0, 0))
+        vector_file.write(VECTOR_FILE, [c["id"] for c in chunks], vectors, dtype=VECTOR_FILE_DTYPE,
+                          full_precision=VECTOR_FILE_FULL_PRECISION)
+        logging.info(f"✅ Wrote {len(chunks)} {VECTOR_FILE_DTYPE} vectors to {VECTOR_FILE}")
+    vectors = vector_file.VectorFile(VECTOR_FILE)
+    metadata = chunk_store.get_metadata(vectors.ids)
+    return vectors, metadata, _Facets(vectors.ids, metadata)
+
+
+def _build_pinecone_client():
+    from pinecone import Pinecone
+    return Pinecone(api_key=pinecone_api_key)
+
+
+def _build_vector_store():
+    if VECTOR_BACKEND == "memory":
+        return _build_memory_store()
+    if VECTOR_BACKEND == "local":
+        return _build_local_store()  # (VectorFile, chunk id -> metadata, _Facets)
+    return index.get()  # queried directly so responses carry ids, scores and compact metadata only
+
+
+# Connections are opened on first use, not at import time
+pc = LazyResource("pinecone_client", _build_pinecone_client)
+index = LazyResource("pinecone_index", lambda: pc.Index(name=index_name))
+vector_store = LazyResource("vector_store", _build_vector_store)
+_upsert_lock = threading.Lock()
 
 
-# Create Pinecone client
-pc = Pinecone(api_key=pinecone_api_key)
+@contextlib.contextmanager
+def _vector_file_lock():
+    """Serialises rewrites of the local vector file across threads and worker processes."""
+    with _upsert_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(VECTOR_FILE) or ".", exist_ok=True)
+        with open(f"{VECTOR_FILE}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def upsert_chunks(chunks: list, vectors: list, batch_size: int = 100):
+    """
+    Adds (or replaces, by id) embedded chunks in the retrieval index without a full re-ingest.
+    Pinecone: batched upserts. Memory: this process's store. Local: the vector file is
+    rewritten from its stored vectors plus the new ones (no re-embedding); every process
+    picks up the new file on its next query.
+    """
+    if not chunks:
+        return
+    if VECTOR_BACKEND == "memory":
+        vector_store.get().add_texts([c["text"] for c in chunks], metadatas=[c["metadata"] for c in chunks],
+                                     ids=[c["id"] for c in chunks])
+    elif VECTOR_BACKEND == "local":
+        from backend import vector_file
+
+        with _vector_file_lock():  # read-modify-write of the whole file
+            new_ids = {c["id"] for c in chunks}
+            ids, existing = [], np.empty((0, len(vectors[0])), dtype=np.float32)
+            if os.path.exists(VECTOR_FILE):
+                current = vector_file.VectorFile(VECTOR_FILE)
+                ids = [i for i in current.ids if i not in new_ids]
+                existing = current.get(ids) if ids else existing
+                del current
+            vector_file.write(VECTOR_FILE, ids + [c["id"] for c in chunks],
+                              np.vstack([existing, np.asarray(vectors, dtype=np.float32)]), dtype=VECTOR_FILE_DTYPE,
+                              full_precision=VECTOR_FILE_FULL_PRECISION)
+            vector_store.reset()
+    else:
+        for i in range(0, len(chunks), batch_size):
+            index.upsert(vectors=[
+                {"id": c["id"], "values": v, "metadata": c["metadata"]}
+                for c, v in zip(chunks[i:i + batch_size], vectors[i:i + batch_size])
+            ])
+    logging.info(f"✅ Upserted {len(chunks)} chunks into the {VECTOR_BACKEND} index")
+
+
+def industry_filter(industry: str):
+    """Metadata filter for an RFP's industry: same-industry and industry-neutral chunks only."""
+    industry = normalize_industry(industry)
+    if not RETRIEVAL_INDUSTRY_FILTER or industry == "generic":
+        return None
+    return {"industry": [industry, "generic"]}
+
+
+def _pinecone_filter(filters: dict) -> dict:
+    return {k: {"$in": v} if isinstance(v, (list, tuple)) else {"$eq": v} for k, v in filters.items()}
+
+
+def _matches(metadata: dict, filters: dict) -> bool:
+    return all(
+        metadata.get(k) in v if isinstance(v, (list, tuple)) else metadata.get(k) == v for k, v in filters.items()
+    )
+
+
+def _hit(chunk_id: str, score: float, metadata: dict) -> dict:
+    return {"id": chunk_id, "score": round(float(score), 4),
+            **{k: v for k, v in metadata.items() if k != "text"}}
+
+
+def _query(vector, k: int, filters: dict = None) -> tuple:
+    """``(hits, inline_texts)``; inline texts only exist for vectors ingested before the chunk store."""
+    store = vector_store.get()
+    if VECTOR_BACKEND == "memory":
+        predicate = (lambda doc: _matches(doc.metadata, filters)) if filters else None
+        results = store.similarity_search_with_score_by_vector(vector, k=k, filter=predicate)
+        return [_hit(doc.id, score, doc.metadata) for doc, score in results], {}
+    if VECTOR_BACKEND == "local":
+        vectors, metadata, facets = store
+        if os.stat(VECTOR_FILE).st_mtime_ns != vectors.mtime:  # rewritten by an incremental upsert
+            vector_store.reset()
+            vectors, metadata, facets = vector_store.get()
+        mask = facets.mask(filters) if filters else None
+        results = vectors.search(vector, k, mask=mask, rescore=VECTOR_RESCORE)
+        return [_hit(chunk_id, score, metadata.get(chunk_id, {})) for chunk_id, score in results], {}
+
+    response = store.query(vector=vector, top_k=k, include_metadata=True,
+                           filter=_pinecone_filter(filters) if filters else None)
+    hits, inline = [], {}
+    for match in response.matches:
+        metadata = match.metadata or {}
+        hits.append(_hit(match.id, match.score, metadata))
+        if "text" in metadata:
+            inline[match.id] = metadata["text"]
+    return hits, inline
+
+
+def search_chunks(query: str, top_k: int = 10, filters: dict = None) -> list:
+    """
+    Lightweight similarity search: chunk ids, scores and provenance (source, pages, section,
+    offsets), filtered server-side by metadata (e.g. ``{"industry": ["retail", "generic"]}``).
+    """
+    vector = embed_query(query)
+    check_cancelled()
+    hits, _ = _query(vector, top_k, filters)
+    return hits
+
+
+def retrieve_with_sources(query: str, top_k: int = 3, filters: dict = None) -> tuple:
+    """
+    ``(texts, sources)``: the reranked context passages for a prompt and the provenance of the
+    chunks they came from. Only the text of the retrieved candidates is loaded from the chunk store.
+    """
+    vector = embed_query(query)
+    print(f"🔍 Generated embedding vector shape: {len(vector)}")  # Should be 1536
+    # With reranking enabled, fetch a wider candidate set and keep only the best passages
+    k = max(top_k, reranker.RERANK_CANDIDATES) if reranker.RERANKER else top_k
+    check_cancelled()
+    hits, inline = _query(vector, k, filters)
+
+    texts = {**inline, **chunk_store.get_texts([h["id"] for h in hits if h["id"] not in inline])}
+    missing = [h["id"] for h in hits if h["id"] not in texts]
+    if missing:
+        logging.warning(f"⚠️ {len(missing)} retrieved chunks are not in the local chunk store; re-run ingestion.")
+    hits = [h for h in hits if h["id"] in texts]
+    if not hits:
+        return [], []
+
+    documents = [texts[h["id"]] for h in hits]
+    if reranker.RERANKER:
+        check_cancelled()
+        selected = reranker.rerank(query, documents, top_n=top_k, with_sources=True)
+    else:
+        selected = list(enumerate(documents))
+    return [text for _, text in selected], [hits[i] for i, _ in selected]
 
-# Get the index from the client
-index = pc.Index(name=index_name)
 
 # ✅ Function to retrieve similar documents
-def retrieve_similar_docs(query: str, top_k: int = 3):
+def retrieve_similar_docs(query: str, top_k: int = 3, filters: dict = None):
     """ Retrieves relevant RFP documents from Pinecone using similarity search. """
     try:
-        # ✅ Print embedding shape before querying Pinecone
-        vector = embeddings.embed_query(query)
-        print(f"🔍 Generated embedding vector shape: {len(vector)}")  # Should be 1536
-        # Initialize PineconeVectorStore
-        vector_store = PineconeVectorStore(index_name=index_name, embedding=embeddings)
-
-        # Perform similarity search
-        docs = vector_store.similarity_search(query, k=top_k)
-
-        if docs:
-            retrieved_texts = [doc.page_content for doc in docs]
+        retrieved_texts, _ = retrieve_with_sources(query, top_k, filters)
+        if retrieved_texts:
             logging.info(f"✅ Retrieved Documents:\n{retrieved_texts}")
             return retrieved_texts
         else:
@@ -46,6 +286,3 @@ def retrieve_similar_docs(query: str, top_k: int = 3):
     except Exception as e:
         logging.error(f"❌ Error retrieving documents: {str(e)}")
         return [f"Error retrieving documents: {str(e)}"]
-    
-    
-    
\ No newline at end of file
@@ -0,0 +1,58 @@
+# backend/prompts.py
+
+"""
+Prompt layout shared by every LLM task in ``llm_utils``.
+
+Providers cache the longest previously seen prompt *prefix* (OpenAI: from 1024 tokens, in
+128-token steps), so a prompt is assembled from its most to least stable parts:
+
+    1. SYSTEM_PREAMBLE   static, identical for every task
+    2. shared context    the RFP (or, for proposal-only tasks, the proposal), rendered
+                         identically by ``context_block`` whichever stage sends it
+    3. task instructions static per task
+    4. variable inputs   retrieved passages, feedback, tone, hints, ...
+
+Metadata extraction, generation and compliance review of one RFP therefore share the
+preamble + RFP prefix, and repeated calls of one task (compliance retries, tone candidates)
+share everything up to their variable inputs.
+"""
+
+from backend.lazy import lazy_import
+
+messages_module = lazy_import("langchain_core.messages")  # imported on the first prompt, not with llm_utils
+
+SYSTEM_PREAMBLE = """You are part of a consulting firm's proposal team. You work on business proposals written in \
+response to clients' Requests for Proposal (RFPs): reading RFPs, drafting and refining proposals, and reviewing \
+them for quality and compliance.
+
+General rules:
+- Base every statement on the material provided in this conversation; never invent client facts, figures or \
+requirements.
+- Write in clear, professional English.
+- Follow the task instructions and output format exactly."""
+
+
+def context_block(label: str, text: str) -> str:
+    """A large shared input (RFP, proposal) in the single format every task uses."""
+    return f"=== {label} ===\n{(text or '').strip()}\n=== End of {label} ==="
+
+
+def build(instructions: str, *inputs, shared: tuple = None) -> list:
+    """
+    Chat messages for one call: preamble, optional ``shared`` ``(label, text)`` context,
+    the task's static ``instructions``, then the variable ``inputs`` (strings, empty ones skipped).
+    """
+    messages = [messages_module.SystemMessage(content=SYSTEM_PREAMBLE)]
+    if shared is not None:
+        messages.append(messages_module.HumanMessage(content=context_block(*shared)))
+    task = "\n\n".join([instructions.strip(), *(i.strip() for i in inputs if i and i.strip())])
+    messages.append(messages_module.HumanMessage(content=task))
+    return messages
+
+
+def rfp_prompt(rfp_text: str, instructions: str, *inputs) -> list:
+    return build(instructions, *inputs, shared=("Client RFP", rfp_text))
+
+
+def proposal_prompt(proposal: str, instructions: str, *inputs) -> list:
+    return build(instructions, *inputs, shared=("Proposal", proposal))
@@ -0,0 +1,255 @@
+# backend/proposal_archive.py
+
+"""
+Archive of final proposals (SQLite + FTS5 full-text index).
+
+Every generated, reused, refined or manually stored proposal is kept once per version
+(``proposal_version`` of its text) with the hash of its RFP, the extracted RFP metadata,
+rubric scores and the compliance matrix. ``search`` combines BM25-ranked full-text
+matches with filters on industry, client, status, score and RFP.
+
+Accepted proposals feed back into the reference corpus: ``accept`` queues the proposal on
+a background indexer that chunks it like a reference document (source
+``archive/<proposal_id>``), embeds the chunks and upserts them into the retrieval index
+and chunk store — no re-ingest of ``docs/``. ``ARCHIVE_AUTO_ACCEPT_SCORE`` accepts
+proposals automatically from that weighted score upwards.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from backend.export_utils import proposal_version
+
+ARCHIVE_DB = Path(os.getenv("PROPOSAL_ARCHIVE_DB", "data/proposal_archive.db"))
+# Weighted rubric score (0-10) from which archived proposals are accepted automatically; empty = manual only
+ARCHIVE_AUTO_ACCEPT_SCORE = os.getenv("ARCHIVE_AUTO_ACCEPT_SCORE", "")
+SOURCE_PREFIX = "archive/"
+SNIPPET_TOKENS = 24
+
+_local = threading.local()
+# One indexer thread: upserts are serialised, and requests never wait for embedding calls
+_indexer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive-index")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        ARCHIVE_DB.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(ARCHIVE_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS proposals ("
+            " id INTEGER PRIMARY KEY, proposal_id TEXT UNIQUE NOT NULL, rfp_hash TEXT, rfp_blob TEXT, run_id TEXT,"
+            " origin TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'draft', project TEXT, client TEXT, industry TEXT,"
+            " score REAL, passed INTEGER, metadata TEXT, scores TEXT, compliance TEXT, text TEXT NOT NULL,"
+            " created REAL NOT NULL, updated REAL NOT NULL, indexed REAL, chunks INTEGER);"
+            "CREATE INDEX IF NOT EXISTS proposals_rfp ON proposals (rfp_hash);"
+            "CREATE INDEX IF NOT EXISTS proposals_created ON proposals (created);"
+            # External-content FTS5 index over the proposals table, kept in sync by triggers
+            "CREATE VIRTUAL TABLE IF NOT EXISTS proposals_fts USING fts5("
+            " text, project, client, content='proposals', content_rowid='id', tokenize='porter unicode61');"
+            "CREATE TRIGGER IF NOT EXISTS proposals_ai AFTER INSERT ON proposals BEGIN"
+            " INSERT INTO proposals_fts (rowid, text, project, client) VALUES (new.id, new.text, new.project, new.client);"
+            " END;"
+            "CREATE TRIGGER IF NOT EXISTS proposals_ad AFTER DELETE ON proposals BEGIN"
+            " INSERT INTO proposals_fts (proposals_fts, rowid, text, project, client)"
+            " VALUES ('delete', old.id, old.text, old.project, old.client);"
+            " END;"
+            "CREATE TRIGGER IF NOT EXISTS proposals_au AFTER UPDATE OF text, project, client ON proposals BEGIN"
+            " INSERT INTO proposals_fts (proposals_fts, rowid, text, project, client)"
+            " VALUES ('delete', old.id, old.text, old.project, old.client);"
+            " INSERT INTO proposals_fts (rowid, text, project, client) VALUES (new.id, new.text, new.project, new.client);"
+            " END;"
+        )
+        _local.conn = conn
+    return conn
+
+
+def _rfp_hash(rfp_text: str):
+    from backend.rfp_index import rfp_id_for
+    return rfp_id_for(rfp_text) if rfp_text and rfp_text.strip() else None
+
+
+def archive(proposal: str, origin: str, rfp_text: str = None, run_id: str = None, result: dict = None,
+            rfp_blob: str = None) -> str:
+    """
+    Stores a final proposal (``origin``: generate, reuse, refine, manual) and returns its id.
+    Re-archiving the same text keeps one entry and fills in newly known RFP/result details.
+    """
+    result = result or {}
+    metadata = result.get("metadata") or {}
+    scores = result.get("scores")
+    matrix = result.get("compliance_matrix")
+    proposal_id, now = proposal_version(proposal), time.time()
+    score = scores.get("weighted") if isinstance(scores, dict) else None
+
+    conn = _connect()
+    with conn:
+        conn.execute(
+            "INSERT INTO proposals (proposal_id, rfp_hash, rfp_blob, run_id, origin, project, client, industry, score,"
+            " passed, metadata, scores, compliance, text, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (proposal_id) DO UPDATE SET"
+            " rfp_hash = COALESCE(excluded.rfp_hash, rfp_hash), rfp_blob = COALESCE(excluded.rfp_blob, rfp_blob),"
+            " run_id = COALESCE(excluded.run_id, run_id), project = COALESCE(excluded.project, project),"
+            " client = COALESCE(excluded.client, client), industry = COALESCE(excluded.industry, industry),"
+            " score = COALESCE(excluded.score, score), passed = COALESCE(excluded.passed, passed),"
+            " metadata = COALESCE(excluded.metadata, metadata), scores = COALESCE(excluded.scores, scores),"
+            " compliance = COALESCE(excluded.compliance, compliance), updated = excluded.updated",
+            (
+                proposal_id, _rfp_hash(rfp_text), rfp_blob or result.get("rfp_blob"), run_id, origin,
+                metadata.get("project_name") or None, metadata.get("client_name") or None,
+                metadata.get("industry") or None, score,
+                None if matrix is None else int(bool(matrix.get("passed"))),
+                json.dumps(metadata) if metadata else None, json.dumps(scores) if scores else None,
+                json.dumps(matrix) if matrix else None, proposal, now, now,
+            ),
+        )
+    logging.info(f"🗄️ Archived proposal {proposal_id} ({origin})")
+    if ARCHIVE_AUTO_ACCEPT_SCORE and score is not None and score >= float(ARCHIVE_AUTO_ACCEPT_SCORE):
+        accept(proposal_id)
+    return proposal_id
+
+
+def _row(row: sqlite3.Row, full: bool = False) -> dict:
+    record = {k: row[k] for k in ("proposal_id", "rfp_hash", "rfp_blob", "run_id", "origin", "status", "project",
+                                  "client", "industry", "score", "created", "updated", "indexed", "chunks")}
+    record["passed"] = None if row["passed"] is None else bool(row["passed"])
+    if full:
+        record.update(text=row["text"], metadata=json.loads(row["metadata"] or "null"),
+                      scores=json.loads(row["scores"] or "null"), compliance_matrix=json.loads(row["compliance"] or "null"))
+    return record
+
+
+def get(proposal_id: str):
+    """Full archive entry (text, metadata, scores, compliance matrix) or None."""
+    row = _connect().execute("SELECT * FROM proposals WHERE proposal_id = ?", (proposal_id,)).fetchone()
+    return _row(row, full=True) if row else None
+
+
+def _fts_query(query: str) -> str:
+    # Plain words are AND-ed as quoted terms so user input never hits FTS5 query syntax errors
+    terms = [t.replace('"', '""') for t in query.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+def search(query: str = None, industry: str = None, client: str = None, status: str = None,
+           min_score: float = None, rfp_hash: str = None, since: float = None,
+           limit: int = 20, offset: int = 0) -> dict:
+    """
+    Archived proposals matching all given filters, best BM25 match first when ``query`` is
+    set (else newest first), each with a highlighted ``snippet``; plus the ``total`` count.
+    """
+    where, params = [], []
+    for column, value in (("p.industry", industry), ("p.status", status), ("p.rfp_hash", rfp_hash)):
+        if value:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if client:
+        where.append("p.client LIKE ?")
+        params.append(f"%{client}%")
+    if min_score is not None:
+        where.append("p.score >= ?")
+        params.append(min_score)
+    if since is not None:
+        where.append("p.created >= ?")
+        params.append(since)
+
+    match = _fts_query(query) if query else ""
+    if match:
+        source = "proposals_fts JOIN proposals p ON p.id = proposals_fts.rowid"
+        where.insert(0, "proposals_fts MATCH ?")
+        params.insert(0, match)
+        snippet = f"snippet(proposals_fts, 0, '[', ']', ' … ', {SNIPPET_TOKENS})"
+        order = "bm25(proposals_fts)"
+    else:
+        source = "proposals p"
+        snippet = f"substr(p.text, 1, {SNIPPET_TOKENS * 8})"
+        order = "p.created DESC"
+    clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+    conn = _connect()
+    total = conn.execute(f"SELECT COUNT(*) FROM {source}{clause}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT p.*, {snippet} AS snippet FROM {source}{clause} ORDER BY {order} LIMIT ? OFFSET ?",
+        [*params, limit, offset],
+    ).fetchall()
+    return {"total": total, "results": [{**_row(row), "snippet": row["snippet"]} for row in rows]}
+
+
+def accept(proposal_id: str) -> bool:
+    """Marks a proposal accepted and queues it for indexing into the reference corpus."""
+    conn = _connect()
+    with conn:
+        row = conn.execute(
+            "UPDATE proposals SET status = 'accepted', updated = ? WHERE proposal_id = ? RETURNING indexed",
+            (time.time(), proposal_id),
+        ).fetchone()
+    if row is not None and row[0] is None:
+        _indexer.submit(_index_safely, proposal_id)
+    return row is not None
+
+
+def index_pending() -> int:
+    """Queues accepted proposals that are not (yet) in the retrieval index, e.g. after a restart."""
+    rows = _connect().execute("SELECT proposal_id FROM proposals WHERE status = 'accepted' AND indexed IS NULL").fetchall()
+    for row in rows:
+        _indexer.submit(_index_safely, row[0])
+    return len(rows)
+
+
+def _index_safely(proposal_id: str):
+    try:
+        index_proposal(proposal_id)
+    except Exception as e:
+        logging.error(f"❌ Indexing archived proposal {proposal_id} failed: {e}")
+
+
+def index_proposal(proposal_id: str) -> int:
+    """Chunks, embeds and upserts one archived proposal into the retrieval index; returns the chunk count."""
+    from backend import chunk_store, pinecone_utils
+    from backend.embeddings_setup import embeddings
+    from backend.ingest import chunk_document
+
+    conn = _connect()
+    row = conn.execute("SELECT text, industry FROM proposals WHERE proposal_id = ?", (proposal_id,)).fetchone()
+    if row is None:
+        return 0
+    start = time.perf_counter()
+    source = f"{SOURCE_PREFIX}{proposal_id}"
+    chunks = chunk_document(source, [row[0]])
+    for chunk in chunks:
+        if row[1]:
+            chunk["metadata"]["industry"] = row[1]  # from RFP metadata: more reliable than detecting it in the proposal
+    vectors = embeddings.embed_documents([c["text"] for c in chunks]) if chunks else []
+
+    chunk_store.delete_source(source)
+    chunk_store.put_chunks(chunks)
+    # No archive DB lock across the upsert (a network call on Pinecone); upsert_chunks serialises
+    # the local vector-file rewrite itself
+    pinecone_utils.upsert_chunks(chunks, vectors)
+    with conn:
+        conn.execute("UPDATE proposals SET indexed = ?, chunks = ? WHERE proposal_id = ?",
+                     (time.time(), len(chunks), proposal_id))
+    logging.info(f"✅ Indexed archived proposal {proposal_id}: {len(chunks)} chunks in {time.perf_counter() - start:.2f}s")
+    return len(chunks)
+
+
+def stats() -> dict:
+    rows = _connect().execute(
+        "SELECT status, COUNT(*), COUNT(indexed), COALESCE(SUM(chunks), 0) FROM proposals GROUP BY status"
+    ).fetchall()
+    return {
+        "proposals": sum(r[1] for r in rows),
+        "by_status": {r[0]: r[1] for r in rows},
+        "indexed": sum(r[2] for r in rows),
+        "indexed_chunks": sum(r[3] for r in rows),
+        "pending": sum(r[1] - r[2] for r in rows if r[0] == "accepted"),
+        "auto_accept_score": float(ARCHIVE_AUTO_ACCEPT_SCORE) if ARCHIVE_AUTO_ACCEPT_SCORE else None,
+    }
@@ -0,0 +1,174 @@
+# backend/request_control.py
+
+"""
+Deadlines, disconnect cancellation and admission control for API requests.
+
+Async handlers hand their blocking work (pipeline, retrieval, LLM calls) to
+``run_blocking``, which runs it on a dedicated thread pool (not Starlette's shared
+threadpool, so cheap endpoints stay responsive) inside a ``CancelScope``:
+
+- each endpoint has a deadline (``REQUEST_DEADLINES``); clients may ask for a shorter
+  one with an ``X-Request-Timeout`` header (seconds). Past it the client gets a 504.
+- the client connection is polled; on disconnect the scope is cancelled so the worker
+  stops before its next LLM/retrieval call.
+- at most ``MAX_INFLIGHT_REQUESTS`` blocking requests run per worker process; beyond
+  that requests are rejected immediately with 429 and a ``Retry-After`` estimate.
+
+    MAX_INFLIGHT_REQUESTS=128
+    REQUEST_DEADLINES='{"generate_proposal": 600, "retrieve_docs": 15}'
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, Request
+
+from backend.cancellation import CancelScope, RequestCancelled, cancel_scope
+from backend.tracing import REQUEST_DURATION, REQUESTS_CANCELLED, REQUESTS_REJECTED
+
+# Request work mostly waits on the LLM/vector store, so threads are cheap; this is well above the
+# 40 threads Starlette gives sync handlers, and beyond it excess load is shed instead of queued.
+MAX_INFLIGHT_REQUESTS = int(os.getenv("MAX_INFLIGHT_REQUESTS", 128))
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", 0.5))
+
+# seconds; "default" covers endpoints without their own entry
+DEFAULT_DEADLINES = {
+    "default": 120,
+    "generate_proposal": 900,
+    "resume_run": 900,
+    "rerun_from_stage": 900,
+    "reuse_proposal": 300,
+    "refine_proposal": 300,
+    "compliance": 300,
+    "score": 180,
+    "retrieve_docs": 30,
+    "upload_rfp": 300,
+}
+
+
+def _load_deadlines() -> dict:
+    deadlines = dict(DEFAULT_DEADLINES)
+    overrides = os.getenv("REQUEST_DEADLINES")
+    if overrides:
+        try:
+            deadlines.update({k: float(v) for k, v in json.loads(overrides).items()})
+        except (ValueError, TypeError, AttributeError) as e:
+            logging.error(f"❌ Ignoring invalid REQUEST_DEADLINES: {e}")
+    return deadlines
+
+
+DEADLINES = _load_deadlines()
+
+_executor = ThreadPoolExecutor(max_workers=MAX_INFLIGHT_REQUESTS, thread_name_prefix="request")
+_inflight = 0
+_avg_duration = None  # EWMA of admitted request durations, for Retry-After
+_lock = threading.Lock()
+_CANCELLED = object()
+
+
+def _admit() -> bool:
+    global _inflight
+    with _lock:
+        if _inflight >= MAX_INFLIGHT_REQUESTS:
+            return False
+        _inflight += 1
+        return True
+
+
+def _release(duration: float):
+    global _inflight, _avg_duration
+    with _lock:
+        _inflight -= 1
+        _avg_duration = duration if _avg_duration is None else 0.8 * _avg_duration + 0.2 * duration
+
+
+def retry_after() -> int:
+    """Seconds until a slot is likely to free up: with every slot busy, one finishes every avg/capacity seconds."""
+    if _avg_duration is None:
+        return 1
+    return min(60, max(1, math.ceil(_avg_duration / MAX_INFLIGHT_REQUESTS)))
+
+
+def load_status() -> dict:
+    return {"inflight": _inflight, "capacity": MAX_INFLIGHT_REQUESTS, "retry_after": retry_after()}
+
+
+def request_deadline(request: Request, endpoint: str) -> float:
+    deadline = DEADLINES.get(endpoint, DEADLINES["default"])
+    requested = request.headers.get("x-request-timeout")
+    if requested:
+        try:
+            deadline = min(deadline, max(0.1, float(requested)))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="X-Request-Timeout must be a number of seconds.")
+    return deadline
+
+
+async def _watch_disconnect(request: Request, scope: CancelScope):
+    while not scope.cancelled:
+        if await request.is_disconnected():
+            scope.cancel("client disconnected")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+
+async def run_blocking(request: Request, endpoint: str, fn, *args, detail: str = "", **kwargs):
+    """
+    Runs ``fn(*args, **kwargs)`` in a worker thread under the endpoint's deadline and the
+    client's connection. Raises 429 when saturated, 504 past the deadline and 499 (never
+    seen by the departed client, but logged) on disconnect; ``detail`` is appended to those.
+    """
+    if not _admit():
+        REQUESTS_REJECTED.inc(endpoint=endpoint)
+        raise HTTPException(status_code=429, detail="Server is at capacity, retry later.",
+                            headers={"Retry-After": str(retry_after())})
+
+    try:
+        scope = CancelScope(request_deadline(request, endpoint))
+    except HTTPException:
+        _release(0.0)
+        raise
+    context = contextvars.copy_context()
+
+    def work():
+        start = time.perf_counter()
+        try:
+            with cancel_scope(scope):
+                return fn(*args, **kwargs)
+        except RequestCancelled:
+            return _CANCELLED
+        finally:
+            # The slot is held until the thread actually stops, not until the client got its answer
+            elapsed = time.perf_counter() - start
+            _release(elapsed)
+            REQUEST_DURATION.observe(elapsed, endpoint=endpoint)
+
+    future = asyncio.get_running_loop().run_in_executor(_executor, context.run, work)
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())  # abandoned futures must not warn
+    watcher = asyncio.create_task(_watch_disconnect(request, scope))
+    try:
+        done, _ = await asyncio.wait({future, watcher}, timeout=scope.remaining(),
+                                     return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        # The server cancels the handler when the connection drops before our poll notices
+        scope.cancel("client disconnected")
+        REQUESTS_CANCELLED.inc(endpoint=endpoint, reason=scope.reason)
+        raise
+    finally:
+        watcher.cancel()
+
+    result = future.result() if future in done else _CANCELLED
+    if result is _CANCELLED:
+        scope.cancel("deadline exceeded")  # no-op when already cancelled for another reason
+        REQUESTS_CANCELLED.inc(endpoint=endpoint, reason=scope.reason)
+        logging.warning(f"🛑 {endpoint}: {scope.reason}; in-flight work stops before its next LLM call")
+        status = 504 if scope.reason == "deadline exceeded" else 499
+        raise HTTPException(status_code=status, detail=f"Request {scope.reason}. {detail}".strip())
+    return result
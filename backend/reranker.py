@@ -0,0 +1,170 @@
+# backend/reranker.py
+
+"""
+Second-stage reranking of retrieved reference chunks.
+
+Retrieval returns the ``RERANK_CANDIDATES`` nearest chunks (ids from the vector index, text
+from the chunk store). Each chunk is split into passages of up to ``RERANK_PASSAGE_WORDS``
+words (ingestion chunks are ``CHUNK_WORDS`` long), the passages are scored against the RFP
+with a small local cross-encoder on CPU (batched), and only the best few are forwarded to
+the prompt instead of every candidate chunk.
+
+Scoring backends (``RERANK_BACKEND``):
+    torch   sentence-transformers CrossEncoder (default)
+    int8    the same model with dynamically quantized int8 Linear layers
+    onnx    ONNX Runtime via ``optimum`` (optional dependency)
+    lexical term overlap, no model; used with the fake backends and as the fallback
+            if the model cannot be loaded
+"""
+
+import logging
+import os
+import re
+import time
+
+from backend.lazy import LazyResource, register_warmup
+from backend.tracing import RERANK_DURATION, RERANK_TOKENS_SAVED
+
+RERANKER = os.getenv("RERANKER", "on").lower() not in ("0", "off", "false", "no")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BACKEND = os.getenv(
+    "RERANK_BACKEND", "lexical" if os.getenv("EMBEDDINGS_BACKEND") == "fake" else "torch"
+)
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 20))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", 32))
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", 256))
+RERANK_THREADS = int(os.getenv("RERANK_THREADS", 0))  # 0 = library default
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", 0.05))
+PASSAGE_WORDS = int(os.getenv("RERANK_PASSAGE_WORDS", 150))
+QUERY_WORDS = int(os.getenv("RERANK_QUERY_WORDS", 120))
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def split_passages(text: str, max_words: int = PASSAGE_WORDS) -> list:
+    """Packs paragraphs into passages of up to ``max_words`` words; oversized paragraphs are cut."""
+    passages, current, size = [], [], 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and (size + len(words) > max_words or len(words) > max_words):
+            passages.append("\n\n".join(current))
+            current, size = [], 0
+        if len(words) > max_words:
+            passages.extend(" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words))
+            continue
+        current.append(paragraph.strip())
+        size += len(words)
+    if current:
+        passages.append("\n\n".join(current))
+    return passages
+
+
+def _lexical_scorer():
+    def score(pairs):
+        scores = []
+        for query, passage in pairs:
+            query_terms = set(re.findall(r"\w{3,}", query.lower()))
+            passage_terms = set(re.findall(r"\w{3,}", passage.lower()))
+            scores.append(len(query_terms & passage_terms) / (len(query_terms) or 1))
+        return scores
+    return score
+
+
+def _cross_encoder_scorer(quantize: bool):
+    import torch
+    from sentence_transformers import CrossEncoder
+
+    if RERANK_THREADS:
+        torch.set_num_threads(RERANK_THREADS)
+    model = CrossEncoder(RERANK_MODEL, device="cpu", max_length=RERANK_MAX_LENGTH)
+    if quantize:
+        model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.model.eval()
+
+    def score(pairs):
+        with torch.inference_mode():
+            return model.predict(pairs, batch_size=RERANK_BATCH_SIZE, show_progress_bar=False).tolist()
+    return score
+
+
+def _onnx_scorer():
+    import numpy as np
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(RERANK_MODEL)
+    model = ORTModelForSequenceClassification.from_pretrained(RERANK_MODEL, export=True)
+
+    def score(pairs):
+        scores = []
+        for i in range(0, len(pairs), RERANK_BATCH_SIZE):
+            batch = pairs[i:i + RERANK_BATCH_SIZE]
+            features = tokenizer(
+                [q for q, _ in batch], [p for _, p in batch],
+                padding=True, truncation=True, max_length=RERANK_MAX_LENGTH, return_tensors="np",
+            )
+            logits = model(**features).logits[:, 0]
+            scores.extend((1 / (1 + np.exp(-logits))).tolist())  # same sigmoid scale as CrossEncoder
+        return scores
+    return score
+
+
+def _build_scorer():
+    if RERANK_BACKEND == "lexical":
+        return _lexical_scorer()
+    try:
+        if RERANK_BACKEND == "onnx":
+            return _onnx_scorer()
+        return _cross_encoder_scorer(quantize=RERANK_BACKEND == "int8")
+    except Exception as e:
+        logging.warning(f"⚠️ Could not load reranker {RERANK_MODEL} ({RERANK_BACKEND}): {e}. Using lexical scoring.")
+        return _lexical_scorer()
+
+
+scorer = LazyResource("reranker", _build_scorer)
+
+
+def rerank(query: str, documents: list, top_n: int = 3, min_score: float = RERANK_MIN_SCORE,
+           with_sources: bool = False) -> list:
+    """
+    Returns the ``top_n`` most relevant passages of ``documents`` (retrieved chunk texts), grouped
+    per chunk (best chunk first, passages in their original order). With ``with_sources``
+    each result is a ``(document index, text)`` pair.
+    """
+    candidates = [(d, p) for d, doc in enumerate(documents) for p in split_passages(doc)]
+    if not candidates:
+        return list(enumerate(documents[:top_n])) if with_sources else documents[:top_n]
+    short_query = " ".join(query.split()[:QUERY_WORDS])
+
+    start = time.perf_counter()
+    scores = scorer.get()([(short_query, passage) for _, passage in candidates])
+    RERANK_DURATION.observe(time.perf_counter() - start, backend=RERANK_BACKEND)
+
+    ranked = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+    # Always keep the best passage, even if the whole candidate set scores low
+    keep = [i for i in ranked[:top_n] if scores[i] >= min_score] or ranked[:1]
+
+    by_document = {}
+    for i in sorted(keep):
+        by_document.setdefault(candidates[i][0], []).append(i)
+    best = {d: max(scores[i] for i in idx) for d, idx in by_document.items()}
+    order = sorted(best, key=best.get, reverse=True)
+    results = ["\n\n".join(candidates[i][1] for i in by_document[d]) for d in order]
+
+    saved = sum(estimate_tokens(doc) for doc in documents[:top_n]) - sum(estimate_tokens(r) for r in results)
+    if saved > 0:
+        RERANK_TOKENS_SAVED.inc(saved)
+    logging.info(
+        f"✂️ Reranked {len(candidates)} passages from {len(documents)} documents in "
+        f"{(time.perf_counter() - start) * 1000:.0f} ms; kept {len(keep)} (best score {scores[ranked[0]]:.3f})"
+    )
+    return list(zip(order, results)) if with_sources else results
+
+
+if RERANKER:
+    # Load the model during the app's background warm-up rather than on the first proposal
+    register_warmup("reranker", scorer.get)
@@ -0,0 +1,94 @@
+# backend/result_cache.py
+
+"""
+Small persistent key/value cache (SQLite) for expensive, deterministic results,
+e.g. RFP metadata keyed by the RFP text hash. Values are stored as JSON and
+grouped by namespace so each feature can be cleared independently.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CACHE_DB = Path(os.getenv("RESULT_CACHE_DB", "data/result_cache.db"))
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        CACHE_DB.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(CACHE_DB, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        _local.conn = conn
+    return conn
+
+
+def content_hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def get(namespace: str, key: str, max_age: float = None):
+    row = _connect().execute(
+        "SELECT value, created FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+    ).fetchone()
+    if row is None or (max_age is not None and time.time() - row[1] > max_age):
+        return None
+    return json.loads(row[0])
+
+
+def set(namespace: str, key: str, value):
+    conn = _connect()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, created) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), time.time()),
+        )
+
+
+def clear(namespace: str):
+    conn = _connect()
+    with conn:
+        conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+
+class SharedDict:
+    """Dict-style view of one namespace, so state is shared by every worker process (and survives restarts)."""
+
+    def __init__(self, namespace: str, defaults: dict = None):
+        self.namespace = namespace
+        self.defaults = dict(defaults or {})
+
+    def __getitem__(self, key: str):
+        value = get(self.namespace, key)
+        if value is None:
+            if key in self.defaults:
+                return self.defaults[key]
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value):
+        set(self.namespace, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.defaults or get(self.namespace, key) is not None
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
@@ -0,0 +1,165 @@
+# backend/rfp_heuristics.py
+
+"""
+Cheap regex/keyword pre-extraction of RFP metadata.
+
+Returns the same fields as ``RFPMetadata`` plus a 0–1 confidence per field, so
+``extract_rfp_metadata`` can skip the LLM when the core fields are unambiguous
+and otherwise pass the findings to the model as hints. Region and industry count as
+unambiguous only when the RFP labels them ("Industry: ...", "Region: ..."); keyword
+votes alone stay hints.
+"""
+
+import re
+from collections import Counter
+
+_MONTHS = r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+_DATE = (
+    rf"(?:{_MONTHS}\.? \d{{1,2}}(?:st|nd|rd|th)?,? \d{{4}}"
+    rf"|\d{{1,2}}(?:st|nd|rd|th)? {_MONTHS},? \d{{4}}"
+    r"|\d{4}-\d{2}-\d{2}"
+    r"|\d{1,2}/\d{1,2}/\d{4})"
+)
+_DEADLINE_RE = re.compile(
+    rf"(?:deadline|due(?: date)?|submission(?: date)?|submit(?:ted)? (?:by|no later than)|closing date|responses? (?:are )?due)[^\n]{{0,40}}?({_DATE})",
+    re.IGNORECASE,
+)
+_ANY_DATE_RE = re.compile(_DATE, re.IGNORECASE)
+_CLIENT_RE = re.compile(
+    r"(?:^|\n)\s*(?:client(?: name)?|issued by|prepared for|organi[sz]ation|company(?: name)?|agency)\s*[:\-–]\s*([^\n,;]{2,80})",
+    re.IGNORECASE,
+)
+_REGION_LABEL_RE = re.compile(
+    r"(?:^|\n)\s*(?:region|location|country|geograph(?:y|ic scope))\s*[:\-–]\s*([^\n;]{2,80})", re.IGNORECASE
+)
+_INDUSTRY_LABEL_RE = re.compile(r"(?:^|\n)\s*(?:industry|sector)\s*[:\-–]\s*([^\n;]{2,80})", re.IGNORECASE)
+_PROJECT_RE = re.compile(
+    r"(?:request for proposals?|rfp|project(?: name| title)?)\s*(?:for|[:\-–])\s*([^\n]{3,100})",
+    re.IGNORECASE,
+)
+
+# Whole words (optionally plural); a trailing "*" matches any word starting with the stem
+REGION_KEYWORDS = {
+    "North America": ["north america", "united states", "usa", "u.s.", "canada", "mexico"],
+    "Europe": ["europe", "european union", "eu", "united kingdom", "uk", "germany", "france", "gdpr"],
+    "Asia Pacific": ["asia", "apac", "india", "singapore", "australia", "japan", "china"],
+    "Latin America": ["latin america", "brazil", "argentina", "chile", "colombia"],
+    "Middle East & Africa": ["middle east", "uae", "saudi", "africa", "nigeria", "kenya"],
+}
+
+INDUSTRY_KEYWORDS = {
+    "retail": ["retail", "store", "e-commerce", "ecommerce", "inventory", "pos", "point-of-sale", "shop", "merchandis*"],
+    "finance": ["bank", "banking", "financial", "finance", "insurance", "loan", "credit", "fintech", "trading"],
+    "healthcare": ["health", "healthcare", "hospital", "patient", "clinical", "medical", "hipaa", "pharma*"],
+    "manufacturing": ["manufactur*", "factory", "factories", "supply chain", "production line", "plant"],
+    "education": ["school", "university", "student", "education", "campus"],
+    "government": ["government", "municipal", "public sector", "agency", "federal", "ministry"],
+    "technology": ["software", "saas", "cloud platform", "it services", "cybersecurity"],
+    "hospitality": ["hotel", "restaurant", "coffee", "hospitality", "food and beverage", "café", "cafe"],
+}
+
+def _keyword_pattern(keywords: list) -> re.Pattern:
+    alternatives = [re.escape(k[:-1]) + r"\w*" if k.endswith("*") else re.escape(k) + "(?:e?s)?" for k in keywords]
+    # Lookarounds instead of \b so keywords ending in punctuation ("u.s.") still match
+    return re.compile(rf"(?<!\w)(?:{'|'.join(alternatives)})(?!\w)")
+
+
+_KEYWORD_PATTERNS = {id(table): {label: _keyword_pattern(keywords) for label, keywords in table.items()}
+                     for table in (REGION_KEYWORDS, INDUSTRY_KEYWORDS)}
+
+VOTE_CONFIDENCE_CAP = 0.7
+
+_CONSTRAINT_RE = re.compile(r"\b(must|shall|required|mandatory|no later than|not exceed|budget|compliant|comply)\b", re.IGNORECASE)
+_NEED_RE = re.compile(r"\b(seek|seeking|need|needs|goal|objective|looking for|challenge|improve|reduce|increase)\b", re.IGNORECASE)
+
+
+def _keyword_vote(text: str, table: dict):
+    """Returns (winner, confidence) where confidence reflects how dominant the winner is."""
+    patterns = _KEYWORD_PATTERNS[id(table)]
+    counts = Counter({label: len(patterns[label].findall(text)) for label in table})
+    (best, best_n), *rest = counts.most_common() or [(None, 0)]
+    if best_n == 0:
+        return None, 0.0
+    runner_up = rest[0][1] if rest else 0
+    dominance = (best_n - runner_up) / best_n
+    return best, min(1.0, 0.4 + 0.15 * best_n) * dominance
+
+
+def _sentences(text: str, pattern: re.Pattern, limit: int = 10) -> list:
+    found = []
+    for sentence in re.split(r"(?<=[.!?])\s+|\n+", text):
+        sentence = sentence.strip(" •-*\t")
+        if 15 <= len(sentence) <= 300 and pattern.search(sentence) and sentence not in found:
+            found.append(sentence)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def heuristic_rfp_metadata(rfp_text: str):
+    """Returns ``(metadata, confidence)`` dicts keyed by ``RFPMetadata`` field names."""
+    lowered = f" {rfp_text.lower()} "
+    metadata, confidence = {}, {}
+
+    match = _DEADLINE_RE.search(rfp_text)
+    if match:
+        metadata["deadline"], confidence["deadline"] = match.group(1), 0.9
+    else:
+        dates = _ANY_DATE_RE.findall(rfp_text)
+        metadata["deadline"], confidence["deadline"] = (dates[-1], 0.4) if dates else ("", 0.0)
+
+    match = _CLIENT_RE.search(rfp_text)
+    metadata["client_name"], confidence["client_name"] = (match.group(1).strip(), 0.9) if match else ("", 0.0)
+
+    match = _PROJECT_RE.search(rfp_text)
+    metadata["project_name"], confidence["project_name"] = (match.group(1).strip(), 0.7) if match else ("", 0.0)
+
+    # Explicit labels are reliable; keyword votes are capped below is_confident's threshold so they
+    # only ever become hints (an incidental "store" or "usa" must not decide without the LLM)
+    match = _REGION_LABEL_RE.search(rfp_text)
+    region = _keyword_vote(f" {match.group(1).lower()} ", REGION_KEYWORDS)[0] if match else None
+    if region:
+        confidence["region"] = 0.9
+    else:
+        region, vote = _keyword_vote(lowered, REGION_KEYWORDS)
+        confidence["region"] = min(vote, VOTE_CONFIDENCE_CAP)
+    metadata["region"] = region or "global"
+
+    match = _INDUSTRY_LABEL_RE.search(rfp_text)
+    industry = normalize_industry(match.group(1)) if match else "generic"
+    if industry != "generic":
+        confidence["industry"] = 0.9
+    else:
+        industry, vote = _keyword_vote(lowered, INDUSTRY_KEYWORDS)
+        confidence["industry"] = min(vote, VOTE_CONFIDENCE_CAP)
+    metadata["industry"] = industry or "generic"
+
+    metadata["constraints"] = _sentences(rfp_text, _CONSTRAINT_RE)
+    metadata["client_needs"] = _sentences(rfp_text, _NEED_RE)
+    confidence["constraints"] = 0.6 if metadata["constraints"] else 0.0
+    confidence["client_needs"] = 0.6 if metadata["client_needs"] else 0.0
+    return metadata, confidence
+
+
+def detect_industry(text: str, min_confidence: float = 0.5) -> str:
+    """Industry label of a document by keyword vote, or "generic" when no industry clearly dominates."""
+    industry, confidence = _keyword_vote(f" {text.lower()} ", INDUSTRY_KEYWORDS)
+    return industry if industry and confidence >= min_confidence else "generic"
+
+
+def normalize_industry(value: str) -> str:
+    """Maps a free-text industry (e.g. "Retail & E-commerce" from the LLM) onto an ``INDUSTRY_KEYWORDS`` label."""
+    lowered = (value or "").strip().lower()
+    if lowered in INDUSTRY_KEYWORDS:
+        return lowered
+    industry, _ = _keyword_vote(f" {lowered} ", INDUSTRY_KEYWORDS)
+    return industry or "generic"
+
+
+def is_confident(confidence: dict, fields=("client_name", "deadline", "region", "industry"), threshold: float = 0.8) -> bool:
+    return all(confidence.get(f, 0.0) >= threshold for f in fields)
+
+
+def requirement_sentences(rfp_text: str, limit: int = 50) -> list:
+    """Sentences phrased as obligations ("must", "shall", ...); a fallback requirement list."""
+    return _sentences(rfp_text, _CONSTRAINT_RE, limit=limit)
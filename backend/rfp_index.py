@@ -0,0 +1,198 @@
+# backend/rfp_index.py
+
+"""
+Near-duplicate index of uploaded RFPs.
+
+Each RFP is fingerprinted with a MinHash signature over word 5-gram shingles (digits
+normalised, so re-issues with new dates/reference numbers still collide) and an
+embedding of its opening text. Candidates come from MinHash LSH buckets; similarity is
+the mean of the estimated Jaccard and the embedding cosine. Generated proposals are
+stored next to the fingerprint so a near-identical RFP can reuse them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from backend import result_cache
+from backend.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+INDEX_DB = Path(os.getenv("RFP_INDEX_DB", "data/rfp_index.db"))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.85))
+NUM_PERM = 128
+BANDS = 32  # 4 rows per band: pairs above ~0.6 Jaccard almost always share a bucket
+SHINGLE_WORDS = 5
+EMBED_CHARS = 8000
+
+_MERSENNE = (1 << 61) - 1
+_permutations = None
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        INDEX_DB.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(INDEX_DB, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS rfps ("
+            " rfp_id TEXT PRIMARY KEY, filename TEXT, created REAL NOT NULL, text TEXT NOT NULL,"
+            " signature BLOB NOT NULL, embedding BLOB, run_id TEXT, result TEXT, updated REAL);"
+            "CREATE TABLE IF NOT EXISTS lsh (band INTEGER NOT NULL, bucket TEXT NOT NULL, rfp_id TEXT NOT NULL,"
+            " PRIMARY KEY (band, bucket, rfp_id));"
+        )
+        _local.conn = conn
+    return conn
+
+
+def rfp_id_for(text: str) -> str:
+    return result_cache.content_hash(text.strip())[:16]
+
+
+def shingles(text: str) -> set:
+    words = re.sub(r"\d+", "#", text.lower()).split()
+    words = [re.sub(r"[^\w#]", "", w) for w in words]
+    words = [w for w in words if w]
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _get_permutations():
+    global _permutations
+    if _permutations is None:
+        rng = np.random.RandomState(42)
+        _permutations = (rng.randint(1, 2 ** 31 - 1, NUM_PERM).astype(np.uint64),
+                         rng.randint(0, 2 ** 31 - 1, NUM_PERM).astype(np.uint64))
+    return _permutations
+
+
+def minhash(text: str):
+    perm_a, perm_b = _get_permutations()
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in shingles(text)),
+        dtype=np.uint64,
+    )
+    if not hashes.size:
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint64)
+    # 32-bit hash * 31-bit coefficient stays below 2**63, so uint64 arithmetic does not overflow
+    return (((hashes[:, None] * perm_a + perm_b) % np.uint64(_MERSENNE)) & np.uint64(0xFFFFFFFF)).min(axis=0)
+
+
+def _bands(signature) -> list:
+    rows = NUM_PERM // BANDS
+    return [hashlib.blake2b(signature[i * rows:(i + 1) * rows].tobytes(), digest_size=8).hexdigest() for i in range(BANDS)]
+
+
+def _embed(text: str):
+    from backend.embeddings_setup import embed_query
+    try:
+        vector = np.asarray(embed_query(text[:EMBED_CHARS]), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+    except Exception as e:
+        logging.warning(f"⚠️ RFP embedding failed, de-duplicating on MinHash only: {e}")
+        return None
+
+
+def _fingerprint(text: str):
+    return minhash(text), _embed(text)
+
+
+def _similar(signature, embedding, exclude: str = None, limit: int = 3) -> list:
+    conn = _connect()
+    placeholders = " OR ".join(["(band = ? AND bucket = ?)"] * BANDS)
+    params = [v for band, bucket in enumerate(_bands(signature)) for v in (band, bucket)]
+    candidates = [r[0] for r in conn.execute(f"SELECT DISTINCT rfp_id FROM lsh WHERE {placeholders}", params)]
+
+    matches = []
+    for rfp_id in candidates:
+        if rfp_id == exclude:
+            continue
+        row = conn.execute(
+            "SELECT signature, embedding, filename, result IS NOT NULL FROM rfps WHERE rfp_id = ?", (rfp_id,)
+        ).fetchone()
+        if row is None:
+            continue
+        jaccard = float(np.mean(np.frombuffer(row[0], dtype=np.uint64) == signature))
+        cosine = None
+        if embedding is not None and row[1] is not None:
+            cosine = float(np.dot(np.frombuffer(row[1], dtype=np.float32), embedding))
+        similarity = jaccard if cosine is None else (jaccard + cosine) / 2
+        matches.append({
+            "rfp_id": rfp_id,
+            "filename": row[2],
+            "similarity": round(similarity, 4),
+            "jaccard": round(jaccard, 4),
+            "cosine": None if cosine is None else round(cosine, 4),
+            "has_proposal": bool(row[3]),
+        })
+    matches.sort(key=lambda m: m["similarity"], reverse=True)
+    return matches[:limit]
+
+
+def _insert(conn, rfp_id: str, text: str, filename, signature, embedding):
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO rfps (rfp_id, filename, created, text, signature, embedding) VALUES (?, ?, ?, ?, ?, ?)",
+            (rfp_id, filename, time.time(), text, signature.tobytes(), None if embedding is None else embedding.tobytes()),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO lsh (band, bucket, rfp_id) VALUES (?, ?, ?)",
+            [(band, bucket, rfp_id) for band, bucket in enumerate(_bands(signature))],
+        )
+
+
+def register_rfp(text: str, filename: str = None, threshold: float = DEDUP_THRESHOLD):
+    """
+    Adds an uploaded RFP to the index and returns ``(rfp_id, matches)`` where ``matches``
+    are prior RFPs at or above ``threshold`` that already have a stored proposal.
+    An identical re-upload matches itself with similarity 1.0.
+    """
+    conn = _connect()
+    rfp_id = rfp_id_for(text)
+    row = conn.execute("SELECT result IS NOT NULL, filename FROM rfps WHERE rfp_id = ?", (rfp_id,)).fetchone()
+    exact = [{"rfp_id": rfp_id, "filename": row[1], "similarity": 1.0, "jaccard": 1.0, "cosine": 1.0,
+              "has_proposal": True}] if row and row[0] else []
+
+    signature, embedding = _fingerprint(text)
+    if row is None:
+        _insert(conn, rfp_id, text.strip(), filename, signature, embedding)
+    matches = exact + [m for m in _similar(signature, embedding, exclude=rfp_id)
+                       if m["has_proposal"] and m["similarity"] >= threshold]
+    return rfp_id, matches
+
+
+def record_result(text: str, run_id: str, result: dict, rfp_id: str = None) -> str:
+    """Stores a finished pipeline result against the RFP so later near-duplicates can reuse it."""
+    conn = _connect()
+    rfp_id = rfp_id or rfp_id_for(text)
+    if conn.execute("SELECT 1 FROM rfps WHERE rfp_id = ?", (rfp_id,)).fetchone() is None:
+        signature, embedding = _fingerprint(text)
+        _insert(conn, rfp_id, text.strip(), None, signature, embedding)
+    stored = {k: result.get(k) for k in ("proposal", "metadata", "compliance_report", "score_report", "scores")}
+    with conn:
+        conn.execute(
+            "UPDATE rfps SET run_id = ?, result = ?, updated = ? WHERE rfp_id = ?",
+            (run_id, json.dumps(stored), time.time(), rfp_id),
+        )
+    return rfp_id
+
+
+def get_rfp(rfp_id: str):
+    """Returns ``{"rfp_id", "filename", "text", "run_id", "result"}`` or None."""
+    row = _connect().execute(
+        "SELECT filename, text, run_id, result FROM rfps WHERE rfp_id = ?", (rfp_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {"rfp_id": rfp_id, "filename": row[0], "text": row[1], "run_id": row[2],
+            "result": json.loads(row[3]) if row[3] else None}
@@ -0,0 +1,134 @@
+# backend/scoring.py
+
+"""
+Rubric scoring and best-of-N proposal selection.
+
+Proposals are scored 1–10 per rubric dimension with structured output, several
+candidates per LLM call, and scores are cached per (rubric, client context, proposal)
+hash, so re-scoring an unchanged proposal is free. With ``PROPOSAL_CANDIDATES`` > 1 the
+pipeline generates that many tone/vertical variants concurrently and keeps the best.
+"""
+
+import itertools
+import logging
+import os
+import time
+
+from backend import result_cache
+from backend.llm_registry import parallel_map
+from backend.llm_utils import optimize_proposal_tone, score_proposals
+from backend.tracing import measure_llm_usage
+
+# dimension -> (weight, label shown in the report)
+RUBRIC = {
+    "clarity": (0.2, "Clarity of Communication"),
+    "persuasiveness": (0.2, "Persuasiveness & Tone"),
+    "technical_depth": (0.2, "Technical Depth & Feasibility"),
+    "client_alignment": (0.25, "Alignment with Client Needs"),
+    "overall": (0.15, "Overall Quality"),
+}
+RUBRIC_VERSION = "v1"  # bump when the rubric or prompt changes to invalidate cached scores
+SCORING_BATCH_SIZE = int(os.getenv("SCORING_BATCH_SIZE", 3))
+PROPOSAL_CANDIDATES = int(os.getenv("PROPOSAL_CANDIDATES", 1))
+CANDIDATE_TONES = ["persuasive", "consultative", "concise and technical"]
+
+
+def weighted_score(scores: dict) -> float:
+    return round(sum(weight * scores[dim] for dim, (weight, _) in RUBRIC.items()), 2)
+
+
+def _score_batch(batch: list, client_context: str) -> list:
+    """``batch`` is ``[(label, text)]``; returns score dicts aligned with it (None if missing)."""
+    try:
+        results = score_proposals(dict(batch), client_context)
+    except Exception as e:
+        logging.warning(f"⚠️ Scoring failed for {len(batch)} proposals: {e}")
+        return [None] * len(batch)
+    labels = [label for label, _ in batch]
+    by_label = {r.candidate.strip(): r for r in results}
+    if not any(label in by_label for label in labels) and len(results) == len(batch):
+        by_label = dict(zip(labels, results))  # labels dropped by the model; trust the order
+    return [by_label[label].model_dump(exclude={"candidate"}) if label in by_label else None for label in labels]
+
+
+def score_many(proposals: list, client_context: str = "") -> list:
+    """
+    Rubric scores for each proposal (dimension scores, ``weighted`` and ``rationale``), in order.
+    Uncached proposals are scored ``SCORING_BATCH_SIZE`` per call, batches concurrently.
+    """
+    keys = [result_cache.content_hash(RUBRIC_VERSION, client_context, p) for p in proposals]
+    scores = [result_cache.get("proposal_scores", k) for k in keys]
+
+    pending = [i for i, score in enumerate(scores) if score is None]
+    batches = [pending[i:i + SCORING_BATCH_SIZE] for i in range(0, len(pending), SCORING_BATCH_SIZE)]
+    results = parallel_map(
+        lambda batch: _score_batch([(f"P{i + 1}", proposals[i]) for i in batch], client_context), batches
+    )
+    for batch, batch_results in zip(batches, results):
+        for i, result in zip(batch, batch_results):
+            if result is None:
+                continue
+            result["weighted"] = weighted_score(result)
+            scores[i] = result
+            result_cache.set("proposal_scores", keys[i], result)
+    return scores
+
+
+def format_score_report(scores: dict) -> str:
+    """Text report in the shape the UI has always shown (one line per rubric dimension)."""
+    if not scores:
+        return "⚠️ Scoring unavailable."
+    lines = [f"{i}. {label}: {scores[dim]}/10" for i, (dim, (_, label)) in enumerate(RUBRIC.items(), start=1)]
+    lines.append(f"\n**Weighted score:** {scores['weighted']}/10")
+    if scores.get("rationale"):
+        lines.append(f"\n{scores['rationale']}")
+    return "\n".join(lines)
+
+
+def best_of_n(proposal: str, vertical: str, n: int = PROPOSAL_CANDIDATES, client_context: str = ""):
+    """
+    Generates ``n`` tone/vertical variants of ``proposal`` concurrently, scores them in batched
+    calls and returns ``(best_text, selection)``; ``selection`` lists each candidate's score,
+    LLM calls, tokens, cost and latency plus the cost of scoring itself.
+    """
+    verticals = [vertical] + (["generic"] if vertical != "generic" else [])
+    variants = list(itertools.islice(
+        ((tone, v) for v in verticals for tone in CANDIDATE_TONES), n
+    ))
+
+    def generate(variant):
+        tone, v = variant
+        with measure_llm_usage() as usage:
+            text = optimize_proposal_tone(proposal, vertical=v, tone=tone)
+        return text, usage
+
+    start = time.perf_counter()
+    generated = parallel_map(generate, variants, max_workers=n)
+    generation_time = time.perf_counter() - start
+    with measure_llm_usage() as scoring_usage:
+        scores = score_many([text for text, _ in generated], client_context)
+
+    candidates = []
+    for (tone, v), (text, usage), score in zip(variants, generated, scores):
+        candidates.append({
+            "tone": tone,
+            "vertical": v,
+            "score": score["weighted"] if score else None,
+            "scores": score,
+            "llm_calls": usage["llm_calls"],
+            "tokens": usage["prompt_tokens"] + usage["completion_tokens"],
+            "cost_usd": round(usage["cost_usd"], 6),
+            "latency_s": round(usage["wall_time"], 2),
+        })
+    best = max(range(len(candidates)), key=lambda i: candidates[i]["score"] or 0)
+    selection = {
+        "candidates": candidates,
+        "selected": best,
+        "generation_wall_time_s": round(generation_time, 2),
+        "scoring": {"llm_calls": scoring_usage["llm_calls"], "cost_usd": round(scoring_usage["cost_usd"], 6),
+                    "latency_s": round(scoring_usage["wall_time"], 2)},
+        "total_cost_usd": round(sum(c["cost_usd"] for c in candidates) + scoring_usage["cost_usd"], 6),
+    }
+    logging.info(f"🏆 Best of {len(candidates)}: {candidates[best]['tone']} / {candidates[best]['vertical']} "
+                 f"({candidates[best]['score']}/10)")
+    return generated[best][0], selection
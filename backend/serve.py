@@ -0,0 +1,262 @@
+# backend/serve.py
+
+"""
+Production serving: a master process that preloads read-only resources once and forks
+N uvicorn workers sharing one listening socket.
+
+    python -m backend.serve --workers 4 --port 8000
+    kill -HUP <master pid>     # reload indexes and replace workers without downtime
+    kill -TERM <master pid>    # graceful shutdown
+
+- Preload (master, before fork): the app and pipeline modules, the export font template,
+  the reference vector store (in-memory store or memory-mapped ``VECTOR_FILE``) and the
+  lexical reranker. Workers inherit them copy-on-write (``gc.freeze`` keeps the garbage
+  collector from touching — and thereby copying — the preloaded objects); mapped vector
+  files are shared through the page cache. SQLite-backed state (result/embedding cache,
+  chunk store, upload store, conversation memory) is shared through its files.
+- Anything holding sockets, threads or SQLite handles (LLM/embedding/Pinecone clients,
+  checkpointer, OCR pool) is re-created lazily in each worker after the fork.
+- Health: every worker's event loop writes a heartbeat into shared memory; the master
+  restarts workers that exit or whose heartbeat is older than ``WORKER_TIMEOUT`` seconds.
+- Reload (SIGHUP): the master rebuilds the preloaded indexes, forks a new generation,
+  waits until all of its workers report healthy, then gracefully stops the old one
+  (in-flight requests finish; both generations accept on the socket meanwhile).
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", os.cpu_count() or 1))
+WORKER_TIMEOUT = float(os.getenv("WORKER_TIMEOUT", 30))
+HEARTBEAT_SECONDS = 1.0
+GRACEFUL_TIMEOUT = float(os.getenv("GRACEFUL_TIMEOUT", 60))
+
+# Set in worker processes; reported by /ready
+WORKER_INFO = {}
+
+
+def _preload(reload: bool = False):
+    """Imports the app and builds the read-only resources workers should share."""
+    import importlib
+    from backend import lazy
+
+    importlib.import_module("backend.app")
+    importlib.import_module("backend.agentic_pipeline")
+    from backend import export_utils, pinecone_utils, reranker
+
+    export_utils._new_pdf()  # font metrics template
+    if reload:
+        pinecone_utils.vector_store.reset()
+        reranker.scorer.reset()
+    if pinecone_utils.VECTOR_BACKEND in ("memory", "local"):
+        pinecone_utils.vector_store.get()
+    if reranker.RERANKER and reranker.RERANK_BACKEND == "lexical":
+        reranker.scorer.get()  # model backends start native thread pools: loaded per worker instead
+    status = lazy.resource_status()
+    logging.info(f"📦 Preloaded: {', '.join(n for n, s in status.items() if s['initialized']) or 'modules only'}")
+
+
+def _after_fork():
+    """Drops per-process handles inherited from the master so each worker opens its own."""
+    from backend import blob_store, chunk_store, proposal_archive, result_cache, rfp_index
+    from backend import embeddings_setup, llm_registry, ocr, pinecone_utils
+
+    for module in (result_cache, chunk_store, blob_store, rfp_index, proposal_archive):
+        module._local = threading.local()  # SQLite connections must not cross a fork
+    for resource in (embeddings_setup.embeddings, llm_registry.http_client, llm_registry.async_http_client,
+                     pinecone_utils.pc, ocr.pool):
+        if resource.initialized:
+            resource.reset()
+    if pinecone_utils.VECTOR_BACKEND == "pinecone":
+        pinecone_utils.index.reset()
+        pinecone_utils.vector_store.reset()
+
+    from backend import agentic_pipeline
+    from backend.checkpointing import create_checkpointer
+    agentic_pipeline.proposal_agentic_graph.checkpointer = create_checkpointer()
+
+
+def _run_worker(sock: socket.socket, slot: int, heartbeats, generation: int, args):
+    import uvicorn
+    from backend import serve  # this file runs as __main__; the app reads the imported module's WORKER_INFO
+    from backend.app import app
+
+    _after_fork()
+    serve.WORKER_INFO.update(pid=os.getpid(), slot=slot, generation=generation, workers=args.workers)
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_graceful_shutdown=GRACEFUL_TIMEOUT)
+    server = uvicorn.Server(config)
+
+    async def heartbeat():
+        while True:
+            heartbeats[slot] = time.monotonic()  # stops advancing if the event loop is blocked
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+
+    async def main():
+        task = asyncio.create_task(heartbeat())
+        try:
+            await server.serve(sockets=[sock])
+        finally:
+            task.cancel()
+
+    asyncio.run(main())
+
+
+class Master:
+    def __init__(self, args):
+        self.args = args
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((args.host, args.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+        # Two generations coexist during a reload
+        self.heartbeats = multiprocessing.RawArray("d", 2 * args.workers)
+        self.generation = 0
+        self.workers = {}  # pid -> (slot, generation, fork time)
+        self.reload_requested = False
+        self.stopping = False
+
+    def spawn(self, slot: int):
+        started = time.monotonic()
+        self.heartbeats[slot] = started  # grace period: counts as healthy until WORKER_TIMEOUT
+        gc.freeze()  # preloaded objects stay in the permanent generation: no copy-on-write from GC passes
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _run_worker(self.sock, slot, self.heartbeats, self.generation, self.args)
+            except BaseException:
+                logging.exception(f"❌ Worker {os.getpid()} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        gc.unfreeze()
+        self.workers[pid] = (slot, self.generation, started)
+        logging.info(f"🚀 Worker {pid} started (slot {slot}, generation {self.generation})")
+
+    def _slots(self, generation: int) -> range:
+        offset = (generation % 2) * self.args.workers
+        return range(offset, offset + self.args.workers)
+
+    def start_generation(self):
+        for slot in self._slots(self.generation):
+            self.spawn(slot)
+
+    def healthy(self, pid: int) -> bool:
+        slot, _, _ = self.workers[pid]
+        return time.monotonic() - self.heartbeats[slot] < WORKER_TIMEOUT
+
+    def serving(self, pid: int) -> bool:
+        """The worker's own event loop has written a heartbeat since it was forked."""
+        slot, _, started = self.workers[pid]
+        return self.heartbeats[slot] > started
+
+    def stop(self, pids, sig=signal.SIGTERM):
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot, generation, _ = self.workers.pop(pid, (None, None, None))
+            if slot is not None and generation == self.generation and not self.stopping:
+                logging.warning(f"⚠️ Worker {pid} exited ({status}); restarting")
+                self.spawn(slot)
+
+    def reload(self):
+        """Rebuilds the preloaded indexes and swaps in a new generation of workers."""
+        self.reload_requested = False
+        logging.info("🔄 Reloading: rebuilding preloaded indexes")
+        try:
+            _preload(reload=True)
+        except Exception as e:
+            logging.error(f"❌ Reload failed, keeping the current workers: {e}")
+            return
+        old = [pid for pid, (_, generation, _) in self.workers.items() if generation == self.generation]
+        self.generation += 1
+        self.start_generation()
+        deadline = time.monotonic() + WORKER_TIMEOUT
+        while time.monotonic() < deadline:
+            self.reap()  # replaces new workers that die during startup
+            new = [pid for pid, (_, generation, _) in self.workers.items() if generation == self.generation]
+            if all(self.serving(pid) for pid in new):
+                break
+            time.sleep(0.1)
+        else:
+            logging.warning(f"⚠️ New workers not all serving after {WORKER_TIMEOUT:.0f}s; replacing the old ones anyway")
+        self.stop(old)
+        logging.info(f"✅ Generation {self.generation} serving; stopping {len(old)} old workers")
+
+    def run(self):
+        def request_reload(*_):
+            self.reload_requested = True
+
+        def request_stop(*_):
+            self.stopping = True
+
+        signal.signal(signal.SIGHUP, request_reload)
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        self.start_generation()
+        logging.info(f"✅ Master {os.getpid()} serving on {self.args.host}:{self.args.port} "
+                     f"with {self.args.workers} workers")
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload()
+            self.reap()
+            for pid in list(self.workers):
+                if pid in self.workers and not self.healthy(pid):
+                    logging.warning(f"⚠️ Worker {pid} missed heartbeats for {WORKER_TIMEOUT:.0f}s; killing it")
+                    self.stop([pid], signal.SIGKILL)  # reap() restarts it
+            time.sleep(0.2)
+
+        self.stop(list(self.workers))
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        self.stop(list(self.workers), signal.SIGKILL)
+        logging.info("👋 Master stopped")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the API with preloaded resources and forked workers.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        print("❌ backend.serve needs os.fork (Linux/macOS); run uvicorn directly on this platform.")
+        return 1
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    os.environ["WARMUP_MODE"] = "off"  # workers start serving immediately; the rest initialises on first use
+    _preload()
+    Master(args).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,14 @@
 # backend/store_in_pinecone.py
+# Run from the repo root: python -m backend.store_in_pinecone
 import os
 from dotenv import load_dotenv
 load_dotenv()
 from pinecone import Pinecone, ServerlessSpec
-from langchain_pinecone import PineconeVectorStore as LCPinecone
-from langchain.schema import Document
-from embeddings_setup import embeddings
+from backend.embeddings_setup import embeddings
+from backend.ingest import load_doc_chunks
+from backend import chunk_store, vector_file
+from backend.pinecone_utils import VECTOR_FILE, VECTOR_FILE_DTYPE, VECTOR_FILE_FULL_PRECISION
+from backend.proposal_archive import SOURCE_PREFIX
 
 # ✅ Verify Embedding Dimensions
 test_text = "Test embedding"
@@ -77,51 +80,35 @@ docs_path = "docs"
 if not os.path.exists(docs_path):
     raise ValueError(f"Directory {docs_path} does not exist. Please add your documents.")
 
-import PyPDF2  # Ensure PyPDF2 is installed: pip install PyPDF2
-
-docs_texts = []
-supported_extensions = ('.txt', '.md', '.pdf')
-
-for file_name in os.listdir(docs_path):
-    file_path = os.path.join(docs_path, file_name)
-    
-    if not os.path.isfile(file_path):
-        print(f"Skipping '{file_name}': Not a file.")
-        continue
-
-    if file_name.lower().endswith(('.txt', '.md')):
-        try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as file:
-                text = file.read()
-            docs_texts.append(text)
-            print(f"Successfully read '{file_name}'.")
-        except Exception as e:
-            print(f"Error reading '{file_name}': {e}")
-    
-    elif file_name.lower().endswith('.pdf'):
-        try:
-            with open(file_path, "rb") as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page_num, page in enumerate(reader.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            if text:
-                docs_texts.append(text)
-                print(f"Successfully extracted text from '{file_name}'.")
-            else:
-                print(f"No text found in '{file_name}'.")
-        except Exception as e:
-            print(f"Error processing PDF '{file_name}': {e}")
-    
-    else:
-        print(f"Unsupported file type for '{file_name}'. Skipping.")
-
-documents = [Document(page_content=txt) for txt in docs_texts]
-vectorstore = LCPinecone.from_documents(
-    documents=documents,
-    embedding=embeddings,
-    index_name="my-proposals-index"
-)
+# Chunks carry compact provenance metadata; their text goes to the local chunk store,
+# so the index holds only embeddings + metadata and retrieval payloads stay small
+chunks = load_doc_chunks(docs_path)
+if not chunks:
+    raise ValueError(f"No text found in {docs_path}.")
+for source in sorted({c["metadata"]["source"] for c in chunks}):
+    chunk_store.delete_source(source)
+chunk_store.put_chunks(chunks)
+print(f"Stored {len(chunks)} chunks from {len({c['metadata']['source'] for c in chunks})} documents locally.")
+
+# Accepted proposals were upserted incrementally (proposal_archive.py); the namespaces were just
+# cleared and the vector file is rewritten below, so re-add their chunks from the chunk store
+archived = chunk_store.get_source_chunks(SOURCE_PREFIX)
+chunks += archived
+print(f"Re-adding {len(archived)} chunks of accepted archived proposals.")
+
+BATCH_SIZE = 100
+all_vectors = []
+for i in range(0, len(chunks), BATCH_SIZE):
+    batch = chunks[i:i + BATCH_SIZE]
+    vectors = embeddings.embed_documents([c["text"] for c in batch])
+    all_vectors.extend(vectors)
+    index.upsert(vectors=[
+        {"id": c["id"], "values": vector, "metadata": c["metadata"]} for c, vector in zip(batch, vectors)
+    ])
+    print(f"Upserted {i + len(batch)}/{len(chunks)} chunks.")
 print("Documents uploaded to Pinecone!")
+
+# Compact local copy of the corpus vectors (VECTOR_BACKEND=local, offline search)
+vector_file.write(VECTOR_FILE, [c["id"] for c in chunks], all_vectors, dtype=VECTOR_FILE_DTYPE,
+                  full_precision=VECTOR_FILE_FULL_PRECISION)
+print(f"Wrote {len(chunks)} {VECTOR_FILE_DTYPE} vectors to {VECTOR_FILE}.")
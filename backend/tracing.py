@@ -0,0 +1,386 @@
+# backend/tracing.py
+
+"""
+Per-stage latency, token and cost instrumentation for the agentic pipeline.
+
+- ``traced_node`` wraps LangGraph node functions (wall time, iteration count per run)
+- ``record_llm_call`` is called by ``llm_utils`` for every model invocation
+- stats are kept per run (``get_run_stats``), exported as OpenTelemetry spans
+  (OTLP collector or a JSON-lines file) and as Prometheus text via ``render_metrics``
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from pathlib import Path
+
+from backend.cancellation import check_cancelled
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")  # "file", "otlp" or "none"
+SPAN_FILE = Path(os.getenv("TRACING_SPAN_FILE", "logs/spans.jsonl"))
+MAX_TRACKED_RUNS = 200
+
+# USD per 1M tokens: (prompt, cached prompt, completion)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+RATIO_BUCKETS = (0, 0.1, 0.25, 0.5, 0.75, 0.9, 1)
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+_usage_meter = contextvars.ContextVar("usage_meter", default=None)
+_lock = threading.Lock()
+
+
+# --- Prometheus-style metrics ---
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with _lock:
+            series = self._series.setdefault(key, {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            for key, series in sorted(self._series.items()):
+                labels = _format_labels(self.label_names, key)
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels):
+        if not amount:
+            return
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with _lock:
+            self._values[key] += amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with _lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{_format_labels(self.label_names, key)}}} {value:g}")
+        return lines
+
+
+def _format_labels(names, values) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ") for v in values)
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, escaped))
+
+
+STAGE_DURATION = Histogram("rfp_stage_duration_seconds", "Wall time per pipeline stage", ("stage",))
+STAGE_ITERATIONS = Counter("rfp_stage_runs_total", "Pipeline stage executions", ("stage",))
+STAGE_ERRORS = Counter("rfp_stage_errors_total", "Pipeline stage failures", ("stage",))
+LLM_DURATION = Histogram("rfp_llm_call_duration_seconds", "Wall time per LLM call", ("task", "model"))
+LLM_TOKENS = Counter("rfp_llm_tokens_total", "LLM tokens by type", ("task", "type"))
+LLM_RETRIES = Counter("rfp_llm_retries_total", "LLM call retries", ("task",))
+LLM_CACHE_HITS = Counter("rfp_llm_cache_hits_total", "LLM calls served (partly) from cache", ("task",))
+LLM_CACHED_RATIO = Histogram("rfp_llm_cached_prompt_ratio", "Share of prompt tokens served from the provider prefix cache",
+                             ("task",), buckets=RATIO_BUCKETS)
+LLM_COST = Counter("rfp_llm_cost_usd_total", "Estimated LLM spend in USD", ("task",))
+RERANK_DURATION = Histogram("rfp_rerank_duration_seconds", "Reranking time per retrieval", ("backend",))
+RERANK_TOKENS_SAVED = Counter("rfp_rerank_context_tokens_saved_total", "Prompt context tokens dropped by reranking", ())
+REQUESTS_REJECTED = Counter("rfp_requests_rejected_total", "Requests shed with 429 because the worker was saturated", ("endpoint",))
+REQUESTS_CANCELLED = Counter("rfp_requests_cancelled_total", "Requests cancelled before completion", ("endpoint", "reason"))
+REQUEST_DURATION = Histogram("rfp_request_duration_seconds", "Wall time of admitted blocking request work", ("endpoint",))
+OCR_DURATION = Histogram("rfp_ocr_page_duration_seconds", "Tesseract time per page", ("dpi_pass",))
+OCR_PAGES = Counter("rfp_ocr_pages_total", "OCR pages by outcome (cache_hit, low_res, high_res, blank)", ("result",))
+
+METRICS = [STAGE_DURATION, STAGE_ITERATIONS, STAGE_ERRORS, LLM_DURATION, LLM_TOKENS, LLM_RETRIES, LLM_CACHE_HITS, LLM_CACHED_RATIO, LLM_COST,
+           RERANK_DURATION, RERANK_TOKENS_SAVED, REQUESTS_REJECTED, REQUESTS_CANCELLED, REQUEST_DURATION,
+           OCR_DURATION, OCR_PAGES]
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- OpenTelemetry ---
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def _get_tracer():
+    if _tracer is not None or TRACING_EXPORTER == "none":
+        return _tracer
+    with _tracer_lock:
+        return _tracer if _tracer is not None else _init_tracer()
+
+
+def _init_tracer():
+    global _tracer
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logging.warning("⚠️ opentelemetry-sdk not installed; spans are not exported.")
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "rfp-automation"}))
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()  # honours OTEL_EXPORTER_OTLP_ENDPOINT
+    else:
+        SPAN_FILE.parent.mkdir(parents=True, exist_ok=True)
+        exporter = ConsoleSpanExporter(
+            out=SPAN_FILE.open("a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("backend.tracing")
+    return _tracer
+
+
+@contextlib.contextmanager
+def _span(name: str, attributes: dict):
+    tracer = _get_tracer()
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}) as span:
+        yield span
+
+
+# --- Per-run stats ---
+
+_runs = OrderedDict()
+_task_samples = defaultdict(lambda: deque(maxlen=1000))  # recent LLM calls per task, for routing reports
+
+
+def _new_stage_stats() -> dict:
+    return {
+        "runs": 0, "wall_time": 0.0, "llm_calls": 0, "llm_time": 0.0,
+        "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+        "cache_hits": 0, "retries": 0, "cost_usd": 0.0,
+    }
+
+
+def _stage_stats(run_id: str, stage: str) -> dict:
+    with _lock:
+        run = _runs.get(run_id)
+        if run is None:
+            run = _runs[run_id] = {"started": time.time(), "stages": {}}
+            while len(_runs) > MAX_TRACKED_RUNS:
+                _runs.popitem(last=False)
+        return run["stages"].setdefault(stage, _new_stage_stats())
+
+
+def get_run_stats(run_id: str) -> dict:
+    """Returns per-stage and total stats for a run, or None if the run is unknown."""
+    with _lock:
+        run = _runs.get(run_id)
+        if run is None:
+            return None
+        stages = {name: dict(stats) for name, stats in run["stages"].items()}
+    totals = _new_stage_stats()
+    for stats in stages.values():
+        for key in totals:
+            totals[key] += stats[key]
+    for stats in [*stages.values(), totals]:
+        stats["cached_token_ratio"] = stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+    return {"run_id": run_id, "stages": stages, "totals": totals}
+
+
+def current_run_id():
+    return _current_run.get()
+
+
+def traced_node(stage: str):
+    """Decorator for LangGraph nodes: times the node and attributes nested LLM calls to it."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(state, *args, **kwargs):
+            run_id = state.get("run_id") or "-"
+            run_token = _current_run.set(run_id)
+            stage_token = _current_stage.set(stage)
+            stats = _stage_stats(run_id, stage)
+            check_cancelled()
+            start = time.perf_counter()
+            try:
+                with _span(f"node:{stage}", {"rfp.run_id": run_id, "rfp.stage": stage, "rfp.iteration": stats["runs"] + 1}):
+                    return fn(state, *args, **kwargs)
+            except Exception:
+                STAGE_ERRORS.inc(stage=stage)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                with _lock:
+                    stats["runs"] += 1
+                    stats["wall_time"] += elapsed
+                STAGE_DURATION.observe(elapsed, stage=stage)
+                STAGE_ITERATIONS.inc(stage=stage)
+                _current_stage.reset(stage_token)
+                _current_run.reset(run_token)
+        return wrapper
+    return decorator
+
+
+def extract_usage(response) -> dict:
+    """Normalizes token usage from a LangChain chat response."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        details = usage.get("input_token_details") or {}
+        return {
+            "prompt_tokens": usage.get("input_tokens", 0),
+            "completion_tokens": usage.get("output_tokens", 0),
+            "cached_tokens": details.get("cache_read", 0) or 0,
+        }
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    details = token_usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": token_usage.get("prompt_tokens", 0),
+        "completion_tokens": token_usage.get("completion_tokens", 0),
+        "cached_tokens": details.get("cached_tokens", 0) or 0,
+    }
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0
+    prompt_price, cached_price, completion_price = prices
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * prompt_price + cached_tokens * cached_price + completion_tokens * completion_price) / 1_000_000
+
+
+def record_llm_call(task: str, model: str, duration: float, usage: dict, retries: int = 0, cache_hit: bool = False):
+    """Records one LLM invocation against the current run/stage and the global metrics."""
+    prompt_tokens = usage.get("prompt_tokens", 0)
+    completion_tokens = usage.get("completion_tokens", 0)
+    cached_tokens = usage.get("cached_tokens", 0)
+    cache_hit = cache_hit or cached_tokens > 0
+    cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+
+    LLM_DURATION.observe(duration, task=task, model=model)
+    if prompt_tokens:
+        LLM_CACHED_RATIO.observe(cached_tokens / prompt_tokens, task=task)
+        logging.debug(f"LLM {task} ({model}): {duration:.2f}s, {cached_tokens}/{prompt_tokens} prompt tokens cached")
+    LLM_TOKENS.inc(prompt_tokens, task=task, type="prompt")
+    LLM_TOKENS.inc(completion_tokens, task=task, type="completion")
+    LLM_TOKENS.inc(cached_tokens, task=task, type="cached")
+    LLM_RETRIES.inc(retries, task=task)
+    LLM_COST.inc(cost, task=task)
+    if cache_hit:
+        LLM_CACHE_HITS.inc(task=task)
+    with _lock:
+        _task_samples[task].append((model, duration, prompt_tokens, completion_tokens, cached_tokens, cost))
+
+    meter = _usage_meter.get()
+    if meter is not None:
+        with _lock:
+            meter["llm_calls"] += 1
+            meter["prompt_tokens"] += prompt_tokens
+            meter["completion_tokens"] += completion_tokens
+            meter["cached_tokens"] += cached_tokens
+            meter["cost_usd"] += cost
+
+    stats = _stage_stats(_current_run.get() or "-", _current_stage.get() or task)
+    with _lock:
+        stats["llm_calls"] += 1
+        stats["llm_time"] += duration
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        stats["cached_tokens"] += cached_tokens
+        stats["cache_hits"] += int(cache_hit)
+        stats["retries"] += retries
+        stats["cost_usd"] += cost
+
+
+@contextlib.contextmanager
+def measure_llm_usage():
+    """Collects calls, tokens, cost and wall time of the LLM calls made inside the block (e.g. per candidate)."""
+    meter = {"llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0,
+             "wall_time": 0.0}
+    token = _usage_meter.set(meter)
+    start = time.perf_counter()
+    try:
+        yield meter
+    finally:
+        meter["wall_time"] = time.perf_counter() - start
+        _usage_meter.reset(token)
+
+
+@contextlib.contextmanager
+def llm_span(task: str, model: str):
+    """Span around a single LLM call; nested under the current node span when there is one."""
+    with _span(f"llm:{task}", {"rfp.run_id": _current_run.get(), "rfp.stage": _current_stage.get(),
+                               "llm.task": task, "llm.model": model}) as span:
+        yield span
+
+
+def annotate_span(span, usage: dict, retries: int):
+    if span is None:
+        return
+    span.set_attribute("llm.prompt_tokens", usage.get("prompt_tokens", 0))
+    span.set_attribute("llm.completion_tokens", usage.get("completion_tokens", 0))
+    span.set_attribute("llm.cached_tokens", usage.get("cached_tokens", 0))
+    span.set_attribute("llm.retries", retries)
+
+
+def get_task_stats() -> dict:
+    """Latency/token/cost summary of recent LLM calls per task (used to tune llm_registry routes)."""
+    from statistics import median
+
+    with _lock:
+        samples = {task: list(calls) for task, calls in _task_samples.items()}
+    report = {}
+    for task, calls in samples.items():
+        durations = sorted(c[1] for c in calls)
+        n = len(calls)
+        report[task] = {
+            "models": sorted({c[0] for c in calls}),
+            "calls": n,
+            "p50_seconds": median(durations),
+            "p95_seconds": durations[min(n - 1, int(0.95 * n))],
+            "avg_prompt_tokens": sum(c[2] for c in calls) / n,
+            "avg_completion_tokens": sum(c[3] for c in calls) / n,
+            "cached_token_ratio": sum(c[4] for c in calls) / max(1, sum(c[2] for c in calls)),
+            "cost_usd": sum(c[5] for c in calls),
+        }
+    return report
+
+
+def dump_run_stats(run_id: str) -> str:
+    return json.dumps(get_run_stats(run_id), indent=2)
@@ -0,0 +1,154 @@
+# backend/vector_file.py
+
+"""
+Compact on-disk embedding store: one memory-mapped file per corpus.
+
+Layout (little-endian, sections 64-byte aligned)::
+
+    header   magic, dtype (float16 | int8), count, dimension, section offsets
+    vectors  count x dimension codes of the stored dtype (unit-normalised vectors)
+    scales   float32 per vector (int8 only: vector ~= codes * scale)
+    full     optional float32 copy for re-scoring (off by default); paged in only for the candidates
+    ids      utf-8, newline-separated
+
+A 1536-dim ada-002 vector takes 3 KB as float16 or 1.5 KB as int8 instead of 6 KB
+(float32) or ~30 KB (Python list of floats). Scores are cosine similarities computed with
+NumPy directly from the mapped codes in blocks, so a query never materialises a float32
+copy of the corpus. Files written with ``full_precision=True`` also keep the 6 KB float32
+vectors (7.5 KB per vector with int8 codes) so ``rescore`` can re-rank the top candidates;
+without that section ``rescore`` is a no-op.
+"""
+
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"RFPVEC01"
+DTYPES = {"float16": (1, np.float16), "int8": (2, np.int8)}
+_HEADER = struct.Struct("<8sBBxxIQQQQQQ")  # magic, dtype, has_full, dimension, count, 5 offsets
+ALIGN = 64
+SCAN_BLOCK_ROWS = int(os.getenv("VECTOR_SCAN_BLOCK_ROWS", 1024))  # ~6 MB of float32 per block: stays in cache
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _normalise(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple:
+    """Symmetric per-vector scalar quantisation: ``(codes int8, scales float32)``."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def write(path: str, ids: list, vectors, dtype: str = "int8", full_precision: bool = False):
+    """Writes ``vectors`` (n x d) with their ``ids`` atomically (temp file + rename)."""
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported vector dtype {dtype!r}; choose from {sorted(DTYPES)}")
+    vectors = _normalise(vectors)
+    if vectors.ndim != 2 or len(vectors) != len(ids):
+        raise ValueError(f"Expected {len(ids)} vectors as an n x d array, got shape {vectors.shape}")
+    count, dimension = vectors.shape
+
+    if dtype == "int8":
+        codes, scales = quantize_int8(vectors)
+    else:
+        codes, scales = vectors.astype(np.float16), np.empty(0, dtype=np.float32)
+    id_bytes = "\n".join(ids).encode("utf-8")
+
+    vectors_off = _align(_HEADER.size)
+    scales_off = _align(vectors_off + codes.nbytes)
+    full_off = _align(scales_off + scales.nbytes)
+    ids_off = _align(full_off + (vectors.nbytes if full_precision else 0))
+    header = _HEADER.pack(MAGIC, DTYPES[dtype][0], full_precision, dimension, count,
+                          vectors_off, scales_off, full_off, ids_off, len(id_bytes))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        for offset, data in ((0, header), (vectors_off, codes), (scales_off, scales),
+                             (full_off, vectors if full_precision else b""), (ids_off, id_bytes)):
+            f.seek(offset)
+            f.write(data.tobytes() if isinstance(data, np.ndarray) else data)
+    os.replace(tmp, path)
+
+
+class VectorFile:
+    """Read-only view of a vector file; ``search`` scores the quantised codes in place."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime_ns  # a rewritten file (os.replace) gets a new mtime
+        self._mmap = np.memmap(path, dtype=np.uint8, mode="r")
+        (magic, dtype_code, has_full, self.dimension, self.count,
+         vectors_off, scales_off, full_off, ids_off, ids_len) = _HEADER.unpack_from(self._mmap[:_HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a vector file")
+        self.dtype = next(name for name, (code, _) in DTYPES.items() if code == dtype_code)
+        np_dtype = DTYPES[self.dtype][1]
+        shape = (self.count, self.dimension)
+
+        self.codes = np.ndarray(shape, dtype=np_dtype, buffer=self._mmap, offset=vectors_off)
+        self.scales = np.ndarray((self.count,), dtype=np.float32, buffer=self._mmap, offset=scales_off) \
+            if self.dtype == "int8" else None
+        self.full = np.ndarray(shape, dtype=np.float32, buffer=self._mmap, offset=full_off) if has_full else None
+        raw_ids = self._mmap[ids_off:ids_off + ids_len].tobytes().decode("utf-8")
+        self.ids = raw_ids.split("\n") if self.count else []
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes touched by a full scan (codes + scales); the float32 section is read per candidate."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, query, rows: np.ndarray = None) -> np.ndarray:
+        """Cosine similarity of ``query`` to every stored vector (or to ``rows``)."""
+        q = _normalise(query).astype(np.float32)
+        codes = self.codes if rows is None else self.codes[rows]
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+            block = codes[start:start + SCAN_BLOCK_ROWS]
+            # float16 -> float32 BLAS matmul; int8 codes are widened per block, never for the whole corpus
+            out[start:start + len(block)] = block.astype(np.float32) @ q
+        if self.scales is not None:
+            out *= self.scales if rows is None else self.scales[rows]
+        return out
+
+    def search(self, query, k: int = 10, mask: np.ndarray = None, rescore: int = 0) -> list:
+        """
+        Top ``k`` ``(id, score)`` pairs. ``mask`` (bool per stored vector) restricts the candidates;
+        ``rescore`` > 0 re-ranks that many quantised candidates with the float32 vectors.
+        """
+        rows = np.flatnonzero(mask) if mask is not None else None
+        scores = self.scores(query, rows)
+        if not len(scores):
+            return []
+        n = min(len(scores), max(k, rescore if self.full is not None else 0))
+        top = np.argpartition(-scores, n - 1)[:n]
+        candidates = rows[top] if rows is not None else top
+        if rescore and self.full is not None:
+            candidates = np.sort(candidates)  # ascending rows: sequential reads of the float32 section
+            scores_top = self.full[candidates] @ _normalise(query)
+        else:
+            scores_top = scores[top]
+        order = np.argsort(-scores_top)[:k]
+        return [(self.ids[candidates[i]], float(scores_top[i])) for i in order]
+
+    def get(self, chunk_ids: list) -> np.ndarray:
+        """Dequantised (or full precision, when stored) unit vectors for ``chunk_ids``."""
+        rows = [self._positions[c] for c in chunk_ids]
+        if self.full is not None:
+            return np.array(self.full[rows])
+        vectors = self.codes[rows].astype(np.float32)
+        return vectors * self.scales[rows, None] if self.scales is not None else vectors
@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+
+"""
+Latency/throughput benchmarks for the pipeline, PDF parsing, retrieval and the API.
+Run with ``python -m benchmarks.run_benchmarks``.
+"""
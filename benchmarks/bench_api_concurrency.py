@@ -0,0 +1,154 @@
+# benchmarks/bench_api_concurrency.py
+
+"""
+Concurrent-request capacity of one API worker: async routes vs the old sync handlers.
+
+    python -m benchmarks.bench_api_concurrency                      # 16/128/256 clients, fake backends
+    python -m benchmarks.bench_api_concurrency -c 32 200 --llm-latency-ms 500 --max-inflight 64
+
+For each client count, that many clients each POST /proposal/generate_proposal at once
+(retrying after ``Retry-After`` on 429) while a probe polls /proposal/agent_status.
+"legacy" serves the same pipeline from a sync ``def`` handler, i.e. on Starlette's
+shared 40-thread pool. Reports generate latency, 429s, and probe latency under load.
+Finally a request whose ``X-Request-Timeout`` is a third of a full run shows how many
+LLM calls a cancelled run still makes compared with a full run.
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import time
+import uuid
+from collections import Counter
+
+from benchmarks.harness import percentile
+from benchmarks.run_benchmarks import _rfp_inputs
+
+
+def _legacy_app():
+    from fastapi import FastAPI
+
+    from backend.agent_status_tracker import get_status
+    from routes.proposal_routes import RFPRequest
+
+    app = FastAPI()
+
+    @app.post("/proposal/generate_proposal")
+    def generate(request: RFPRequest):
+        from backend.agentic_pipeline import run_pipeline
+        return {"proposal": run_pipeline(request.rfp_text, uuid.uuid4().hex[:12])["proposal"]}
+
+    @app.get("/proposal/agent_status")
+    def agent_status():
+        return get_status()
+
+    return app
+
+
+async def _load(app, clients: int) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        latencies, statuses, probes = [], Counter(), []
+        done = asyncio.Event()
+
+        async def generate(rfp_text):
+            start = time.perf_counter()
+            while True:
+                response = await client.post("/proposal/generate_proposal", json={"rfp_text": rfp_text})
+                statuses[response.status_code] += 1
+                if response.status_code != 429:
+                    break
+                await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+            latencies.append(time.perf_counter() - start)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/proposal/agent_status")
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(generate(text) for text in _rfp_inputs(clients)))
+        wall = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    return {
+        "clients": clients,
+        "ok": statuses[200],
+        "rejected": statuses[429],
+        "errors": sum(n for status, n in statuses.items() if status not in (200, 429)),
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "rps": statuses[200] / wall if wall else 0.0,
+        "probe_p95_ms": percentile(probes, 95) * 1000,
+    }
+
+
+async def _cancelled_run_calls(app) -> tuple:
+    """LLM calls of a full run vs a run whose client gave up a third of the way through."""
+    import httpx
+
+    from backend.tracing import get_run_stats
+
+    def calls(run_id):
+        stats = get_run_stats(run_id) or {"stages": {}}
+        return sum(stage["llm_calls"] for stage in stats["stages"].values())
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        full = await client.post("/proposal/generate_proposal", json={"rfp_text": _rfp_inputs(1)[0] + "\nfull"})
+        cutoff = (time.perf_counter() - start) / 3
+        cut = await client.post("/proposal/generate_proposal", json={"rfp_text": _rfp_inputs(1)[0] + "\ncut"},
+                                headers={"X-Request-Timeout": f"{cutoff:.2f}"})
+        await asyncio.sleep(2 * cutoff)  # let the abandoned worker reach its next cancellation check
+    cut_run = re.search(r"Resume run (\w+)", cut.json().get("detail", ""))
+    return calls(full.json()["run_id"]), cutoff, cut.status_code, calls(cut_run.group(1)) if cut_run else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-c", "--clients", nargs="+", type=int, default=[16, 128, 256])
+    parser.add_argument("--llm-latency-ms", type=int, default=200)
+    parser.add_argument("--max-inflight", type=int, default=None, help="MAX_INFLIGHT_REQUESTS for the async app")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("EMBEDDINGS_BACKEND", "fake")
+    os.environ.setdefault("VECTOR_BACKEND", "memory")
+    os.environ.setdefault("WARMUP_MODE", "off")
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ.setdefault("FAKE_LLM_TOKENS_PER_SEC", "0")
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", "1024")  # measure the API layer, not the client-side LLM cap
+    if args.max_inflight:
+        os.environ["MAX_INFLIGHT_REQUESTS"] = str(args.max_inflight)
+
+    import backend.agentic_pipeline  # noqa: F401  (import cost is not part of the measurement)
+    from backend.app import app
+
+    rows = []
+    for clients in args.clients:
+        for name, target in (("legacy-sync", _legacy_app()), ("async", app)):
+            print(f"▶️ {name}: {clients} concurrent clients...")
+            rows.append({"mode": name, **asyncio.run(_load(target, clients))})
+
+    header = f"{'mode':<13}{'clients':>8}{'ok':>6}{'429s':>6}{'err':>5}{'p50 s':>8}{'p95 s':>8}{'req/s':>8}{'probe p95 ms':>14}"
+    print("\n" + header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['mode']:<13}{r['clients']:>8}{r['ok']:>6}{r['rejected']:>6}{r['errors']:>5}"
+              f"{r['p50_s']:>8.2f}{r['p95_s']:>8.2f}{r['rps']:>8.2f}{r['probe_p95_ms']:>14.1f}")
+
+    full_calls, cutoff, status, cut_calls = asyncio.run(_cancelled_run_calls(app))
+    print(f"\n🛑 Deadline: a full run made {full_calls} LLM calls; a run cut off after {cutoff:.2f} s returned "
+          f"{status} and made {cut_calls} before stopping.")
+
+
+if __name__ == "__main__":
+    main()
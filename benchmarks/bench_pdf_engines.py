@@ -0,0 +1,102 @@
+# benchmarks/bench_pdf_engines.py
+
+"""
+Throughput and output equivalence of the PDF extraction engines.
+
+    python -m benchmarks.bench_pdf_engines                    # all engines on docs/*.pdf
+    python -m benchmarks.bench_pdf_engines --engines pymupdf pdfplumber -n 20 -c 4
+
+Only extraction (text, tables, image positions) is measured; OCR is identical for every
+engine. Equivalence is reported against ``--reference`` (pdfplumber by default):
+
+- text: word-sequence similarity (difflib ratio) of the page text
+- tables: tables found vs the reference, and F1 over non-empty table cells
+- images: embedded images found vs the reference
+- fallback: pages whose tables were re-extracted with pdfplumber
+"""
+
+import argparse
+import difflib
+import glob
+import os
+import sys
+from collections import Counter
+
+from benchmarks.harness import print_table, run_load
+
+
+def _cell_f1(reference: list, candidate: list) -> float:
+    ref = Counter(cell for t in reference for row in t for cell in row if cell)
+    cand = Counter(cell for t in candidate for row in t for cell in row if cell)
+    if not ref and not cand:
+        return 1.0
+    overlap = sum((ref & cand).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(cand.values()), overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def compare(reference_pages: list, pages: list) -> dict:
+    ref_words = " ".join(p.text for p in reference_pages).split()
+    words = " ".join(p.text for p in pages).split()
+    ref_tables = [t for p in reference_pages for t in p.tables]
+    tables = [t for p in pages for t in p.tables]
+    return {
+        "text_similarity": difflib.SequenceMatcher(None, ref_words, words, autojunk=False).ratio(),
+        "tables": len(tables),
+        "reference_tables": len(ref_tables),
+        "cell_f1": _cell_f1(ref_tables, tables),
+        "images": sum(len(p.images) for p in pages),
+        "reference_images": sum(len(p.images) for p in reference_pages),
+        "fallback_pages": sum("+" in p.engine for p in pages),
+        "pages": len(pages),
+    }
+
+
+def main(argv=None) -> int:
+    from backend import pdf_engines
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", default=sorted(pdf_engines.ENGINES))
+    parser.add_argument("--reference", default="pdfplumber")
+    parser.add_argument("--pdfs", nargs="+", default=None, help="PDF files (default: docs/*.pdf)")
+    parser.add_argument("-n", "--iterations", type=int, default=10, help="Parses per PDF per engine")
+    parser.add_argument("-c", "--concurrency", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    pdfs = args.pdfs or sorted(glob.glob(os.path.join("docs", "*.pdf")))
+    if not pdfs:
+        print("⚠️ No PDFs found.")
+        return 1
+
+    page_count = sum(len(pdf_engines.extract_pdfplumber(pdf)) for pdf in pdfs)
+    results = []
+    for engine in args.engines:
+        pdf_engines.ENGINES[engine](pdfs[0])  # warm up imports
+        result = run_load(f"pdf.{engine}", pdf_engines.ENGINES[engine], pdfs * args.iterations, args.concurrency)
+        result["pages_per_s"] = result["throughput_rps"] * page_count / len(pdfs)
+        results.append(result)
+    print_table(results)
+    print()
+    for r in results:
+        print(f"{r['name']:<36}{r['pages_per_s']:>10.1f} pages/s")
+
+    print(f"\nEquivalence vs {args.reference}:")
+    header = f"{'engine':<14}{'pdf':<28}{'text sim':>9}{'tables':>9}{'cell F1':>9}{'images':>9}{'fallback':>10}"
+    print(header)
+    print("-" * len(header))
+    for pdf in pdfs:
+        reference = pdf_engines.ENGINES[args.reference](pdf)
+        for engine in args.engines:
+            if engine == args.reference:
+                continue
+            m = compare(reference, pdf_engines.ENGINES[engine](pdf))
+            print(f"{engine:<14}{os.path.basename(pdf)[:27]:<28}{m['text_similarity']:>9.3f}"
+                  f"{m['tables']:>4}/{m['reference_tables']:<4}{m['cell_f1']:>9.3f}"
+                  f"{m['images']:>4}/{m['reference_images']:<4}{m['fallback_pages']:>5}/{m['pages']:<4}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# benchmarks/bench_rerank.py
+
+"""
+CPU latency of the reranking stage and the prompt context it saves.
+
+    python -m benchmarks.bench_rerank                                  # torch vs int8, 10/20/50 candidates
+    python -m benchmarks.bench_rerank --backends torch int8 onnx --batch-sizes 8 32 --threads 4
+
+Candidates are passages cut from the reference proposals in docs/ (repeated as needed).
+For each backend, candidate count and batch size it reports latency percentiles, then
+the estimated prompt tokens of the top-3 raw documents vs the reranked passages.
+"""
+
+import argparse
+import os
+
+from benchmarks.harness import print_table, run_load
+from benchmarks.run_benchmarks import SAMPLE_RFP, _rfp_inputs
+
+
+def _documents() -> list:
+    from backend.pinecone_utils import _load_docs_texts
+    try:
+        docs = _load_docs_texts()
+    except FileNotFoundError:
+        docs = []
+    return docs or [SAMPLE_RFP * 20]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8"], choices=["torch", "int8", "onnx", "lexical"])
+    parser.add_argument("--candidates", nargs="+", type=int, default=[10, 20, 50], help="Passages scored per query")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[32])
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = default)")
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        os.environ["RERANK_THREADS"] = str(args.threads)
+    from backend import reranker
+
+    documents = _documents()
+    passages = [p for doc in documents for p in reranker.split_passages(doc)]
+    queries = [" ".join(q.split()[:reranker.QUERY_WORDS]) for q in _rfp_inputs(args.iterations)]
+
+    results = []
+    for backend in args.backends:
+        reranker.RERANK_BACKEND = backend
+        reranker.scorer.reset()
+        score = reranker.scorer.get()  # model load is not part of the measurement
+        for n in args.candidates:
+            candidates = [passages[i % len(passages)] for i in range(n)]
+            for batch_size in args.batch_sizes:
+                reranker.RERANK_BATCH_SIZE = batch_size
+                score([(queries[0], candidates[0])])  # warm up kernels / allocator
+                results.append(run_load(
+                    f"rerank.{backend}.n{n}.b{batch_size}",
+                    lambda q: score([(q, c) for c in candidates]),
+                    queries,
+                ))
+    print_table(results)
+
+    raw = sum(reranker.estimate_tokens(doc) for doc in documents[:3])
+    kept = reranker.rerank(SAMPLE_RFP, documents, top_n=3)
+    reranked = sum(reranker.estimate_tokens(text) for text in kept)
+    print(f"\n📉 Reference context: ~{raw} tokens (top-3 documents) → ~{reranked} tokens "
+          f"(top-3 reranked passages, {args.backends[-1]}), {100 * (1 - reranked / raw):.0f}% less")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_serve_scaling.py
+
+"""
+Throughput scaling of ``backend.serve`` with the number of forked workers.
+
+    python -m benchmarks.bench_serve_scaling                          # 1, 2, 4, ... up to the core count
+    python -m benchmarks.bench_serve_scaling --workers 1 2 4 8 --requests 2000 --concurrency 32
+
+Each configuration starts ``python -m backend.serve --workers W`` with the offline fakes,
+waits until every worker answers, then drives a CPU-bound endpoint (``/retrieval/search``:
+query embedding + vector scoring + reranking) with concurrent HTTP clients. Reported:
+req/s, speedup and efficiency vs one worker, and memory — total RSS of the workers against
+their PSS (proportional set size), whose gap is the preloaded memory shared copy-on-write.
+Scaling is bounded by the physical cores: on a 1-core machine every row stays near 1x.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+from benchmarks.bench_startup import _env, _free_port
+from benchmarks.harness import print_table, run_load
+
+QUERIES = [
+    "cloud migration for a regional bank", "data platform modernisation", "cybersecurity managed services",
+    "ERP implementation timeline", "customer analytics for retail", "supply chain optimisation",
+    "public sector digital transformation", "healthcare claims automation",
+]
+
+
+def _get(url: str, timeout: float = 30) -> dict:
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def _wait_for_workers(base: str, workers: int, timeout: float = 120) -> set:
+    """Polls /ready until ``workers`` distinct worker pids have answered."""
+    pids, deadline = set(), time.monotonic() + timeout
+    while time.monotonic() < deadline and len(pids) < workers:
+        try:
+            info = _get(f"{base}/ready", timeout=2).get("worker") or {}
+            pids.add(info.get("pid"))
+        except OSError:
+            time.sleep(0.1)
+    return pids
+
+
+def _memory_kb(pid: int, field: str) -> int:
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def run(workers: int, requests: int, concurrency: int) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "backend.serve", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        pids = _wait_for_workers(base, workers)
+        if len(pids) < workers:
+            raise RuntimeError(f"Only {len(pids)} of {workers} workers answered")
+        urls = [f"{base}/retrieval/search?" + urllib.parse.urlencode({"query": QUERIES[i % len(QUERIES)], "top_k": 5})
+                for i in range(requests)]
+        run_load(f"warm-up w={workers}", _get, urls[:concurrency * 2], concurrency)  # lazy clients, caches
+        result = run_load(f"/retrieval/search workers={workers}", _get, urls, concurrency)
+        result["rss_mb"] = sum(_memory_kb(pid, "Rss") for pid in pids) / 1024
+        result["pss_mb"] = sum(_memory_kb(pid, "Pss") for pid in pids) / 1024
+        return result
+    finally:
+        proc.terminate()
+        proc.wait(timeout=90)
+
+
+def main(argv=None) -> int:
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, *(2 ** i for i in range(1, 8) if 2 ** i <= cores), cores})
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    results = [run(w, args.requests, args.concurrency) for w in args.workers]
+    print(f"{cores} CPU cores\n")
+    print_table(results)
+    print(f"\n{'workers':>8}{'req/s':>10}{'speedup':>9}{'efficiency':>12}{'RSS MB':>9}{'PSS MB':>9}")
+    single = results[0]["throughput_rps"] / args.workers[0]
+    for workers, r in zip(args.workers, results):
+        speedup = r["throughput_rps"] / single if single else 0.0
+        print(f"{workers:>8}{r['throughput_rps']:>10.1f}{speedup:>8.2f}x{speedup / workers:>11.0%}"
+              f"{r['rss_mb']:>9.0f}{r['pss_mb']:>9.0f}")
+    if cores == 1:
+        print("\n⚠️ Single-core machine: extra workers cannot add throughput here.")
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
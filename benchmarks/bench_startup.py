@@ -0,0 +1,130 @@
+# benchmarks/bench_startup.py
+
+"""
+Import-time profile and startup benchmark for the FastAPI app.
+
+    python -m benchmarks.bench_startup                 # profile + timings
+    python -m benchmarks.bench_startup --budget 1.0    # fail if startup exceeds 1s
+
+Reports the slowest imports (``python -X importtime``), the time to import
+``backend.app`` in a fresh interpreter, and the time until a uvicorn process
+answers its first request.
+"""
+
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_profile(module: str = "backend.app", top: int = 15) -> dict:
+    """Returns the slowest modules by cumulative time and total self time per top-level package."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_env(),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules, packages = [], defaultdict(float)
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, name = int(match.group(1)), int(match.group(2)), match.group(4)
+        modules.append((name, self_us / 1e6, cumulative_us / 1e6))
+        packages[name.split(".")[0]] += self_us / 1e6
+    slowest = sorted(modules, key=lambda m: m[2], reverse=True)[:top]
+    heaviest = sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]
+    return {"slowest_modules": slowest, "packages": heaviest}
+
+
+def import_time(module: str = "backend.app", runs: int = 5) -> list:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=_env(), check=True)
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def time_to_first_request(runs: int = 3, timeout: float = 30.0) -> list:
+    timings = []
+    for _ in range(runs):
+        port = _free_port()
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port), "--log-level", "warning"],
+            env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while time.perf_counter() - start < timeout:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as resp:
+                        if resp.status == 200:
+                            timings.append(time.perf_counter() - start)
+                            break
+                except OSError:
+                    time.sleep(0.02)
+        finally:
+            proc.terminate()
+            proc.wait()
+    return timings
+
+
+def _env() -> dict:
+    # Startup must not depend on credentials or network; the fakes keep warm-up offline too
+    env = dict(os.environ)
+    env.setdefault("LLM_BACKEND", "fake")
+    env.setdefault("EMBEDDINGS_BACKEND", "fake")
+    env.setdefault("VECTOR_BACKEND", "memory")
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend.app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget", type=float, default=None, help="Fail if median time to first request exceeds this (s)")
+    args = parser.parse_args(argv)
+
+    profile = import_profile(args.module, args.top)
+    print(f"📦 Slowest imports under {args.module} (cumulative):")
+    for name, self_s, cumulative_s in profile["slowest_modules"]:
+        print(f"  {cumulative_s * 1000:9.1f} ms  (self {self_s * 1000:7.1f} ms)  {name}")
+    print("\n📦 Self time by top-level package:")
+    for package, seconds in profile["packages"]:
+        print(f"  {seconds * 1000:9.1f} ms  {package}")
+
+    imports = import_time(args.module, args.runs)
+    first_request = time_to_first_request(max(1, args.runs // 2))
+    print(f"\n⏱️ import {args.module}: median {statistics.median(imports) * 1000:.0f} ms over {len(imports)} runs")
+    if first_request:
+        print(f"⏱️ process start → first response: median {statistics.median(first_request) * 1000:.0f} ms")
+    else:
+        print("❌ Server did not answer within the timeout.")
+        return 1
+
+    if args.budget is not None and statistics.median(first_request) > args.budget:
+        print(f"❌ Startup exceeds budget of {args.budget:.2f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
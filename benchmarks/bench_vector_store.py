@@ -0,0 +1,122 @@
+# benchmarks/bench_vector_store.py
+
+"""
+Footprint, load time, latency and recall of the compact vector file formats vs float32.
+
+    python -m benchmarks.bench_vector_store                       # 20k synthetic 1536-dim vectors
+    python -m benchmarks.bench_vector_store -n 100000 --queries 200 --rescore 50
+
+The corpus is synthetic (clustered unit vectors, so neighbours are close as with real
+embeddings); queries are perturbed corpus vectors. Recall@k is measured against an exact
+float32 search. Reported per format:
+
+- file: bytes on disk; scan: bytes read by a full scan (float32 re-score section excluded)
+- open: time to map the file and read the id table; first: first (cold) query
+- p50/p95: query latency after warm-up
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.harness import percentile
+
+
+def make_corpus(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _time_queries(search, queries: np.ndarray) -> tuple:
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(search(q))
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def main(argv=None) -> int:
+    from backend import vector_file
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--vectors", type=int, default=20000)
+    parser.add_argument("-d", "--dimension", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, default=50, help="Candidates re-scored at full precision")
+    args = parser.parse_args(argv)
+
+    corpus = make_corpus(args.vectors, args.dimension, args.clusters)
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.integers(0, args.vectors, args.queries)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape, dtype=np.float32) / np.sqrt(args.dimension)
+    ids = [f"chunk-{i:07d}" for i in range(args.vectors)]
+    k = args.k
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Baseline: plain float32 matrix (.npy), memory-mapped and scanned with one matmul
+        baseline_path = os.path.join(tmp, "float32.npy")
+        np.save(baseline_path, corpus)
+        start = time.perf_counter()
+        baseline = np.load(baseline_path, mmap_mode="r")
+        open_s = time.perf_counter() - start
+
+        def exact(q):
+            scores = baseline @ q
+            return np.argsort(-scores)[:k]
+
+        start = time.perf_counter()
+        exact(queries[0])
+        first_s = time.perf_counter() - start
+        latencies, truth = _time_queries(exact, queries)
+        truth = [set(ids[i] for i in t) for t in truth]
+        rows.append(("float32", os.path.getsize(baseline_path), baseline.nbytes, open_s, first_s, latencies, 1.0))
+
+        for dtype in ("float16", "int8"):
+            path = os.path.join(tmp, f"{dtype}.vec")
+            vector_file.write(path, ids, corpus, dtype=dtype, full_precision=True)
+            for rescore in (0, args.rescore):
+                start = time.perf_counter()
+                store = vector_file.VectorFile(path)
+                open_s = time.perf_counter() - start
+                start = time.perf_counter()
+                store.search(queries[0], k, rescore=rescore)
+                first_s = time.perf_counter() - start
+                latencies, results = _time_queries(lambda q: store.search(q, k, rescore=rescore), queries)
+                recall = np.mean([len(truth[i] & {r[0] for r in res}) / k for i, res in enumerate(results)])
+                name = f"{dtype}+rescore{rescore}" if rescore else dtype
+                rows.append((name, os.path.getsize(path), store.nbytes, open_s, first_s, latencies, recall))
+                del store
+
+        # Compact-only files (no float32 re-score section) for the on-disk size
+        compact = {}
+        for dtype in ("float16", "int8"):
+            path = os.path.join(tmp, f"{dtype}.compact.vec")
+            vector_file.write(path, ids, corpus, dtype=dtype, full_precision=False)
+            compact[dtype] = os.path.getsize(path)
+
+    python_lists = args.vectors * (56 + 8 * args.dimension + 24 * args.dimension)  # list + boxed floats
+    print(f"{args.vectors} x {args.dimension} vectors, {args.queries} queries, recall@{k} vs exact float32\n")
+    header = (f"{'format':<22}{'file MB':>9}{'scan MB':>9}{'open ms':>9}{'first ms':>10}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'recall':>8}")
+    print(header)
+    print("-" * len(header))
+    for name, file_bytes, scan_bytes, open_s, first_s, latencies, recall in rows:
+        print(f"{name:<22}{file_bytes / 1e6:>9.1f}{scan_bytes / 1e6:>9.1f}{open_s * 1000:>9.2f}{first_s * 1000:>10.1f}"
+              f"{percentile(latencies, 50) * 1000:>9.2f}{percentile(latencies, 95) * 1000:>9.2f}{recall:>8.3f}")
+    print(f"\nWithout the float32 re-score section: float16 {compact['float16'] / 1e6:.1f} MB, "
+          f"int8 {compact['int8'] / 1e6:.1f} MB; as Python lists of floats ~{python_lists / 1e6:.0f} MB in RAM")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# benchmarks/harness.py
+
+"""Shared helpers: concurrent load runner, percentile summaries and baseline comparison."""
+
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(name: str, latencies: list, wall_time: float, errors: int = 0, concurrency: int = 1) -> dict:
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": (statistics.mean(latencies) * 1000) if latencies else 0.0,
+        "throughput_rps": len(latencies) / wall_time if wall_time > 0 else 0.0,
+    }
+
+
+def run_load(name: str, fn, inputs: list, concurrency: int = 1) -> dict:
+    """Calls ``fn(x)`` for every input using ``concurrency`` threads; returns a latency summary."""
+    latencies, errors = [], 0
+
+    def timed(x):
+        start = time.perf_counter()
+        try:
+            fn(x)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, error in pool.map(timed, inputs):
+            latencies.append(elapsed)
+            errors += error is not None
+    return summarize(name, latencies, time.perf_counter() - start, errors, concurrency)
+
+
+def run_async_load(name: str, make_request, inputs: list, concurrency: int = 1) -> dict:
+    """Async counterpart of ``run_load`` for ASGI clients: ``await make_request(x)`` must return a response."""
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def one(x):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await make_request(x)
+                    errors += response.status_code >= 400
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(x) for x in inputs))
+        return summarize(name, latencies, time.perf_counter() - start, errors, concurrency)
+
+    return asyncio.run(main())
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> dict:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save_baseline(results: list, path: Path = BASELINE_FILE):
+    path.write_text(json.dumps({r["name"]: r for r in results}, indent=2))
+
+
+def compare_to_baseline(results: list, baseline: dict, tolerance: float = 0.2) -> list:
+    """Returns human-readable regressions (p95 latency up or throughput down by more than ``tolerance``)."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result["name"])
+        if not base:
+            continue
+        if base["p95_ms"] > 0 and result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result['name']}: p95 {result['p95_ms']:.1f}ms vs baseline {base['p95_ms']:.1f}ms")
+        if base["throughput_rps"] > 0 and result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result['name']}: throughput {result['throughput_rps']:.2f}/s vs baseline {base['throughput_rps']:.2f}/s"
+            )
+    return regressions
+
+
+def print_table(results: list):
+    header = f"{'benchmark':<36}{'n':>6}{'err':>5}{'conc':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['name']:<36}{r['requests']:>6}{r['errors']:>5}{r['concurrency']:>6}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['throughput_rps']:>9.2f}"
+        )
@@ -0,0 +1,161 @@
+# benchmarks/run_benchmarks.py
+
+"""
+End-to-end benchmark suite.
+
+    python -m benchmarks.run_benchmarks                       # all suites, fake backends
+    python -m benchmarks.run_benchmarks --suite pipeline api -c 8
+    python -m benchmarks.run_benchmarks --update-baseline     # store current numbers
+    python -m benchmarks.run_benchmarks --check               # CI: a missing baseline is a failure too
+    python -m benchmarks.run_benchmarks --live                # real OpenAI/Pinecone (costs money)
+
+By default LLM, embeddings and vector store use the deterministic fakes from
+``backend.fake_backends`` so numbers are reproducible and no network is needed.
+Exits non-zero when a benchmark regresses past ``--tolerance`` against the baseline, and
+with ``--check`` also when there is no baseline for a benchmark (so a gate can't pass by
+having nothing to compare against). Baselines are machine-specific: create one with
+``--update-baseline`` on the machine that runs the check.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import uuid
+
+from benchmarks.harness import (
+    compare_to_baseline,
+    load_baseline,
+    print_table,
+    run_async_load,
+    run_load,
+    save_baseline,
+)
+
+SAMPLE_RFP = """
+Request for Proposal: Retail Analytics Modernization
+Client: Northwind Retail Group, North America. Proposal deadline: June 30, 2025.
+We are seeking a partner to deliver inventory optimization, demand forecasting and
+personalized customer recommendations. The solution must integrate with our existing
+ERP, comply with PCI-DSS, and be delivered within 9 months on a fixed budget.
+Responses must include pricing, an implementation timeline, team bios and case studies.
+"""
+
+
+def _rfp_inputs(n: int) -> list:
+    # Vary the text slightly so per-prompt caches do not turn the benchmark into a cache benchmark
+    return [f"{SAMPLE_RFP}\nReference number: RFP-{i:04d}" for i in range(n)]
+
+
+def bench_pipeline(args) -> list:
+    from backend.agentic_pipeline import run_pipeline
+
+    def run(rfp_text):
+        run_pipeline(rfp_text, f"bench-{uuid.uuid4().hex[:8]}")  # distinct checkpoint thread per call
+
+    return [run_load("pipeline.invoke", run, _rfp_inputs(args.iterations), args.concurrency)]
+
+
+def bench_parse(args) -> list:
+    from backend.parse_rfp_pdf import parse_rfp_pdf
+
+    pdfs = sorted(glob.glob(os.path.join("docs", "*.pdf")))
+    if not pdfs:
+        print("⚠️ No PDFs in docs/, skipping parse benchmark.")
+        return []
+    inputs = [pdfs[i % len(pdfs)] for i in range(max(args.iterations, len(pdfs)))]
+    return [run_load("parse_rfp_pdf.docs", parse_rfp_pdf, inputs, args.concurrency)]
+
+
+def bench_retrieval(args) -> list:
+    from backend.pinecone_utils import retrieve_similar_docs
+
+    return [run_load("retrieve_similar_docs", retrieve_similar_docs, _rfp_inputs(args.iterations), args.concurrency)]
+
+
+def bench_api(args) -> list:
+    import httpx
+    from backend.app import app
+
+    transport = httpx.ASGITransport(app=app)
+    results = []
+
+    async def generate(rfp_text):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await client.post("/proposal/generate_proposal", json={"rfp_text": rfp_text})
+
+    async def retrieve(query):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await client.get("/retrieval/retrieve_docs", params={"query": query})
+
+    async def agent_log(_):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await client.get("/proposal/agent_log", params={"limit": 200})
+
+    inputs = _rfp_inputs(args.iterations)
+    results.append(run_async_load("api.generate_proposal", generate, inputs, args.concurrency))
+    results.append(run_async_load("api.retrieve_docs", retrieve, inputs, args.concurrency))
+    results.append(run_async_load("api.agent_log", agent_log, inputs * 5, args.concurrency))
+    return results
+
+
+SUITES = {
+    "pipeline": bench_pipeline,
+    "parse": bench_parse,
+    "retrieval": bench_retrieval,
+    "api": bench_api,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", nargs="+", choices=sorted(SUITES), default=sorted(SUITES))
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs baseline (0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="Fail when a benchmark has no baseline")
+    parser.add_argument("--live", action="store_true", help="Use real OpenAI/Pinecone instead of the fakes")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if not args.live:
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        os.environ.setdefault("EMBEDDINGS_BACKEND", "fake")
+        os.environ.setdefault("VECTOR_BACKEND", "memory")
+
+    results = []
+    for name in args.suite:
+        print(f"▶️ Running {name} benchmark...")
+        results.extend(SUITES[name](args))
+
+    print()
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(results)
+        print("\n✅ Baseline updated.")
+        return 0
+
+    baseline = load_baseline()
+    missing = [r["name"] for r in results if r["name"] not in baseline]
+    if missing and args.check:
+        print(f"\n❌ No baseline for: {', '.join(missing)}; run with --update-baseline on this machine first.")
+        return 1
+    if not baseline:
+        print("\nℹ️ No baseline stored yet; run with --update-baseline to create one.")
+        return 0
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"❌ Regression: {line}")
+    if not regressions:
+        print("\n✅ No regressions against baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
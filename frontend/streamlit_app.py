@@ -1,6 +1,5 @@
 import streamlit as st
 import requests
-from fpdf import FPDF
 import time
 import os
 
@@ -36,14 +35,31 @@ if not st.session_state.proposal_generated:
             st.success(f"✅ File Uploaded: {result['filename']}")
             st.write("📜 **Extracted Text Preview:**", extracted_rfp_text[:500])
 
-            # Generate the initial proposal
-            proposal_response = requests.post(
-                f"{API_URL}/proposal/generate_proposal",
-                json={
-                    "rfp_text": extracted_rfp_text,
-                    "retrieved_docs": []
-                }
-            )
+            # Near-identical earlier RFP: offer to adapt its proposal instead of running the full pipeline
+            similar = result.get("similar_rfps") or []
+            reuse = False
+            if similar and result.get("rfp_id"):
+                match = similar[0]
+                st.info(f"♻️ This RFP is {match['similarity']:.0%} similar to {match.get('filename') or match['rfp_id']}.")
+                reuse = st.checkbox("Reuse its proposal and only apply the changes (faster)", value=True)
+
+            if reuse:
+                proposal_response = requests.post(
+                    f"{API_URL}/proposal/reuse_proposal",
+                    json={"rfp_id": result["rfp_id"], "source_rfp_id": similar[0]["rfp_id"]}
+                )
+            else:
+                # Generate the initial proposal
+                proposal_response = requests.post(
+                    f"{API_URL}/proposal/generate_proposal",
+                    json={
+                        # The server re-reads the full parsed text (cached by blob hash); extracted_text is a preview
+                        "upload_id": result.get("upload_id"),
+                        "rfp_text": "" if result.get("upload_id") else extracted_rfp_text,
+                        "retrieved_docs": [],
+                        "rfp_id": result.get("rfp_id")
+                    }
+                )
             if proposal_response.status_code == 200:
                 gen_result = proposal_response.json()
 
@@ -125,32 +141,20 @@ if st.button("Submit and Export as PDF"):
         # Update session state with the fetched proposal
         st.session_state.current_proposal = final_proposal_text
 
-        # Create the PDF using the latest refined proposal
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-
-        font_path = os.path.join(current_dir, "fonts", "DejaVuSans.ttf")
-
-        pdf.add_font("DejaVu", "", font_path, uni=True)
-        pdf.set_font("DejaVu", "", 11)
-    
-        pdf.set_left_margin(10)
-        pdf.set_right_margin(10)
-        formatted_text = "\n".join(
-            line.strip() for line in final_proposal_text.split("\n") if line.strip()
-        )
-        pdf.multi_cell(0, 8, txt=formatted_text, border=0)
-        pdf_output = bytes(pdf.output(dest="S"))
-
-        st.download_button(
-            label="📥 Download Proposal PDF",
-            data=pdf_output,
-            file_name=f"final_proposal_{int(time.time())}.pdf",  # unique filename to avoid caching issues
-            mime="application/pdf"
-        )
+        # The backend renders and caches the files; they are fetched here because the
+        # browser cannot reach API_URL in the docker-compose/railway deployments
+        version = response.json().get("version", "")
+        columns = st.columns(3)
+        for column, (fmt, label, mime) in zip(columns, [
+            ("pdf", "📥 Download Proposal PDF", "application/pdf"),
+            ("docx", "📥 Download DOCX", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+            ("md", "📥 Download Markdown", "text/markdown"),
+        ]):
+            export = requests.get(f"{API_URL}/proposal/export", params={"version": version, "format": fmt})
+            if export.status_code == 200:
+                column.download_button(label, export.content, file_name=f"final_proposal_{version}.{fmt}", mime=mime)
+            else:
+                column.error(f"❌ {fmt.upper()} export failed.")
 
 # --- Compliance & Score (Optional) ---
 # Display them if we have them in session state:
@@ -187,10 +191,26 @@ def fetch_agent_status():
         return {k: {"state": "❌ Connection error", "timestamp": "—"} for k in agent_keys}
 
 
+if "agent_log_lines" not in st.session_state:
+    st.session_state.agent_log_lines = []
+    st.session_state.agent_log_cursor = None
+
+MAX_LOG_LINES = 500
+
 def fetch_agent_log():
+    # Only fetch entries newer than the last cursor we saw
     try:
-        res = requests.get(f"{API_URL}/proposal/agent_log")
-        return res.text if res.status_code == 200 else "Log unavailable."
+        params = {"limit": 200}
+        if st.session_state.agent_log_cursor is not None:
+            params["cursor"] = st.session_state.agent_log_cursor
+        res = requests.get(f"{API_URL}/proposal/agent_log", params=params)
+        if res.status_code != 200:
+            return "Log unavailable."
+        page = res.json()
+        st.session_state.agent_log_cursor = page["next_cursor"]
+        new_lines = [f"[{e['timestamp']}] {e['agent']}: {e['status']}" for e in page["entries"]]
+        st.session_state.agent_log_lines = (st.session_state.agent_log_lines + new_lines)[-MAX_LOG_LINES:]
+        return "\n".join(st.session_state.agent_log_lines) or "No logs yet."
     except:
         return "Error retrieving logs."
 
@@ -0,0 +1,55 @@
+# routes/archive_routes.py
+
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from backend import proposal_archive
+
+archive_router = APIRouter()
+
+
+@archive_router.get("/search")
+async def search_archive(
+    q: str = Query(None, description="Full-text query (all words must match); omit to list newest first"),
+    industry: str = Query(None),
+    client: str = Query(None, description="Substring of the client name"),
+    status: str = Query(None, pattern="^(draft|accepted)$"),
+    min_score: float = Query(None, ge=0, le=10, description="Minimum weighted rubric score"),
+    rfp_hash: str = Query(None, description="Only proposals for this RFP"),
+    since: float = Query(None, description="Only proposals archived after this unix time"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Archived proposals ranked by BM25 relevance, with highlighted snippets; full text via /archive/{id}."""
+    return await asyncio.to_thread(
+        proposal_archive.search, q, industry=industry, client=client, status=status, min_score=min_score,
+        rfp_hash=rfp_hash, since=since, limit=limit, offset=offset,
+    )
+
+
+@archive_router.get("/stats")
+async def archive_stats():
+    """Archived proposals per status and how many accepted ones are in the retrieval index."""
+    return await asyncio.to_thread(proposal_archive.stats)
+
+
+@archive_router.post("/reindex")
+async def reindex_pending():
+    """Queue accepted proposals that are not yet in the retrieval index (e.g. after a restart)."""
+    return {"queued": await asyncio.to_thread(proposal_archive.index_pending)}
+
+
+@archive_router.get("/{proposal_id}")
+async def get_archived_proposal(proposal_id: str):
+    """Full archived proposal with its RFP hash, metadata, scores and compliance matrix."""
+    proposal = await asyncio.to_thread(proposal_archive.get, proposal_id)
+    if proposal is None:
+        raise HTTPException(status_code=404, detail=f"Unknown proposal: {proposal_id}")
+    return proposal
+
+
+@archive_router.post("/{proposal_id}/accept")
+async def accept_proposal(proposal_id: str):
+    """Mark a proposal accepted; it is chunked, embedded and added to the retrieval index in the background."""
+    if not await asyncio.to_thread(proposal_archive.accept, proposal_id):
+        raise HTTPException(status_code=404, detail=f"Unknown proposal: {proposal_id}")
+    return {"proposal_id": proposal_id, "status": "accepted"}
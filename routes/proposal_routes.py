@@ -1,94 +1,234 @@
 # routes/proposal_routes.py
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from backend.llm_utils import expand_rfp, refine_proposal, conversation_memory, remove_unsupported_unicode
-from backend.pinecone_utils import retrieve_similar_docs
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel, conint
+from backend.llm_utils import expand_rfp, refine_proposal, conversation_memory
 from backend.agent_status_tracker import get_status, get_log
-from langchain_openai import ChatOpenAI
+from backend.tracing import get_run_stats, get_task_stats
+from backend.llm_registry import describe_routes
+from backend.export_utils import FORMATS, VERSION_RE, cached_export_path, export_proposal, proposal_version
+from backend import blob_store, proposal_archive, rfp_index
+from backend.parse_rfp_pdf import parse_blob
+from backend.request_control import run_blocking
+from fastapi.responses import FileResponse
 from dotenv import load_dotenv
+from pathlib import Path
+import asyncio
+import json
+import logging
 import os
+import threading
+import uuid
 
 load_dotenv()
 proposal_router = APIRouter()
 
-# ✅ Initialize GPT-4o
-llm = ChatOpenAI(
-    openai_api_key=os.getenv("OPENAI_API_KEY"),
-    model_name="gpt-4o-mini",
-    temperature=0.0
-)
-
 # ✅ Define request model
 class RFPRequest(BaseModel):
-    rfp_text: str
+    rfp_text: str = ""
     retrieved_docs: list = []
+    rfp_id: str = None  # from /rfp/upload_rfp; links the result to the uploaded RFP for later reuse
+    upload_id: str = None  # from /rfp/upload_rfp; used instead of rfp_text (parsed text is cached by blob hash)
 
 @proposal_router.post("/generate_proposal")
-def generate_proposal(request: RFPRequest):
+async def generate_proposal(request: RFPRequest, http_request: Request):
     """Generate a proposal in response to an RFP while leveraging retrieved documents for RAG."""
+    rfp_text, rfp_blob = request.rfp_text.strip(), None
+    if not rfp_text and request.upload_id:
+        upload = await asyncio.to_thread(blob_store.get_upload, request.upload_id)
+        if upload is None:
+            raise HTTPException(status_code=404, detail=f"Unknown upload: {request.upload_id}")
+        rfp_blob = upload["hash"]
+        rfp_text = (await run_blocking(http_request, "upload_rfp", parse_blob, rfp_blob)).strip()
+        if rfp_text.startswith("Error:"):
+            raise HTTPException(status_code=422, detail=f"Could not parse upload {request.upload_id}: {rfp_text}")
+    if not rfp_text:
+        raise HTTPException(status_code=400, detail="RFP text cannot be empty.")
+
+    run_id = uuid.uuid4().hex[:12]
+    # Completed stages are checkpointed; after a failure, timeout or disconnect the client can resume
+    resume_hint = f"Resume run {run_id} via POST /proposal/runs/{run_id}/resume."
+
+    def generate():
+        from backend.agentic_pipeline import run_pipeline
+        result = run_pipeline(rfp_text, run_id, rfp_blob)
+        _remember_result(rfp_text, run_id, result, request.rfp_id)
+        return _run_response(run_id, result)
+
     try:
-        rfp_text = request.rfp_text.strip()
-        if not rfp_text:
-            raise HTTPException(status_code=400, detail="RFP text cannot be empty.")
+        return await run_blocking(http_request, "generate_proposal", generate, detail=resume_hint)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating proposal (run {run_id}): {str(e)}. {resume_hint}")
+
+
+def _remember_result(rfp_text: str, run_id: str, result: dict, rfp_id: str = None):
+    try:
+        rfp_index.record_result(rfp_text, run_id, result, rfp_id=rfp_id)
+    except Exception as e:
+        logging.warning(f"⚠️ Could not store proposal in the RFP index: {e}")
 
-        from backend.agentic_pipeline import proposal_agentic_graph
-        result = proposal_agentic_graph.invoke({"rfp_text": rfp_text})
 
-        proposal = remove_unsupported_unicode(result["proposal"])  # ✅ clean proposal text
-        retrieved_docs = result["retrieved_docs"]
+class ReuseRequest(BaseModel):
+    rfp_id: str          # the newly uploaded RFP
+    source_rfp_id: str   # the near-duplicate whose proposal should be reused
 
-        # ✅ Store cleaned version in memory
-        conversation_memory["latest_proposal"] = proposal
 
-        return {
-            "proposal": proposal,
-            "retrieved_docs": retrieved_docs,
-            "compliance_report": remove_unsupported_unicode(result["compliance_report"]),
-            "score_report": remove_unsupported_unicode(result["score_report"])
-        }
+@proposal_router.post("/reuse_proposal")
+async def reuse_proposal(request: ReuseRequest, http_request: Request):
+    """Fast path for near-duplicate RFPs: adapt a prior proposal to the RFP changes instead of running the pipeline."""
+    run_id = uuid.uuid4().hex[:12]
 
+    def reuse():
+        target = rfp_index.get_rfp(request.rfp_id)
+        source = rfp_index.get_rfp(request.source_rfp_id)
+        if target is None or source is None:
+            raise HTTPException(status_code=404, detail="Unknown RFP id.")
+        if not source["result"] or not source["result"].get("proposal"):
+            raise HTTPException(status_code=409, detail=f"RFP {request.source_rfp_id} has no stored proposal to reuse.")
+
+        from backend.agentic_pipeline import reuse_prior_proposal
+        result = reuse_prior_proposal({"rfp_text": target["text"], "run_id": run_id, "source": source})
+        _remember_result(target["text"], run_id, result, request.rfp_id)
+        return {**_run_response(run_id, result, origin="reuse"), "reused_from": result["reused_from"],
+                "rfp_diff": result["rfp_diff"]}
+
+    try:
+        return await run_blocking(http_request, "reuse_proposal", reuse)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reusing proposal: {str(e)}")
+
+
+def _archive(proposal: str, origin: str, **details):
+    try:
+        return proposal_archive.archive(proposal, origin, **details)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating proposal: {str(e)}")
+        logging.warning(f"⚠️ Could not archive proposal: {e}")
+        return None
+
+
+def _run_response(run_id: str, result: dict, origin: str = "generate") -> dict:
+    """Remembers and archives a finished run; writes SQLite, so call it inside the ``run_blocking`` callable."""
+    proposal = result["proposal"]  # exports use a Unicode font, so the text is kept as-is
+
+    # ✅ Store latest version in memory
+    conversation_memory["latest_proposal"] = proposal
+    conversation_memory["latest_rfp_text"] = result.get("rfp_text", "")
+
+    return {
+        "run_id": run_id,
+        "archive_id": _archive(proposal, origin, rfp_text=result.get("rfp_text"), run_id=run_id, result=result),
+        "rfp_blob": result.get("rfp_blob"),
+        "proposal": proposal,
+        "retrieved_docs": result["retrieved_docs"],
+        "retrieved_sources": result.get("retrieved_sources", []),
+        "compliance_report": result["compliance_report"],
+        "compliance_matrix": result.get("compliance_matrix"),
+        "score_report": result["score_report"],
+        "scores": result.get("scores"),
+        "candidate_selection": result.get("candidate_selection"),
+        "run_stats": get_run_stats(run_id)
+    }
+
+
+@proposal_router.get("/runs/{run_id}")
+async def run_checkpoint(run_id: str):
+    """Completed stages and next stage of a checkpointed run."""
+    from backend.agentic_pipeline import get_run_checkpoint
+    checkpoint = await asyncio.to_thread(get_run_checkpoint, run_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail=f"No checkpoint for run: {run_id}")
+    return checkpoint
+
+
+@proposal_router.post("/runs/{run_id}/resume")
+async def resume_run_endpoint(run_id: str, http_request: Request):
+    """Resume a failed or interrupted run from its last completed stage."""
+    from backend.agentic_pipeline import resume_run
+    try:
+        return await run_blocking(http_request, "resume_run", lambda: _run_response(run_id, resume_run(run_id)))
+    except HTTPException:
+        raise
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No checkpoint for run: {run_id}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error resuming run {run_id}: {str(e)}")
+
+
+@proposal_router.post("/runs/{run_id}/rerun")
+async def rerun_from_stage_endpoint(
+    run_id: str, http_request: Request, stage: str = Query(..., description="e.g. 'Score Proposal'")
+):
+    """Re-run a stage and everything after it, reusing the checkpointed results of earlier stages."""
+    from backend.agentic_pipeline import rerun_from_stage
+    try:
+        return await run_blocking(http_request, "rerun_from_stage",
+                                  lambda: _run_response(run_id, rerun_from_stage(run_id, stage)))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} never reached stage {stage}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error re-running {run_id} from {stage}: {str(e)}")
 
 class RefineRequest(BaseModel):
     current_proposal: str = None
     user_feedback: str
 
 @proposal_router.post("/refine_proposal")
-def refine_proposal_endpoint(refine_data: RefineRequest):
+async def refine_proposal_endpoint(refine_data: RefineRequest, http_request: Request):
     """Refine the latest proposal based on user feedback."""
+    user_feedback = refine_data.user_feedback
+    if not user_feedback:
+        raise HTTPException(status_code=400, detail="User feedback is required.")
+
+    current_proposal = await asyncio.to_thread(conversation_memory.get, "latest_proposal", "")
+    if not current_proposal:
+        raise HTTPException(status_code=400, detail="No existing proposal to refine.")
+
     try:
-        user_feedback = refine_data.user_feedback
-        if not user_feedback:
-            raise HTTPException(status_code=400, detail="User feedback is required.")
+        return await run_blocking(http_request, "refine_proposal", _refine, current_proposal, user_feedback)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error refining proposal: {str(e)}")
 
-        current_proposal = conversation_memory.get("latest_proposal", "")
-        if not current_proposal:
-            raise HTTPException(status_code=400, detail="No existing proposal to refine.")
 
-        refined_result = refine_proposal(current_proposal, user_feedback)
-        refined_proposal = remove_unsupported_unicode(refined_result["refined_proposal"])  # ✅ clean output
+def _refine(current_proposal: str, user_feedback: str) -> dict:
+    refined_result = refine_proposal(current_proposal, user_feedback)
+    refined_proposal = refined_result["refined_proposal"]
 
-        conversation_memory["latest_proposal"] = refined_proposal
+    conversation_memory["latest_proposal"] = refined_proposal
 
-        return {
-            "refined_proposal": refined_proposal,
-            "compliance_report": remove_unsupported_unicode(refined_result.get("compliance_report", "")),
-            "score_report": remove_unsupported_unicode(refined_result.get("score_report", ""))
-        }
+    # Incremental re-check: only requirements whose mapped sections changed are re-verified
+    matrix = None
+    rfp_text = conversation_memory.get("latest_rfp_text", "")
+    if rfp_text:
+        from backend.compliance import run_compliance_check
+        matrix = run_compliance_check(rfp_text, refined_proposal)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error refining proposal: {str(e)}")
+    return {
+        "refined_proposal": refined_proposal,
+        "archive_id": _archive(refined_proposal, "refine", rfp_text=rfp_text,
+                               result={"compliance_matrix": matrix} if matrix else None),
+        "compliance_report": matrix["report"] if matrix else refined_result.get("compliance_report", ""),
+        "compliance_matrix": matrix,
+        "score_report": refined_result.get("score_report", "")
+    }
 
 
 @proposal_router.get("/get_latest_proposal")
-def get_latest_proposal():
+async def get_latest_proposal():
     """Retrieve the latest refined proposal from memory."""
-    latest_proposal = conversation_memory.get("latest_proposal", "")
+    latest_proposal = await asyncio.to_thread(conversation_memory.get, "latest_proposal", "")
     if not latest_proposal:
         return {"proposal": "No proposal found. Please generate or refine the proposal first."}
-    return {"proposal": latest_proposal}
+    return {"proposal": latest_proposal, "version": proposal_version(latest_proposal)}
 
 
 class StoreProposalRequest(BaseModel):
@@ -98,18 +238,189 @@ if "latest_proposal" not in conversation_memory:
     conversation_memory["latest_proposal"] = ""
 
 @proposal_router.post("/store_proposal")
-def store_proposal_endpoint(proposal: StoreProposalRequest):
+async def store_proposal_endpoint(proposal: StoreProposalRequest):
     """API endpoint to store the latest generated proposal."""
-    cleaned_proposal = remove_unsupported_unicode(proposal.proposal)
-    conversation_memory["latest_proposal"] = cleaned_proposal
-    return {"message": "Proposal stored successfully."}
+    def store():
+        conversation_memory["latest_proposal"] = proposal.proposal
+        return _archive(proposal.proposal, "manual")
+
+    archive_id = await asyncio.to_thread(store)
+    return {"message": "Proposal stored successfully.", "version": proposal_version(proposal.proposal),
+            "archive_id": archive_id}
+
+
+def _export_response(path, fmt: str, version: str):
+    media_type, extension = FORMATS[fmt]
+    # Versioned content never changes, so clients/proxies may cache it indefinitely
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=f"final_proposal_{version}{extension}",
+        headers={"ETag": f'"{version}-{fmt}"', "Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
+@proposal_router.get("/export")
+async def export_latest_proposal(
+    format: str = Query("pdf", pattern="^(pdf|docx|md)$"),
+    version: str = Query(None, description="Proposal version hash; defaults to the latest proposal"),
+):
+    """Stream the latest (or a previously exported) proposal version as PDF, DOCX or Markdown."""
+    latest_proposal = await asyncio.to_thread(conversation_memory.get, "latest_proposal", "")
+    latest_version = proposal_version(latest_proposal) if latest_proposal else None
+
+    if version and version != latest_version:
+        if not VERSION_RE.match(version):
+            raise HTTPException(status_code=404, detail=f"Proposal version {version} is not available.")
+        path = cached_export_path(version, format)
+        if not path.exists():
+            raise HTTPException(status_code=404, detail=f"Proposal version {version} is not available.")
+        return _export_response(path, format, version)
+
+    if not latest_proposal:
+        raise HTTPException(status_code=404, detail="No proposal found. Please generate or refine the proposal first.")
+    path = await asyncio.to_thread(export_proposal, latest_proposal, format)
+    return _export_response(path, format, latest_version)
+
+
+class ExportRequest(BaseModel):
+    proposal: str
+    format: str = "pdf"
+
+
+@proposal_router.post("/export")
+async def export_proposal_endpoint(request: ExportRequest):
+    """Render arbitrary proposal text; repeated requests for the same text are served from cache."""
+    if request.format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {request.format}")
+    if not request.proposal.strip():
+        raise HTTPException(status_code=400, detail="Proposal text cannot be empty.")
+    version = proposal_version(request.proposal)
+    path = await asyncio.to_thread(export_proposal, request.proposal, request.format)
+    return _export_response(path, request.format, version)
+
+
+class ComplianceRequest(BaseModel):
+    rfp_text: str
+    proposal: str = None  # defaults to the latest proposal
+
+
+@proposal_router.post("/compliance")
+async def compliance_matrix(request: ComplianceRequest, http_request: Request):
+    """Pass/partial/fail matrix of the RFP's requirements against a proposal."""
+    proposal = request.proposal or await asyncio.to_thread(conversation_memory.get, "latest_proposal", "")
+    if not request.rfp_text.strip() or not proposal.strip():
+        raise HTTPException(status_code=400, detail="Both RFP text and a proposal are required.")
+    from backend.compliance import run_compliance_check
+    try:
+        return await run_blocking(http_request, "compliance", run_compliance_check, request.rfp_text.strip(), proposal)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error checking compliance: {str(e)}")
+
+
+class ScoreRequest(BaseModel):
+    proposals: list
+    client_context: str = ""
+
+
+@proposal_router.post("/score")
+async def score_endpoint(request: ScoreRequest, http_request: Request):
+    """Rubric scores for one or more proposals (batched; unchanged proposals come from cache)."""
+    if not request.proposals or not all(isinstance(p, str) and p.strip() for p in request.proposals):
+        raise HTTPException(status_code=400, detail="Provide one or more non-empty proposals.")
+    from backend.scoring import RUBRIC, score_many
+    try:
+        scores = await run_blocking(http_request, "score", score_many, request.proposals, request.client_context)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error scoring proposals: {str(e)}")
+    ranked = sorted(range(len(scores)), key=lambda i: (scores[i] or {}).get("weighted", 0), reverse=True)
+    return {"rubric": {dim: weight for dim, (weight, _) in RUBRIC.items()}, "scores": scores, "ranking": ranked}
 
 
 @proposal_router.get("/agent_status")
-def agent_status():
-    return get_status()
+async def agent_status():
+    return await asyncio.to_thread(get_status)
 
 
 @proposal_router.get("/agent_log")
-def agent_log():
-    return get_log()
+async def agent_log(
+    cursor: int = Query(None, description="Return entries after this sequence number (the previous `next_cursor`)"),
+    limit: int = Query(200, ge=1, le=1000),
+    run_id: str = Query(None, description="Only entries for this pipeline run"),
+    agent: str = Query(None, description="Only entries for this agent"),
+):
+    """Page through the agent audit log without transferring the whole file."""
+    return await asyncio.to_thread(get_log, cursor=cursor, limit=limit, run_id=run_id, agent=agent)
+
+
+@proposal_router.get("/runs/{run_id}/stats")
+async def run_stats(run_id: str):
+    """Per-stage wall time, token, retry and cost stats for a pipeline run."""
+    stats = get_run_stats(run_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"Unknown run: {run_id}")
+    return stats
+
+
+@proposal_router.get("/llm_stats")
+async def llm_stats():
+    """Configured model route per LLM task alongside observed latency/token/cost stats."""
+    return {"routes": describe_routes(), "stats": get_task_stats()}
+
+
+# Batch input paths must live under these directories (comma-separated) so the API can't read arbitrary
+# paths; RFPs uploaded through /rfp/upload_rfp are referenced by ``upload_ids`` instead
+BATCH_INPUT_ROOTS = [Path(p).resolve() for p in os.getenv("BATCH_INPUT_ROOTS", "data/batch_inputs").split(",") if p]
+
+
+class BatchRequest(BaseModel):
+    paths: list[str] = []
+    upload_ids: list[str] = []
+    pipeline_workers: conint(ge=1) = 4
+    llm_concurrency: conint(ge=1) = 8
+
+
+@proposal_router.post("/batch")
+async def start_batch(request: BatchRequest):
+    """Start generating proposals for many uploaded RFPs and/or server-side files/directories in the background."""
+    from backend import blob_store
+    from backend.batch import BATCH_ROOT, run_batch_safely
+
+    if not request.paths and not request.upload_ids:
+        raise HTTPException(status_code=400, detail="At least one upload id or RFP path is required.")
+    for upload_id in request.upload_ids:
+        if await asyncio.to_thread(blob_store.get_upload, upload_id, False) is None:
+            raise HTTPException(status_code=404, detail=f"Unknown upload: {upload_id}")
+    for p in request.paths:
+        resolved = Path(p).resolve()
+        if not any(resolved == root or root in resolved.parents for root in BATCH_INPUT_ROOTS):
+            raise HTTPException(status_code=400, detail=f"Path is outside the allowed batch input directories: {p}")
+
+    batch_id = uuid.uuid4().hex[:12]
+    output_dir = BATCH_ROOT / batch_id
+    threading.Thread(
+        target=run_batch_safely,
+        args=(request.paths, output_dir),
+        kwargs={"pipeline_workers": request.pipeline_workers, "llm_concurrency": request.llm_concurrency,
+                "upload_ids": request.upload_ids},
+        daemon=True,
+    ).start()
+    return {"batch_id": batch_id, "output_dir": str(output_dir)}
+
+
+@proposal_router.get("/batch/{batch_id}")
+async def batch_status(batch_id: str):
+    """Progress of a batch: per-RFP status from its manifest, plus throughput once finished."""
+    from backend.batch import BATCH_ROOT
+
+    manifest_path = BATCH_ROOT / Path(batch_id).name / "manifest.json"
+    if not manifest_path.exists():
+        raise HTTPException(status_code=404, detail=f"Unknown batch: {batch_id}")
+    manifest = json.loads(await asyncio.to_thread(manifest_path.read_text))
+    statuses = [item.get("status") for item in manifest["items"].values()]
+    counts = {status: statuses.count(status) for status in ("pending", "parsed", "done", "failed")}
+    return {**manifest, "counts": counts, "finished": "summary" in manifest}
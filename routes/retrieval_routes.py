@@ -1,17 +1,25 @@
 # routes/retrieval_routes.py
 
-from fastapi import APIRouter, HTTPException, Query
-from backend.pinecone_utils import retrieve_similar_docs
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from backend.pinecone_utils import industry_filter, retrieve_similar_docs, search_chunks
+from backend.request_control import run_blocking
+from backend import chunk_store
 
 retrieval_router = APIRouter()
 
 @retrieval_router.get("/retrieve_docs")
-def retrieve_documents(query: str = Query(..., description="Search query for document retrieval")):
+async def retrieve_documents(
+    http_request: Request,
+    query: str = Query(..., description="Search query for document retrieval"),
+    industry: str = Query(None, description="Only documents from this industry (plus industry-neutral ones)"),
+):
     """ Retrieve relevant documents from Pinecone based on query """
     try:
         print(f"🔍 Debug: Received Query - {query}")
 
-        retrieved_docs = retrieve_similar_docs(query)
+        filters = industry_filter(industry) if industry else None
+        retrieved_docs = await run_blocking(http_request, "retrieve_docs", retrieve_similar_docs, query, filters=filters)
 
         print(f"📄 Debug: Retrieved Docs - {retrieved_docs}")
 
@@ -20,6 +28,38 @@ def retrieve_documents(query: str = Query(..., description="Search query for doc
 
         return {"retrieved_docs": retrieved_docs}
 
+    except HTTPException:
+        raise  # 429 backpressure / 504 deadline
     except Exception as e:
         print(f"❌ Debug: Retrieval Error - {str(e)}")
         return {"retrieved_docs": [f"Error retrieving documents: {str(e)}"]}
+
+
+@retrieval_router.get("/search")
+async def search(
+    http_request: Request,
+    query: str = Query(..., description="Search query"),
+    top_k: int = Query(10, ge=1, le=100),
+    industry: str = Query(None, description="Only chunks from this industry (plus industry-neutral ones)"),
+    source: str = Query(None, description="Only chunks from this reference document"),
+):
+    """Chunk ids, scores and provenance (source, pages, section, offsets); fetch text via /retrieval/chunks/{id}."""
+    filters = dict(industry_filter(industry) or {}) if industry else {}
+    if source:
+        filters["source"] = source
+    try:
+        hits = await run_blocking(http_request, "retrieve_docs", search_chunks, query, top_k, filters or None)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching documents: {str(e)}")
+    return {"hits": hits}
+
+
+@retrieval_router.get("/chunks/{chunk_id}")
+async def get_chunk(chunk_id: str):
+    """Full text and metadata of one retrieved chunk."""
+    chunk = await asyncio.to_thread(chunk_store.get_chunk, chunk_id)
+    if chunk is None:
+        raise HTTPException(status_code=404, detail=f"Unknown chunk: {chunk_id}")
+    return chunk
@@ -1,20 +1,73 @@
 # routes/rfp_routes.py
 
-from fastapi import APIRouter, UploadFile, File
-from backend.parse_rfp_pdf import parse_rfp_pdf
-import os
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request
+from backend.parse_rfp_pdf import parse_blob
+from backend import blob_store, ocr, rfp_index
+from backend.request_control import run_blocking
+import asyncio
+import logging
 
 rfp_router = APIRouter()
 
-UPLOAD_DIR = "uploaded_rfps"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @rfp_router.post("/upload_rfp")
-async def upload_rfp(file: UploadFile = File(...)): 
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+async def upload_rfp(http_request: Request, file: UploadFile = File(...)):
+    # Stream into the content-addressed store: no name collisions, identical files kept once
+    writer = await asyncio.to_thread(blob_store.BlobWriter)
+    try:
+        while chunk := await file.read(blob_store.CHUNK_SIZE):
+            await asyncio.to_thread(writer.write, chunk)
+        upload = await asyncio.to_thread(writer.commit, file.filename)
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
 
-    extracted_text = parse_rfp_pdf(file_path)
+    # Parsing/OCR is CPU-bound: keep it off the event loop and under the admission limit.
+    # Parses are cached by blob hash, so re-uploads of the same file skip it.
+    extracted_text = await run_blocking(http_request, "upload_rfp", parse_blob, upload["hash"])
 
-    return {"filename": file.filename, "extracted_text": extracted_text[:500]}
+    # Fingerprint the RFP and look for near-identical earlier RFPs whose proposal can be reused
+    rfp_id, similar_rfps = None, []
+    if extracted_text.strip() and not extracted_text.startswith("Error:"):
+        try:
+            rfp_id, similar_rfps = await asyncio.to_thread(rfp_index.register_rfp, extracted_text, file.filename)
+        except Exception as e:
+            logging.warning(f"⚠️ RFP fingerprinting failed: {e}")
+
+    return {
+        "filename": file.filename,
+        "upload_id": upload["upload_id"],
+        "blob": upload["hash"],
+        "deduplicated": upload["deduplicated"],
+        "extracted_text": extracted_text[:500],
+        "rfp_id": rfp_id,
+        "similar_rfps": similar_rfps,
+    }
+
+
+@rfp_router.get("/uploads")
+async def upload_store_stats():
+    """Uploads, distinct blobs, original vs stored bytes and the quota of the upload store."""
+    return await asyncio.to_thread(blob_store.stats)
+
+
+@rfp_router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    upload = await asyncio.to_thread(blob_store.get_upload, upload_id, False)
+    if upload is None:
+        raise HTTPException(status_code=404, detail=f"Unknown upload: {upload_id}")
+    return upload
+
+
+@rfp_router.delete("/uploads/{upload_id}")
+async def delete_upload(upload_id: str):
+    """Drops an upload; its blob is deleted once no other upload references it."""
+    if not await asyncio.to_thread(blob_store.release, upload_id):
+        raise HTTPException(status_code=404, detail=f"Unknown upload: {upload_id}")
+    return {"deleted": upload_id}
+
+
+@rfp_router.get("/ocr_stats")
+async def ocr_stats():
+    """OCR cache hit rate, pages re-run at high resolution and average time per page."""
+    return ocr.ocr_stats()